@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import tempfile
 
 load_dotenv()
 
@@ -7,10 +8,26 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 SCRAPE_DELAY = int(os.getenv('SCRAPE_DELAY_SECONDS', 2))
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', 3))
 
+# DB connection pool (per process). psycopg2 keeps at most MIN idle connections, extra ones are closed on return
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 8))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 20))
+DB_POOL_STATS_SECONDS = int(os.getenv('DB_POOL_STATS_SECONDS', 60))
+
 USER_AGENT = os.getenv('USER_AGENT', 'Mozilla/5.0 (compatible; WebScraperBot/1.0)')
 PLAYWRIGHT_HEADLESS = os.getenv('PLAYWRIGHT_HEADLESS', 'true').lower() == 'true'
 SCRAPE_TIMEOUT = int(os.getenv('SCRAPE_TIMEOUT_SECONDS', 15))
 
+# HTTP-first fetch tier (plain GET, escalate to Playwright only when needed)
+HTTP_FIRST_ENABLED = os.getenv('HTTP_FIRST_ENABLED', 'true').lower() == 'true'
+HTTP_FETCH_TIMEOUT = int(os.getenv('HTTP_FETCH_TIMEOUT_SECONDS', 10))
+HTTP_FETCH_CONCURRENCY = int(os.getenv('HTTP_FETCH_CONCURRENCY', 20))
+HTTP_MIN_BODY_BYTES = int(os.getenv('HTTP_MIN_BODY_BYTES', 1500))
+HTTP_MIN_TEXT_CHARS = int(os.getenv('HTTP_MIN_TEXT_CHARS', 200))
+# Larger bodies (Content-Length or streamed size) are not downloaded by the HTTP tier
+HTTP_MAX_BODY_BYTES = int(os.getenv('HTTP_MAX_BODY_BYTES', 5 * 1024 * 1024))
+# Requeued pages are fetched with If-None-Match / If-Modified-Since of their last response; 304 = not modified
+HTTP_REVALIDATION = os.getenv('HTTP_REVALIDATION', 'true').lower() == 'true'
+
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_DIR = os.getenv('LOG_DIR', 'logs')
@@ -20,13 +37,82 @@ REQUEUE_INTERVAL_DAYS = int(os.getenv('REQUEUE_INTERVAL_DAYS', 90))
 
 # Webhook
 WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+# Change detector: events of scr_change_queue consumed per batch; idle wait for NOTIFY (seconds)
+CHANGE_BATCH_SIZE = int(os.getenv('CHANGE_BATCH_SIZE', 100))
+CHANGE_IDLE_SECONDS = int(os.getenv('CHANGE_IDLE_SECONDS', 300))
 
 # LLM Keys
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
 # Scraper Runtime
-SCRAPER_MAX_RUNTIME_SECONDS = int(os.getenv('SCRAPER_MAX_RUNTIME_SECONDS', 480))
+SCRAPER_MAX_RUNTIME_SECONDS = int(os.getenv('SCRAPER_MAX_RUNTIME_SECONDS', 3600))
+SCRAPER_MAX_CONCURRENCY = int(os.getenv('SCRAPER_MAX_CONCURRENCY', 10))
+# Streaming consumer: size of the in-memory buffer of prefetched queue items
+SCRAPER_PREFETCH_BUFFER = int(os.getenv('SCRAPER_PREFETCH_BUFFER', 40))
+# Politeness per host: SCRAPE_DELAY is the base interval between requests to one host
+SCRAPER_MAX_PER_HOST = int(os.getenv('SCRAPER_MAX_PER_HOST', 2))
+POLITENESS_MAX_DELAY_SECONDS = int(os.getenv('POLITENESS_MAX_DELAY_SECONDS', 60))
+POLITENESS_SLOW_RESPONSE_SECONDS = int(os.getenv('POLITENESS_SLOW_RESPONSE_SECONDS', 8))
+# Claim looks at SCRAPER_CLAIM_WINDOW x batch_size candidates and interleaves their hosts
+SCRAPER_CLAIM_WINDOW = int(os.getenv('SCRAPER_CLAIM_WINDOW', 10))
+# DNS pre-resolution of claimed items (dead hosts are failed + blacklisted before they take a fetch slot)
+DNS_PRERESOLVE_ENABLED = os.getenv('DNS_PRERESOLVE_ENABLED', 'true').lower() == 'true'
+DNS_CONCURRENCY = int(os.getenv('DNS_CONCURRENCY', 50))
+DNS_TIMEOUT = int(os.getenv('DNS_TIMEOUT_SECONDS', 5))
+DNS_POSITIVE_TTL = int(os.getenv('DNS_POSITIVE_TTL_SECONDS', 86400))
+DNS_NEGATIVE_TTL = int(os.getenv('DNS_NEGATIVE_TTL_SECONDS', 86400))
+# Write-behind buffer of scrape results: flush every N items or T milliseconds
+RESULT_FLUSH_ITEMS = int(os.getenv('RESULT_FLUSH_ITEMS', 50))
+RESULT_FLUSH_MS = int(os.getenv('RESULT_FLUSH_MS', 500))
+# Lease length of claimed queue items (renewed while the scraper works on them)
+SCRAPE_LEASE_SECONDS = int(os.getenv('SCRAPE_LEASE_SECONDS', 120))
+
+# Page ready-state of the browser tier: navigation waits for domcontentloaded, then network idle
+# or PAGE_QUIET_MS without DOM mutations (at most PAGE_READY_CAP_MS); client-side redirects followed explicitly
+PAGE_READY_CAP_MS = int(os.getenv('PAGE_READY_CAP_MS', 3000))
+PAGE_QUIET_MS = int(os.getenv('PAGE_QUIET_MS', 500))
+MAX_CLIENT_REDIRECTS = int(os.getenv('MAX_CLIENT_REDIRECTS', 3))
+CLIENT_REDIRECT_MAX_DELAY = int(os.getenv('CLIENT_REDIRECT_MAX_DELAY_SECONDS', 5))
+
+# Browser pool recycling
+BROWSER_RETIRE_AFTER_PAGES = int(os.getenv('BROWSER_RETIRE_AFTER_PAGES', 100))
+BROWSER_MAX_RSS_MB = int(os.getenv('BROWSER_MAX_RSS_MB', 2048))
+BROWSER_RSS_CHECK_SECONDS = int(os.getenv('BROWSER_RSS_CHECK_SECONDS', 30))
+# Route profile of the browser tier: aborted resource types and third-party domains (incl. subdomains)
+BROWSER_BLOCK_RESOURCES = os.getenv('BROWSER_BLOCK_RESOURCES', 'true').lower() == 'true'
+BROWSER_BLOCKED_RESOURCE_TYPES = [t.strip() for t in os.getenv(
+    'BROWSER_BLOCKED_RESOURCE_TYPES', 'image,media,font'
+).split(',') if t.strip()]
+BROWSER_BLOCKED_DOMAINS = [d.strip().lower() for d in os.getenv(
+    'BROWSER_BLOCKED_DOMAINS',
+    'google-analytics.com,googletagmanager.com,googlesyndication.com,googleadservices.com,doubleclick.net,'
+    'facebook.net,hotjar.com,clarity.ms,bat.bing.com,snap.licdn.com,ads.linkedin.com,analytics.tiktok.com,'
+    'criteo.com,criteo.net,taboola.com,outbrain.com,'
+    'adnxs.com,scorecardresearch.com,quantserve.com,cookiebot.com,onetrust.com,cookielaw.org,'
+    'ytimg.com,vimeocdn.com,newrelic.com,nr-data.net,sentry.io,matomo.cloud,'
+    'hubspot.com,hs-analytics.net,hs-scripts.com,intercom.io,tawk.to,zopim.com,crisp.chat'
+).split(',') if d.strip()]
+
+# Parser batch mode: PARSER_WORKERS > 1 leases PARSER_BATCH_SIZE results at a time and parses them in a process pool
+PARSER_WORKERS = int(os.getenv('PARSER_WORKERS', 1))
+PARSER_BATCH_SIZE = int(os.getenv('PARSER_BATCH_SIZE', 200))
+PARSER_LEASE_SECONDS = int(os.getenv('PARSER_LEASE_SECONDS', 600))
+# Opt-in parse-on-fetch: the scraper parses fresh pages in its own process pool and stores scr_parsed_data with the result
+PARSE_ON_FETCH = os.getenv('PARSE_ON_FETCH', 'false').lower() == 'true'
+PARSE_ON_FETCH_WORKERS = int(os.getenv('PARSE_ON_FETCH_WORKERS', 2))
+# Language detection without a declared language: langdetect on a LANGUAGE_SAMPLE_CHARS sample; results cached per URL
+LANGUAGE_SAMPLE_CHARS = int(os.getenv('LANGUAGE_SAMPLE_CHARS', 2000))
+LANGUAGE_CACHE_SIZE = int(os.getenv('LANGUAGE_CACHE_SIZE', 1024))
+# Re-scrapes whose normalized HTML fingerprint equals the previous result are stored as 'not_modified' (no file, no parse)
+SKIP_UNCHANGED_PAGES = os.getenv('SKIP_UNCHANGED_PAGES', 'true').lower() == 'true'
+# Address extraction runs only on +-ADDRESS_WINDOW_TOKENS tokens around post codes (0 = scan the whole text)
+ADDRESS_WINDOW_TOKENS = int(os.getenv('ADDRESS_WINDOW_TOKENS', 30))
+# Address gazetteers per country (<cc>_address_<kind>.bloom.dat + exact .terms tables, scripts/bloom_admin.py build-gazetteer)
+GAZETTEER_DIR = os.getenv('GAZETTEER_DIR', os.getenv('BLOOM_DIR', '.'))
+# Address Bloom filters are mmapped read-only from an uncompressed copy in ADDRESS_BLOOM_CACHE_DIR (one copy per host)
+ADDRESS_BLOOM_MMAP = os.getenv('ADDRESS_BLOOM_MMAP', 'true').lower() == 'true'
+ADDRESS_BLOOM_CACHE_DIR = os.getenv('ADDRESS_BLOOM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'scr-bloom'))
 
 # Raw HTML Disk/NFS Storage
 RAW_HTML_DIR = os.getenv('RAW_HTML_DIR', 'data/raw-html')
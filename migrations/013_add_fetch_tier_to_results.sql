@@ -0,0 +1,19 @@
+-- Record which fetch tier produced a scrape result ('http' = plain GET, 'browser' = Playwright)
+-- and why the HTTP tier escalated to the browser
+
+ALTER TABLE scr_scrape_results
+ADD COLUMN IF NOT EXISTS fetch_tier VARCHAR(10),
+ADD COLUMN IF NOT EXISTS escalation_reason VARCHAR(30);
+
+CREATE OR REPLACE VIEW scr_fetch_tier_stats AS
+SELECT
+    DATE(scraped_at) as date,
+    fetch_tier,
+    escalation_reason,
+    COUNT(*) as count,
+    COUNT(*) FILTER (WHERE status_code = 200) as successful
+FROM scr_scrape_results
+WHERE scraped_at > NOW() - INTERVAL '30 days'
+  AND fetch_tier IS NOT NULL
+GROUP BY DATE(scraped_at), fetch_tier, escalation_reason
+ORDER BY date DESC, count DESC;
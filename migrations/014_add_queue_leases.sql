@@ -0,0 +1,15 @@
+-- Lease-based claiming: a scraper leases queue items (status 'processing') until lease_expires_at.
+-- Items with an expired lease are reclaimed by the next claim, no reset scripts needed.
+
+ALTER TABLE scr_scrape_queue
+ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+
+-- Items left in 'processing' before this migration become reclaimable immediately
+UPDATE scr_scrape_queue
+SET lease_expires_at = NOW()
+WHERE status = 'processing'
+  AND lease_expires_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_scr_queue_lease_expires ON scr_scrape_queue(lease_expires_at)
+WHERE status = 'processing';
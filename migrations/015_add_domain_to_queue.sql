@@ -0,0 +1,69 @@
+-- Queue items carry their (normalized) domain so the blacklist check in the claim is a primary key lookup
+-- instead of a LIKE substring scan over the whole blacklist.
+-- Domain = lowercase host without userinfo, port and leading 'www.' (same as src.utils.urls.url_domain).
+
+CREATE OR REPLACE FUNCTION scr_url_domain(url TEXT) RETURNS TEXT AS $$
+    SELECT NULLIF(
+        regexp_replace(
+            lower(substring(url from '^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?(?:[^/?#@]*@)?([^/?#:]+)')),
+            '^www\.', ''
+        ),
+        ''
+    )
+$$ LANGUAGE SQL IMMUTABLE;
+
+ALTER TABLE scr_scrape_queue
+ADD COLUMN IF NOT EXISTS domain TEXT;
+
+CREATE OR REPLACE FUNCTION scr_scrape_queue_set_domain() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.domain := scr_url_domain(NEW.url);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_scr_scrape_queue_domain ON scr_scrape_queue;
+CREATE TRIGGER trg_scr_scrape_queue_domain
+BEFORE INSERT OR UPDATE OF url ON scr_scrape_queue
+FOR EACH ROW EXECUTE FUNCTION scr_scrape_queue_set_domain();
+
+UPDATE scr_scrape_queue
+SET domain = scr_url_domain(url)
+WHERE domain IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_scr_queue_domain ON scr_scrape_queue(domain);
+
+-- A blacklisted domain also covers its subdomains (example.be -> shop.example.be).
+-- scr_domain_suffixes('shop.example.be') = {shop.example.be, example.be, be}, so the claim checks
+-- the blacklist with `b.domain = ANY(scr_domain_suffixes(q.domain))` - primary key lookups, no LIKE scan.
+CREATE OR REPLACE FUNCTION scr_domain_suffixes(domain TEXT) RETURNS TEXT[] AS $$
+    SELECT array_agg(array_to_string(parts[i:], '.') ORDER BY i)
+    FROM (SELECT string_to_array(domain, '.') AS parts) p,
+         generate_series(1, cardinality(p.parts)) AS i
+$$ LANGUAGE SQL IMMUTABLE;
+
+-- Subdomain lookup for blacklist/whitelist bulk updates: reverse(domain) LIKE 'eb.elpmaxe.%'
+CREATE INDEX IF NOT EXISTS idx_scr_queue_domain_reversed
+ON scr_scrape_queue (reverse(domain) text_pattern_ops);
+
+-- Blacklist entries use the same normalization (scraper used to store the raw netloc, e.g. 'www.example.be')
+INSERT INTO scr_domain_blacklist (domain, reason, fail_count, first_failed_at, last_failed_at, auto_added, notes)
+SELECT DISTINCT ON (scr_url_domain(domain)) scr_url_domain(domain), reason, fail_count, first_failed_at, last_failed_at, auto_added, notes
+FROM scr_domain_blacklist
+WHERE scr_url_domain(domain) IS DISTINCT FROM domain
+  AND scr_url_domain(domain) IS NOT NULL
+ORDER BY scr_url_domain(domain), last_failed_at DESC NULLS LAST
+ON CONFLICT (domain) DO NOTHING;
+
+DELETE FROM scr_domain_blacklist
+WHERE scr_url_domain(domain) IS DISTINCT FROM domain;
+
+-- Pending items of blacklisted domains leave the hot dequeue path for good
+-- (queue_admin whitelist returns them to 'pending')
+UPDATE scr_scrape_queue q
+SET status = 'blacklisted'
+WHERE q.status = 'pending'
+  AND EXISTS (
+      SELECT 1 FROM scr_domain_blacklist b
+      WHERE b.domain = ANY(scr_domain_suffixes(q.domain))
+  );
@@ -0,0 +1,12 @@
+-- Shared DNS resolution cache of the scraper's pre-resolution stage (positive and NXDOMAIN answers with TTL)
+
+CREATE TABLE IF NOT EXISTS scr_dns_cache (
+    host TEXT PRIMARY KEY,
+    resolved BOOLEAN NOT NULL,
+    ip_address TEXT,
+    error TEXT,
+    checked_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_scr_dns_cache_expires ON scr_dns_cache(expires_at);
@@ -0,0 +1,19 @@
+-- Browser-tier network stats per page (route profile of src/utils/resource_blocking.py):
+-- {"requests", "transferred_bytes", "blocked_requests", "blocked_by_type": {type: n}, "blocked_by_domain"}
+
+ALTER TABLE scr_scrape_results
+ADD COLUMN IF NOT EXISTS fetch_stats JSONB;
+
+CREATE OR REPLACE VIEW scr_resource_blocking_stats AS
+SELECT
+    DATE(scraped_at) as date,
+    COUNT(*) as pages,
+    ROUND(AVG((fetch_stats->>'requests')::int), 1) as avg_requests,
+    ROUND(AVG((fetch_stats->>'transferred_bytes')::bigint) / 1024.0, 1) as avg_transferred_kb,
+    ROUND(AVG((fetch_stats->>'blocked_requests')::int), 1) as avg_blocked_requests,
+    ROUND(AVG((fetch_stats->>'blocked_by_domain')::int), 1) as avg_blocked_third_party
+FROM scr_scrape_results
+WHERE scraped_at > NOW() - INTERVAL '30 days'
+  AND fetch_stats IS NOT NULL
+GROUP BY DATE(scraped_at)
+ORDER BY date DESC;
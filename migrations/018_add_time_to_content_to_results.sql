@@ -0,0 +1,22 @@
+-- Time from navigation start (browser) / request start (HTTP tier) to the page content being read,
+-- and which ready-state signal ended the wait ('networkidle', 'dom_quiet', 'cap', 'navigated').
+-- Data for tuning SCRAPE_TIMEOUT_SECONDS / PAGE_READY_CAP_MS.
+
+ALTER TABLE scr_scrape_results
+ADD COLUMN IF NOT EXISTS time_to_content_ms INTEGER,
+ADD COLUMN IF NOT EXISTS ready_signal VARCHAR(20);
+
+CREATE OR REPLACE VIEW scr_time_to_content_stats AS
+SELECT
+    fetch_tier,
+    ready_signal,
+    COUNT(*) as pages,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY time_to_content_ms)::int as p50_ms,
+    PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY time_to_content_ms)::int as p90_ms,
+    PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY time_to_content_ms)::int as p99_ms,
+    MAX(time_to_content_ms) as max_ms
+FROM scr_scrape_results
+WHERE scraped_at > NOW() - INTERVAL '7 days'
+  AND time_to_content_ms IS NOT NULL
+GROUP BY fetch_tier, ready_signal
+ORDER BY fetch_tier, pages DESC;
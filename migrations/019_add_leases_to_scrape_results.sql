@@ -0,0 +1,10 @@
+-- Lease of scrape results claimed by a batch-mode parser (processing_status = 'processing');
+-- an expired lease (crashed parser) makes the result claimable again
+
+ALTER TABLE scr_scrape_results
+ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_results_unparsed
+ON scr_scrape_results(scraped_at)
+WHERE processing_status IN ('new', 'processing');
@@ -0,0 +1,46 @@
+-- Change-detection work queue: every new parsed version of a listing is enqueued by a trigger
+-- (parser single/batch mode, parse-on-fetch in the scraper) and announced with NOTIFY scr_change_queue.
+-- The change detector consumes events in batches and compares each version with the previous one only.
+
+CREATE TABLE IF NOT EXISTS scr_change_queue (
+    change_id BIGSERIAL PRIMARY KEY,
+    uni_listing_id VARCHAR(50) NOT NULL,
+    parsed_id INTEGER NOT NULL REFERENCES scr_parsed_data(parsed_id) ON DELETE CASCADE,
+    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_scr_change_queue_parsed ON scr_change_queue(parsed_id);
+
+-- Previous version of a listing (LATERAL lookup of the detector)
+CREATE INDEX IF NOT EXISTS idx_scr_parsed_uni_extracted
+ON scr_parsed_data(uni_listing_id, extracted_at DESC, parsed_id DESC);
+
+CREATE OR REPLACE FUNCTION scr_enqueue_parsed_change()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO scr_change_queue (uni_listing_id, parsed_id)
+    VALUES (NEW.uni_listing_id, NEW.parsed_id);
+    -- empty payload: notifications are folded into one per transaction, the detector just wakes up
+    PERFORM pg_notify('scr_change_queue', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_scr_parsed_data_change_queue ON scr_parsed_data;
+CREATE TRIGGER trg_scr_parsed_data_change_queue
+AFTER INSERT ON scr_parsed_data
+FOR EACH ROW
+WHEN (NEW.uni_listing_id IS NOT NULL)
+EXECUTE FUNCTION scr_enqueue_parsed_change();
+
+-- Backlog of the previous GROUP BY scan: newest version of every listing with more than one version
+INSERT INTO scr_change_queue (uni_listing_id, parsed_id)
+SELECT DISTINCT ON (uni_listing_id) uni_listing_id, parsed_id
+FROM scr_parsed_data
+WHERE uni_listing_id IN (
+    SELECT uni_listing_id FROM scr_parsed_data
+    WHERE uni_listing_id IS NOT NULL
+    GROUP BY uni_listing_id
+    HAVING COUNT(*) >= 2
+)
+ORDER BY uni_listing_id, extracted_at DESC, parsed_id DESC;
@@ -0,0 +1,8 @@
+-- Canonical hashes of the tracked fields of a parsed version and a fingerprint of the whole tracked record
+-- (src/utils/content_hash.py). A version with the fingerprint of the listing's latest version is not inserted;
+-- the change detector compares hash vectors and loads data only for changed fields.
+-- Rows from before this migration have NULL hashes and are compared by data.
+
+ALTER TABLE scr_parsed_data
+ADD COLUMN IF NOT EXISTS field_hashes JSONB,
+ADD COLUMN IF NOT EXISTS fingerprint TEXT;
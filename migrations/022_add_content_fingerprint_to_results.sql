@@ -0,0 +1,12 @@
+-- Fingerprint of the fetched page (normalized HTML, src/utils/html_fingerprint.py). A re-scrape with the fingerprint
+-- of the item's previous result is stored as processing_status 'not_modified': no new raw HTML file (html_path and
+-- language are those of same_as_result_id), no parsing, no parsed data version for the change detector.
+
+ALTER TABLE scr_scrape_results
+ADD COLUMN IF NOT EXISTS content_fingerprint TEXT,
+ADD COLUMN IF NOT EXISTS same_as_result_id INTEGER REFERENCES scr_scrape_results(result_id) ON DELETE SET NULL;
+
+-- Previous result of a queue item (LATERAL lookup of the scraper's claim)
+CREATE INDEX IF NOT EXISTS idx_results_queue_fingerprint
+ON scr_scrape_results(queue_id, scraped_at DESC, result_id DESC)
+WHERE content_fingerprint IS NOT NULL;
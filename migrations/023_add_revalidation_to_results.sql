@@ -0,0 +1,34 @@
+-- Conditional re-scrapes of the HTTP tier (If-None-Match / If-Modified-Since from the previous result's headers):
+-- revalidation 'hit' = 304 Not Modified (stored as a not_modified result), 'miss' = full page despite the validators,
+-- NULL = plain GET
+
+ALTER TABLE scr_scrape_results
+ADD COLUMN IF NOT EXISTS revalidation VARCHAR(10);
+
+-- A 304 is a successful scrape of an unchanged page
+CREATE OR REPLACE VIEW scr_daily_stats AS
+SELECT
+    DATE(scraped_at) as date,
+    COUNT(*) as total_scrapes,
+    COUNT(*) FILTER (WHERE status_code IN (200, 304)) as successful,
+    COUNT(DISTINCT detected_language) as languages
+FROM scr_scrape_results
+WHERE scraped_at > NOW() - INTERVAL '30 days'
+GROUP BY DATE(scraped_at)
+ORDER BY date DESC;
+
+-- Revalidation hit rate per domain; unchanged_misses = full page although its fingerprint did not change
+-- (the host ignores or does not emit validators)
+CREATE OR REPLACE VIEW scr_revalidation_stats AS
+SELECT
+    q.domain,
+    COUNT(*) as revalidations,
+    COUNT(*) FILTER (WHERE r.revalidation = 'hit') as hits,
+    ROUND(100.0 * COUNT(*) FILTER (WHERE r.revalidation = 'hit') / COUNT(*), 1) as hit_rate,
+    COUNT(*) FILTER (WHERE r.revalidation = 'miss' AND r.same_as_result_id IS NOT NULL) as unchanged_misses
+FROM scr_scrape_results r
+JOIN scr_scrape_queue q ON q.queue_id = r.queue_id
+WHERE r.scraped_at > NOW() - INTERVAL '30 days'
+  AND r.revalidation IS NOT NULL
+GROUP BY q.domain
+ORDER BY revalidations DESC;
@@ -1,9 +1,11 @@
 #!/bin/bash
 while true; do
     date
-    # Run scraper with a 10-minute timeout (600s).
+    # Scraper keeps one browser pool alive for SCRAPER_MAX_RUNTIME_SECONDS (default 3600s),
+    # the timeout adds one lease period (SCRAPE_LEASE_SECONDS, default 120s) as grace period for shutdown.
     # If it hangs, send SIGTERM. If it ignores that for 10s, send SIGKILL.
-    timeout --kill-after=10s 600s uv run python -m src.workers.scraper  &> "logs/scraper-`date +%s`.log"
+    SCRAPER_TIMEOUT=$(( ${SCRAPER_MAX_RUNTIME_SECONDS:-3600} + ${SCRAPE_LEASE_SECONDS:-120} ))s
+    timeout --kill-after=10s $SCRAPER_TIMEOUT uv run python -m src.workers.scraper  &> "logs/scraper-`date +%s`.log"
     EXIT_CODE=$?
 
     if [ -e 'STOP' ] ; then echo STOP ; rm 'STOP' ; exit 0 ; fi
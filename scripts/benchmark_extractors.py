@@ -0,0 +1,208 @@
+import click
+import glob
+import gzip
+import multiprocessing
+import os
+import re
+import sys
+import time
+import unicodedata
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+from src.utils.document import ParsedDocument
+from src.utils.patterns import PATTERNS, extract_emails, extract_phones, extract_social_media_from_soup
+from src.utils.address import AddressExtractor, normalize_token
+from src.utils.gazetteer import POST_CODE, MUNICIPALITY, STREET
+from config.settings import RAW_HTML_DIR
+
+# Previous implementation (string patterns, one re.search per platform and href) - baseline for comparison
+
+def legacy_extract_emails(text):
+    return list(set(re.findall(PATTERNS['email'], text, re.IGNORECASE)))
+
+def legacy_extract_phones(text, country='cz'):
+    pattern = PATTERNS['phone'].get(country, PATTERNS['phone']['cz'])
+    return [re.sub(r'[\s\-\./]', '', p) for p in re.findall(pattern, text)]
+
+def legacy_extract_social_media(hrefs):
+    result = {}
+    for href in hrefs:
+        for platform, pattern in PATTERNS['social_media'].items():
+            if platform not in result and re.search(pattern, href, re.IGNORECASE):
+                result[platform] = href
+    return result
+
+def legacy_unaccent(text):
+    nfkd_form = unicodedata.normalize('NFKD', text)
+    ascii_text = ''.join([c for c in nfkd_form if not unicodedata.combining(c)])
+    return ascii_text.encode('ascii', 'ignore').decode('ascii')
+
+def legacy_extract_addresses(extractor, text):
+    """Previous AddressExtractor.extract_addresses: unaccent + up to 3 bloom probes + 2 regexes per token"""
+    words = re.split(r'[;,\s]+', text)
+    blooms = extractor.gazetteer.blooms
+    addresses, filtered_words, filtered_tags = [], [], []
+    found = accept_err = num_counter = 0
+
+    def reset():
+        return [], [], 0, 0, 0
+
+    for w in words:
+        term = legacy_unaccent(w.upper())
+        if len(term) > 0:
+            if term in ['ROUTE', 'RUE', 'AVENUE']:
+                filtered_words.append(term); filtered_tags.append('EXTRA'); found += 1
+            elif term in ['BELGIUM', 'BELGIE', '-', ',', 'DU', 'DE', 'BUSINESS', 'CENTER']:
+                pass
+            elif term in ['ADRESSE']:
+                filtered_words, filtered_tags, found, accept_err, num_counter = reset()
+            elif term in blooms[POST_CODE]:
+                filtered_words.append(term); filtered_tags.append('POST_CODE'); found += 1; num_counter += 1
+            elif term in blooms[MUNICIPALITY]:
+                filtered_words.append(term); filtered_tags.append('MUNICIPALITY'); found += 1; num_counter = 0
+            elif term in blooms[STREET]:
+                filtered_words.append(term); filtered_tags.append('STREET'); found += 1; num_counter = 0
+            elif re.search(r"^[0-9.()/-]{9,20}", term):
+                filtered_words, filtered_tags, found, accept_err, num_counter = reset()
+            elif re.search(r"^[0-9]+[/-]?[0-9]*[a-zA-Z]?$", term):
+                filtered_words.append(term); filtered_tags.append('NUMBER'); found += 1; num_counter += 1
+            elif accept_err == 0:
+                accept_err = 1
+            else:
+                filtered_words, filtered_tags, found, accept_err, num_counter = reset()
+        if num_counter > 3:
+            filtered_words, filtered_tags, found, accept_err, num_counter = reset()
+        if found >= 4:
+            if 'POST_CODE' in filtered_tags and 'MUNICIPALITY' in filtered_tags and 'NUMBER' in filtered_tags:
+                addresses.append(' '.join(filtered_words))
+                filtered_words, filtered_tags, found, accept_err, num_counter = reset()
+            elif found >= 10:
+                filtered_words, filtered_tags, found = filtered_words[3:], filtered_tags[3:], found - 3
+    return list(set(addresses))
+
+def load_pages(html_dir, limit):
+    """(name, ParsedDocument) of raw HTML files (*.html.gz / *.html) under html_dir"""
+    paths = sorted(glob.glob(os.path.join(html_dir, '**', '*.html*'), recursive=True))[:limit]
+    pages = []
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', errors='ignore') as f:
+            pages.append((path, ParsedDocument(f.read())))
+    return pages
+
+def timed(fn, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [fn(doc) for _, doc in pages]
+    return (time.perf_counter() - started) / repeat, outputs
+
+def report(name, legacy, current, pages, repeat):
+    legacy_time, legacy_out = timed(legacy, pages, repeat)
+    current_time, current_out = timed(current, pages, repeat)
+    same = all(
+        (sorted(a) if isinstance(a, list) else a) == (sorted(b) if isinstance(b, list) else b)
+        for a, b in zip(legacy_out, current_out)
+    )
+    per_page = 1000 / len(pages)
+    click.echo(
+        f"{name:<14} {legacy_time * per_page:>9.3f} {current_time * per_page:>9.3f} "
+        f"{legacy_time / current_time if current_time else 0:>8.1f}x  {'same' if same else 'DIFFERENT'}"
+    )
+
+def load_parsed_pages(html_dir, limit):
+    pages = load_pages(html_dir, limit)
+    for _, doc in pages:
+        doc.text, doc.links  # parse cost is not part of the extractor timings
+    if not pages:
+        click.echo(f"No pages found in {html_dir}")
+    return pages
+
+@click.group()
+def cli():
+    """Micro-benchmarky extractorů: předchozí vs. současná implementace na reálných stránkách"""
+    pass
+
+@cli.command()
+@click.option('--html-dir', default=RAW_HTML_DIR, help='Directory with raw HTML pages (*.html.gz)')
+@click.option('--limit', default=500, help='Max pages')
+@click.option('--repeat', default=5, help='Repetitions per extractor')
+@click.option('--country', default='be', help='Country of phone patterns')
+def patterns(html_dir, limit, repeat, country):
+    """Emails, phones, social media links"""
+    pages = load_parsed_pages(html_dir, limit)
+    if not pages:
+        return
+
+    click.echo(f"=== {len(pages)} pages, {repeat} repetitions, ms per page ===")
+    click.echo(f"{'Extractor':<14} {'legacy':>9} {'current':>9} {'speedup':>9}")
+    report('emails', lambda d: legacy_extract_emails(d.text), lambda d: extract_emails(d.text), pages, repeat)
+    report('phones', lambda d: legacy_extract_phones(d.text, country), lambda d: extract_phones(d.text, country), pages, repeat)
+    report('social_media', lambda d: legacy_extract_social_media(d.links), extract_social_media_from_soup, pages, repeat)
+
+@cli.command()
+@click.option('--html-dir', default=RAW_HTML_DIR, help='Directory with raw HTML pages (*.html.gz)')
+@click.option('--limit', default=500, help='Max pages')
+@click.option('--repeat', default=3, help='Repetitions')
+def address(html_dir, limit, repeat):
+    """AddressExtractor (BE bloom filters)"""
+    pages = load_parsed_pages(html_dir, limit)
+    if not pages:
+        return
+    extractor = AddressExtractor()
+    if not extractor.loaded:
+        click.echo("Address bloom filters not loaded (BLOOM_DIR)")
+        return
+
+    click.echo(f"=== {len(pages)} pages, {repeat} repetitions, ms per page ===")
+    click.echo(f"{'Extractor':<14} {'legacy':>9} {'current':>9} {'speedup':>9}")
+    # first (cold) pass: token caches empty
+    extractor.classify.cache_clear()
+    normalize_token.cache_clear()
+    full_scan = lambda d: extractor.extract_addresses(d.text, window=0)
+    report('address cold', lambda d: legacy_extract_addresses(extractor, d.text), full_scan, pages, 1)
+    report('address', lambda d: legacy_extract_addresses(extractor, d.text), full_scan, pages, repeat)
+    # post code windows (ADDRESS_WINDOW_TOKENS) vs. the full token scan
+    report('windows', full_scan, lambda d: extractor.extract_addresses(d.text), pages, repeat)
+
+def proportional_rss_kb():
+    """PSS: RSS with shared pages divided among the processes mapping them"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+def filter_worker(mapped, terms):
+    import src.utils.gazetteer as gazetteer
+    gazetteer.ADDRESS_BLOOM_MMAP = mapped
+    extractor = AddressExtractor()
+    for term in terms:
+        extractor.gazetteer.lookup(term)
+    stats = dict(extractor.load_stats)
+    stats['pss_kb'] = proportional_rss_kb()
+    return stats
+
+@cli.command()
+@click.option('--html-dir', default=RAW_HTML_DIR, help='Directory with raw HTML pages (*.html.gz)')
+@click.option('--limit', default=100, help='Max pages (tokens probed by every worker)')
+@click.option('--workers', default=4, help='Worker processes')
+def filters(html_dir, limit, workers):
+    """Address Bloom filters per worker: private copy vs. shared mmap (load time, RSS, PSS)"""
+    terms = sorted({normalize_token(w) for _, doc in load_pages(html_dir, limit) for w in doc.text.split()})
+    click.echo(f"=== {workers} workers, {len(terms)} distinct tokens probed ===")
+    click.echo(f"{'Mode':<8} {'load ms':>9} {'RSS +kB':>9} {'PSS kB':>9}")
+    ctx = multiprocessing.get_context('spawn')
+    for mapped in (False, True):
+        with ctx.Pool(workers) as pool:
+            results = pool.starmap(filter_worker, [(mapped, terms)] * workers)
+        avg = lambda key: sum(r[key] or 0 for r in results) / len(results)
+        click.echo(
+            f"{'mmap' if mapped else 'private':<8} {avg('load_ms'):>9.1f} {avg('rss_delta_kb'):>9.0f} {avg('pss_kb'):>9.0f}"
+        )
+
+if __name__ == '__main__':
+    cli()
@@ -7,6 +7,9 @@ sys.path.append(os.getcwd())
 
 from src.utils.bloom import BloomFilterManager
 from src.utils.db import get_db_connection
+from src.utils.address import gazetteer_terms
+from src.utils.gazetteer import GAZETTEER_PROFILES, build_gazetteer
+from config.settings import GAZETTEER_DIR
 
 @click.group()
 def cli():
@@ -70,5 +73,29 @@ def list_filters():
     for row in cur.fetchall():
         click.echo(f"{row[0]:<20} {row[1]:>10,} items  (updated: {row[2]})")
 
+def post_code_terms(lines, digits):
+    """'110 00' -> '11000', '1234 AB' -> '1234' (digits of the post code token)"""
+    for line in lines:
+        code = ''.join(ch for ch in line if ch.isdigit())[:digits]
+        if len(code) == digits:
+            yield code
+
+@cli.command('build-gazetteer')
+@click.argument('country', type=click.Choice(sorted(GAZETTEER_PROFILES)))
+@click.option('--post-codes', type=click.File('r', encoding='utf-8'), required=True, help='Post codes, one per line')
+@click.option('--municipalities', type=click.File('r', encoding='utf-8'), required=True, help='Municipality names, one per line')
+@click.option('--streets', type=click.File('r', encoding='utf-8'), required=True, help='Street names, one per line')
+@click.option('--error-rate', default=0.001, help='False positive rate of the Bloom filters')
+@click.option('--out-dir', default=GAZETTEER_DIR, help='Gazetteer directory')
+def build_gazetteer_cmd(country, post_codes, municipalities, streets, error_rate, out_dir):
+    """Sestav gazetteer země (Bloom filtry + přesné tabulky) ze zdrojových seznamů"""
+    counts = build_gazetteer(country, {
+        'post_codes': post_code_terms(post_codes, GAZETTEER_PROFILES[country]['post_code_digits']),
+        'municipalities': gazetteer_terms(municipalities),
+        'streets': gazetteer_terms(streets),
+    }, out_dir, error_rate)
+    for kind, count in counts.items():
+        click.echo(f"✓ {country}_address_{kind}: {count:,} terms")
+
 if __name__ == '__main__':
     cli()
@@ -31,13 +31,15 @@ def health():
     cur.execute("""
         SELECT
             COUNT(*) as scrapes,
-            COUNT(DISTINCT detected_language) as languages
+            COUNT(DISTINCT detected_language) as languages,
+            COUNT(*) FILTER (WHERE processing_status = 'not_modified') as not_modified
         FROM scr_scrape_results
         WHERE scraped_at > NOW() - INTERVAL '24 hours'
     """)
     row = cur.fetchone()
     click.echo(f"Scrapes: {row[0]}")
     click.echo(f"Languages: {row[1]}")
+    click.echo(f"Not modified: {row[2]}")
 
     # Parsing backlog
     cur.execute("""
@@ -109,6 +111,90 @@ def blacklist():
     for row in cur.fetchall():
         click.echo(f"{row[0]:<20} {row[1]:>8} {row[2]:>10.1f}")
 
+@cli.command()
+@click.option('--limit', default=20, help='Number of domains')
+def revalidation(limit):
+    """Conditional GET (304) hit rate per domain, last 30 days"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT * FROM scr_revalidation_stats LIMIT %s", (limit,))
+
+    click.echo(f"=== Revalidation (Top {limit} domains) ===")
+    click.echo(f"{'Domain':<40} {'Requests':>8} {'304':>8} {'Hit %':>6} {'Unchanged 200':>14}")
+    click.echo("-" * 80)
+
+    for row in cur.fetchall():
+        click.echo(f"{row[0]:<40} {row[1]:>8} {row[2]:>8} {row[3]:>6} {row[4]:>14}")
+
+@cli.command()
+@click.option('--days', default=7, help='Number of days')
+def tiers(days):
+    """HTTP tier vs. browser hit rate"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT fetch_tier, COUNT(*)
+        FROM scr_scrape_results
+        WHERE scraped_at > NOW() - %s * INTERVAL '1 day'
+          AND fetch_tier IS NOT NULL
+        GROUP BY fetch_tier
+    """, (days,))
+    counts = dict(cur.fetchall())
+    total = sum(counts.values())
+
+    click.echo(f"=== Fetch tiers (last {days} days) ===")
+    for tier, count in sorted(counts.items()):
+        click.echo(f"{tier:<10} {count:>8} ({count / total * 100:.1f}%)")
+
+    cur.execute("""
+        SELECT escalation_reason, SUM(count)
+        FROM scr_fetch_tier_stats
+        WHERE fetch_tier = 'browser'
+          AND date > CURRENT_DATE - %s
+        GROUP BY escalation_reason
+        ORDER BY 2 DESC
+    """, (days,))
+
+    click.echo("\n=== Escalation reasons ===")
+    for row in cur.fetchall():
+        click.echo(f"{row[0] or '-':<20} {row[1]:>8}")
+
+@cli.command()
+@click.option('--days', default=7, help='Number of days')
+def blocking(days):
+    """Browser tier: loaded vs. blocked requests per page"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT * FROM scr_resource_blocking_stats
+        WHERE date > CURRENT_DATE - %s
+    """, (days,))
+
+    click.echo(f"=== Resource blocking (last {days} days, averages per page) ===")
+    click.echo(f"{'Date':<12} {'Pages':>7} {'Requests':>9} {'KB':>9} {'Blocked':>8} {'3rd party':>10}")
+    click.echo("-" * 60)
+
+    for row in cur.fetchall():
+        click.echo(f"{str(row[0]):<12} {row[1]:>7} {row[2]:>9} {row[3]:>9} {row[4]:>8} {row[5]:>10}")
+
+@cli.command()
+def readiness():
+    """Time to content per fetch tier and ready-state signal (last 7 days)"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT * FROM scr_time_to_content_stats")
+
+    click.echo("=== Time to content (last 7 days) ===")
+    click.echo(f"{'Tier':<8} {'Signal':<12} {'Pages':>7} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}")
+    click.echo("-" * 62)
+
+    for row in cur.fetchall():
+        click.echo(f"{row[0] or '-':<8} {row[1] or '-':<12} {row[2]:>7} {row[3]:>7} {row[4]:>7} {row[5]:>7} {row[6]:>7}")
+
 @cli.command()
 @click.argument('uni_listing_id', type=str)
 def listing(uni_listing_id):
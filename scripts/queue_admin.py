@@ -6,7 +6,7 @@ import os
 sys.path.append(os.getcwd())
 
 from src.utils.db import get_db_connection
-from src.utils.urls import normalize_url
+from src.utils.urls import normalize_url, url_domain, subdomain_like_pattern
 
 @click.group()
 def cli():
@@ -129,6 +129,7 @@ def reset_failed():
 @click.option('--reason', default='manual', help='Reason for blacklist')
 def blacklist(domain, reason):
     """Přidej doménu do blacklistu"""
+    domain = url_domain(domain)
     conn = get_db_connection()
     cur = conn.cursor()
 
@@ -140,21 +141,38 @@ def blacklist(domain, reason):
         SET reason = EXCLUDED.reason
     """, (domain, reason))
 
+    # Pending items of the domain never reach the scraper's claim again
+    cur.execute("""
+        UPDATE scr_scrape_queue
+        SET status = 'blacklisted'
+        WHERE (domain = %s OR reverse(domain) LIKE %s) AND status = 'pending'
+    """, (domain, subdomain_like_pattern(domain)))
+
     conn.commit()
-    click.echo(f"✓ Blacklisted {domain}")
+    click.echo(f"✓ Blacklisted {domain} ({cur.rowcount} pending items marked blacklisted)")
 
 @cli.command()
 @click.argument('domain')
 def whitelist(domain):
     """Odstraň doménu z blacklistu"""
+    domain = url_domain(domain)
     conn = get_db_connection()
     cur = conn.cursor()
 
     cur.execute("DELETE FROM scr_domain_blacklist WHERE domain = %s", (domain,))
 
     if cur.rowcount:
+        cur.execute("""
+            UPDATE scr_scrape_queue
+            SET status = 'pending'
+            WHERE (domain = %s OR reverse(domain) LIKE %s) AND status = 'blacklisted'
+              AND NOT EXISTS (
+                  SELECT 1 FROM scr_domain_blacklist b
+                  WHERE b.domain = ANY(scr_domain_suffixes(scr_scrape_queue.domain))
+              )
+        """, (domain, subdomain_like_pattern(domain)))
         conn.commit()
-        click.echo(f"✓ Removed {domain} from blacklist")
+        click.echo(f"✓ Removed {domain} from blacklist ({cur.rowcount} items back to pending)")
     else:
         click.echo(f"Domain {domain} not in blacklist")
 
@@ -7,16 +7,21 @@ sys.path.append(os.getcwd())
 from src.utils.db import get_db_connection, get_cursor
 
 def reset_stuck_items():
+    """
+    Scraper leases are reclaimed automatically once they expire.
+    This only speeds it up: items with an expired (or missing) lease go back to 'pending' right away.
+    """
     conn = get_db_connection()
     with get_cursor(conn) as cur:
         cur.execute("""
             UPDATE scr_scrape_queue 
-            SET status = 'pending' 
+            SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL
             WHERE status = 'processing'
+              AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
         """)
         count = cur.rowcount
         conn.commit()
-        print(f"Reset {count} items from 'processing' to 'pending'.")
+        print(f"Reset {count} items with expired lease from 'processing' to 'pending'.")
 
 if __name__ == "__main__":
     reset_stuck_items()
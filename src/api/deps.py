@@ -2,15 +2,12 @@ import contextlib
 import psycopg2
 from psycopg2.extras import DictCursor
 from typing import Iterator
-from config.settings import DATABASE_URL
+from src.utils.db import pooled_connection
 
 def get_db_connection() -> Iterator[psycopg2.extensions.connection]:
-    """Dependency to get a database connection."""
-    conn = psycopg2.connect(DATABASE_URL)
-    try:
+    """Dependency to get a database connection (borrowed from the shared pool, uncommitted work is rolled back on return)."""
+    with pooled_connection(autocommit=False) as conn:
         yield conn
-    finally:
-        conn.close()
 
 def get_cursor(conn: psycopg2.extensions.connection) -> Iterator[DictCursor]:
     cursor = conn.cursor(cursor_factory=DictCursor)
@@ -1,101 +1,196 @@
 import re
 import unicodedata
-from bs4 import BeautifulSoup
-from profusion import Bloom
-import os
+from functools import lru_cache
+from src.utils.gazetteer import Gazetteer, available_countries, POST_CODE, MUNICIPALITY, STREET
+from config.settings import ADDRESS_WINDOW_TOKENS, GAZETTEER_DIR
 
-# Paths to bloom filters
-# Assuming they are in the project root or a known location
-BLOOM_DIR = os.getenv('BLOOM_DIR', '.')
+# Gazetteers (<cc>_address_<kind>.bloom.dat / .terms), in the project root by default
+BLOOM_DIR = GAZETTEER_DIR
+
+class _UnaccentTable(dict):
+    """str.translate table: char -> its NFKD form without combining marks and non-ASCII (computed once per char)"""
+
+    def __missing__(self, char):
+        nfkd_form = unicodedata.normalize('NFKD', chr(char))
+        ascii_text = ''.join([c for c in nfkd_form if not unicodedata.combining(c)])
+        value = self[char] = ascii_text.encode('ascii', 'ignore').decode('ascii')
+        return value
+
+_UNACCENT_TABLE = _UnaccentTable()
 
 def unaccent(text):
     """Odstraní diakritiku"""
-    nfkd_form = unicodedata.normalize('NFKD', text)
-    ascii_text = ''.join([c for c in nfkd_form if not unicodedata.combining(c)])
-    return ascii_text.encode('ascii', 'ignore').decode('ascii')
+    if text.isascii():
+        return text
+    return text.translate(_UNACCENT_TABLE)
+
+@lru_cache(maxsize=65536)
+def normalize_token(word):
+    """Token as the bloom filters store it: upper case without diacritics"""
+    return unaccent(word.upper())
+
+TOKEN_SPLIT_RE = re.compile(r'[;,\s]+')
+PHONE_LIKE_RE = re.compile(r"^[0-9.()/-]{9,20}")
+HOUSE_NUMBER_RE = re.compile(r"^[0-9]+[/-]?[0-9]*[a-zA-Z]?$")
+
+# Token classes of the extraction state machine (POST_CODE, MUNICIPALITY, STREET come from the gazetteer)
+EXTRA, SKIP, SPLIT, PHONE, NUMBER, OTHER = 'EXTRA', 'SKIP', 'SPLIT', 'PHONE', 'NUMBER', 'OTHER'
+
+# Languages of Belgium - the Belgian gazetteer is used for them when the page's country has none
+BELGIAN_LANGS = ['be', 'fr', 'nl', 'de', 'unknown', None]
 
 class AddressExtractor:
-    _instance = None
+    """Address extraction with the gazetteer of one country (one instance per country and directory)"""
+    _instances = {}
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(AddressExtractor, cls).__new__(cls)
-            cls._instance._load_filters()
-        return cls._instance
+    def __new__(cls, country='be', directory=None):
+        key = (country, directory or BLOOM_DIR)
+        if key not in cls._instances:
+            instance = super(AddressExtractor, cls).__new__(cls)
+            instance._load_filters(*key)
+            cls._instances[key] = instance
+        return cls._instances[key]
 
-    def _load_filters(self):
+    def _load_filters(self, country, directory):
+        """
+        Opened on first use (an instance is created by the first extraction for its country). Mapped filters
+        are shared by all worker processes through the page cache; pages are faulted in only when probed.
+        """
+        self.country = country
         try:
-            self.bfilter_streets = Bloom(path=os.path.join(BLOOM_DIR, "be_address_streets.bloom.dat"))
-            self.bfilter_muni = Bloom(path=os.path.join(BLOOM_DIR, "be_address_municipalities.bloom.dat"))
-            self.bfilter_posts = Bloom(path=os.path.join(BLOOM_DIR, "be_address_post_codes.bloom.dat"))
+            self.gazetteer = Gazetteer(country, directory)
             self.loaded = True
         except Exception as e:
-            print(f"Warning: Could not load address bloom filters: {e}")
+            print(f"Warning: Could not load address bloom filters ({country}): {e}")
             self.loaded = False
+            return
+        self.load_stats = self.gazetteer.load_stats
+        profile = self.gazetteer.profile
+        self.accept_terms = frozenset(profile['accept'])
+        self.skip_terms = frozenset(profile['skip'])
+        self.split_terms = frozenset(profile['split'])
+        self.post_code_digits = profile['post_code_digits']
+        self.post_code_split = profile.get('post_code_split')
+        self.classify = lru_cache(maxsize=65536)(self._classify)
+
+    def _classify(self, term):
+        """Class of a normalized token (same precedence as the extraction rules)"""
+        if term in self.accept_terms:
+            return EXTRA
+        if term in self.skip_terms:
+            return SKIP
+        if term in self.split_terms:
+            return SPLIT
+        tag = self.gazetteer.lookup(term)
+        if tag:
+            return tag
+        if PHONE_LIKE_RE.search(term):
+            return PHONE
+        if HOUSE_NUMBER_RE.search(term):
+            return NUMBER
+        return OTHER
+
+    def _post_code_at(self, words, i):
+        """Post code starting at token i ('110 00' joined to '11000' where written as two tokens) or None"""
+        w = words[i]
+        if not (w.isdigit() and w.isascii()):
+            return None
+        if len(w) == self.post_code_digits:
+            term = w
+        elif self.post_code_split and len(w) == self.post_code_split[0] and i + 1 < len(words):
+            rest = words[i + 1]
+            if len(rest) != self.post_code_split[1] or not (rest.isdigit() and rest.isascii()):
+                return None
+            term = w + rest
+        else:
+            return None
+        return term if self.classify(term) is POST_CODE else None
 
-    def extract_addresses(self, text):
+    def _join_post_codes(self, words):
+        """Replace two-token post codes by the joined token the gazetteer stores"""
+        first = self.post_code_split[0]
+        joined = []
+        i = 0
+        while i < len(words):
+            if len(words[i]) == first and (term := self._post_code_at(words, i)) and len(term) > first:
+                joined.append(term)
+                i += 2
+            else:
+                joined.append(words[i])
+                i += 1
+        return joined
+
+    def candidate_windows(self, words, window=ADDRESS_WINDOW_TOKENS):
+        """
+        (start, end) token ranges of +-window tokens around post code anchors (number tokens in the post code
+        filter), overlapping ranges merged. Every address contains a post code, the rest of the text is skipped.
+        """
+        lengths = {self.post_code_digits, self.post_code_split[0] if self.post_code_split else 0}
+        ranges = []
+        for i in [i for i, w in enumerate(words) if len(w) in lengths and w.isdigit()]:
+            if not self._post_code_at(words, i):
+                continue
+            start, end = max(i - window, 0), i + window + 1
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def extract_addresses(self, text, window=ADDRESS_WINDOW_TOKENS):
+        """Addresses in text; window > 0 runs the state machine only around post codes, 0 scans every token"""
         if not self.loaded:
             return []
 
-        # Split using re.split
-        words = re.split(r'[;,\s]+', text)
-        
-        extra_skip_terms = ['BELGIUM', 'BELGIE','-', ',','DU','DE','BUSINESS','CENTER']
-        extra_accept_terms = ['ROUTE','RUE','AVENUE']
-        extra_split_terms = ['ADRESSE']
-        
+        words = TOKEN_SPLIT_RE.split(text)
+        if not window:
+            return list(set(self._scan(words)))
+        addresses = []
+        for start, end in self.candidate_windows(words, window):
+            addresses.extend(self._scan(words[start:end + 1] if self.post_code_split else words[start:end]))
+        return list(set(addresses))
+
+    def _scan(self, words):
+        """Extraction state machine over tokens: collects street/number/post code/municipality runs"""
+        if self.post_code_split:
+            words = self._join_post_codes(words)
+        classify = self.classify
+
         addresses = []
         filtered_words = []
         filtered_tags = []
         found = 0
         accept_err = 0
         num_counter = 0
-        
-        for w in words:                        
-            term = unaccent(w.upper())    
-                
-            if len(term) > 0:        
-                if term in extra_accept_terms:
+
+        for w in words:
+            term = normalize_token(w)
+
+            if term:
+                tag = classify(term)
+                if tag is EXTRA:
                     filtered_words.append(term)
-                    filtered_tags.append('EXTRA')                
-                    found = found + 1            
-                elif term in extra_skip_terms:
-                    # skip 
+                    filtered_tags.append(tag)
+                    found = found + 1
+                elif tag is SKIP:
                     pass
-                elif term in extra_split_terms:
-                    # reset
+                elif tag is SPLIT or tag is PHONE:
+                    # reset (PHONE: asi telefon!)
                     filtered_words = []
                     filtered_tags = []
                     found = 0
                     accept_err = 0
                     num_counter = 0
-                elif term in self.bfilter_posts:
+                elif tag is POST_CODE or tag is NUMBER:
                     filtered_words.append(term)
-                    filtered_tags.append('POST_CODE')                    
+                    filtered_tags.append(tag)
                     found = found + 1
                     num_counter = num_counter + 1
-                elif term in self.bfilter_muni:
+                elif tag is MUNICIPALITY or tag is STREET:
                     filtered_words.append(term)
-                    filtered_tags.append('MUNICIPALITY')                
+                    filtered_tags.append(tag)
                     found = found + 1
                     num_counter = 0
-                elif term in self.bfilter_streets:
-                    filtered_words.append(term)
-                    filtered_tags.append('STREET')                
-                    found = found + 1
-                    num_counter = 0
-                elif re.search(r"^[0-9.()/-]{9,20}", term):
-                    # asi telefon! reset
-                    filtered_words = []
-                    filtered_tags = []
-                    found = 0
-                    accept_err = 0
-                    num_counter = 0
-                elif re.search(r"^[0-9]+[/-]?[0-9]*[a-zA-Z]?$", term):
-                    filtered_words.append(term)
-                    filtered_tags.append('NUMBER')                
-                    found = found + 1        
-                    num_counter = num_counter + 1
                 else:
                     if accept_err == 0:
                         accept_err = 1
@@ -114,12 +209,12 @@ class AddressExtractor:
                 found = 0
                 accept_err = 0
                 num_counter = 0
-                
-            if found >= 4:            
-                if 'POST_CODE' in filtered_tags and 'MUNICIPALITY' in filtered_tags and 'NUMBER' in filtered_tags:    
+
+            if found >= 4:
+                if POST_CODE in filtered_tags and MUNICIPALITY in filtered_tags and NUMBER in filtered_tags:
                     address = ' '.join(filtered_words)
                     addresses.append(address)
-                    
+
                     filtered_words = []
                     filtered_tags = []
                     found = 0
@@ -130,14 +225,23 @@ class AddressExtractor:
                     filtered_tags = filtered_tags[3:]
                     found = found - 3
 
-        return list(set(addresses))
+        return addresses
+
+def gazetteer_terms(lines):
+    """Normalized tokens of gazetteer source lines (street and municipality names are matched token by token)"""
+    for line in lines:
+        for word in TOKEN_SPLIT_RE.split(line.strip()):
+            term = normalize_token(word)
+            if term:
+                yield term
+
+def extract_addresses_from_text(text, language='be', country=None):
+    """Extract addresses from text using the gazetteer of the country (detect_country)"""
+    if country not in available_countries():
+        # no gazetteer for the country: Belgian one for the languages of Belgium
+        if language not in BELGIAN_LANGS:
+            return []
+        country = 'be'
 
-def extract_addresses_from_text(text, language='be'):
-    """Extract addresses from text using bloom filters"""
-    # Allow Belgian languages and unknown/None
-    belgian_langs = ['be', 'fr', 'nl', 'de', 'unknown', None]
-    if language not in belgian_langs and language is not None:
-        return []
-    
-    extractor = AddressExtractor()
+    extractor = AddressExtractor(country)
     return extractor.extract_addresses(text)
@@ -0,0 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from config.settings import DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
+
+# Asyncio-native DB access (psycopg 3) for code running in the event loop (scraper handlers).
+# SQL uses the same %s placeholders as the psycopg2 code in src/utils/db.py.
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+async def get_async_pool():
+    """Process-wide async connection pool, opened lazily in the running event loop"""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                pool = AsyncConnectionPool(
+                    DATABASE_URL,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    kwargs={'autocommit': True},
+                    check=AsyncConnectionPool.check_connection,
+                    open=False,
+                )
+                await pool.open()
+                _pool = pool
+    return _pool
+
+@asynccontextmanager
+async def async_connection():
+    """Půjčí async connection (autocommit) z poolu; pro více příkazů atomicky použij conn.transaction()"""
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+def async_cursor(conn, dict_cursor=True):
+    """Vytvoř async cursor"""
+    if dict_cursor:
+        return conn.cursor(row_factory=dict_row)
+    return conn.cursor()
+
+def async_pool_stats():
+    """Metriky async poolu (None pokud pool ještě nevznikl)"""
+    return _pool.get_stats() if _pool is not None else None
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
@@ -0,0 +1,128 @@
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import time
+import psutil
+from crawlee.browsers import BrowserPool
+from config.settings import PLAYWRIGHT_HEADLESS, BROWSER_RETIRE_AFTER_PAGES, BROWSER_MAX_RSS_MB
+
+logger = logging.getLogger('scraper')
+
+def create_browser_pool():
+    """
+    Long-lived browser pool pro scraper.
+    Každá stránka dostane vlastní (incognito) context, prohlížeče se recyklují po N stránkách.
+    """
+    return BrowserPool.with_default_plugin(
+        headless=PLAYWRIGHT_HEADLESS,
+        browser_launch_options={"args": ["--no-sandbox"]},
+        use_incognito_pages=True,
+        retire_browser_after_page_count=BROWSER_RETIRE_AFTER_PAGES,
+    )
+
+def browser_tree_rss_mb():
+    """RSS (MB) všech child procesů (playwright driver + chromium)"""
+    total = 0
+    try:
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+    except psutil.Error:
+        return 0.0
+    return total / (1024 * 1024)
+
+# Profile dirs crawlee/playwright create for launched browsers
+PROFILE_DIR_PATTERN = 'apify-playwright-*'
+# A fresh profile dir may not be referenced by its browser yet (another scraper just launching it)
+STALE_PROFILE_AGE_SECONDS = 600
+
+def _profile_dirs_in_cmdline(proc):
+    try:
+        return {arg.split('=', 1)[1] for arg in proc.cmdline() if arg.startswith('--user-data-dir=')}
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return set()
+
+def kill_child_browsers(timeout=5):
+    """
+    Terminate this process's remaining browser tree (other scrapers on the host are not touched)
+    and remove the profile dirs those browsers used. Returns the number of killed processes.
+    """
+    try:
+        children = psutil.Process().children(recursive=True)
+    except psutil.Error:
+        return 0
+    profile_dirs = set()
+    for child in children:
+        profile_dirs |= _profile_dirs_in_cmdline(child)
+        try:
+            child.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    _, alive = psutil.wait_procs(children, timeout=timeout)
+    for child in alive:
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
+    for path in profile_dirs:
+        shutil.rmtree(path, ignore_errors=True)
+    return len(children)
+
+def remove_stale_profile_dirs(max_age=STALE_PROFILE_AGE_SECONDS):
+    """Remove browser profile dirs left by killed runs: not used by any live process and older than max_age"""
+    in_use = set()
+    for proc in psutil.process_iter():
+        in_use |= _profile_dirs_in_cmdline(proc)
+    removed = 0
+    now = time.time()
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), PROFILE_DIR_PATTERN)):
+        try:
+            if not os.path.isdir(path) or path in in_use or now - os.path.getmtime(path) < max_age:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+class BrowserRecycler:
+    """Retires browsers from the pool (hung pages, memory growth). Retired browsers close once their pages finish."""
+
+    def __init__(self, pool, max_rss_mb=BROWSER_MAX_RSS_MB):
+        self.pool = pool
+        self.max_rss_mb = max_rss_mb
+
+    def _retire(self, controller):
+        # BrowserPool has no public retire API; _retire_browser only moves the controller to the inactive list
+        try:
+            self.pool._retire_browser(controller)
+        except Exception as e:
+            logger.warning(f"Failed to retire browser: {e}")
+
+    def retire_for_page(self, page):
+        """Retire the browser that owns the given (hung) page"""
+        if page is None:
+            return False
+        for controller in list(self.pool.active_browsers):
+            if page in controller.pages:
+                self._retire(controller)
+                logger.info("Retired browser after hung page")
+                return True
+        return False
+
+    def retire_all(self):
+        for controller in list(self.pool.active_browsers):
+            self._retire(controller)
+
+    def check_memory(self):
+        """Retire all active browsers when the browser process tree exceeds the RSS threshold"""
+        rss_mb = browser_tree_rss_mb()
+        if self.max_rss_mb and rss_mb > self.max_rss_mb:
+            logger.info(f"Browser RSS {rss_mb:.0f} MB > {self.max_rss_mb} MB, retiring {len(self.pool.active_browsers)} browsers")
+            self.retire_all()
+            return True
+        return False
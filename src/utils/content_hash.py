@@ -0,0 +1,61 @@
+import hashlib
+import json
+
+# Fields whose changes the change detector records
+TRACKED_FIELDS = ['company_name', 'emails', 'phones', 'org_num', 'addresses', 'opening_hours', 'social_media']
+
+# Row v (alias of a VALUES list) is a new version of its listing: no listing, or a fingerprint different
+# from the latest stored version - unchanged re-scrapes are not inserted at all
+CHANGED_VERSION_FILTER = """
+    v.uni_listing_id IS NULL OR v.fingerprint IS DISTINCT FROM (
+        SELECT o.fingerprint FROM scr_parsed_data o
+        WHERE o.uni_listing_id = v.uni_listing_id
+        ORDER BY o.extracted_at DESC, o.parsed_id DESC
+        LIMIT 1
+    )
+"""
+
+# VALUES row of scr_parsed_data
+# (result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+PARSED_DATA_ROW = '(%s::int, %s::text, %s::text, %s::jsonb, %s::int, %s::text, %s::jsonb, %s::text)'
+
+def unique_versions(rows):
+    """
+    PARSED_DATA_ROW tuples without repeats of (uni_listing_id, fingerprint) - CHANGED_VERSION_FILTER compares
+    each row with the versions stored before the INSERT, not with the other rows of the same VALUES list
+    """
+    seen = set()
+    unique = []
+    for row in rows:
+        key = (row[1], row[7])
+        if row[1] is not None and key in seen:
+            continue
+        seen.add(key)
+        unique.append(row)
+    return unique
+
+def normalize_field(value):
+    """Comparable form of a field value (lists are order-insensitive, items compared as strings)"""
+    if isinstance(value, list):
+        return sorted([str(x) for x in value])
+    return value
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+def field_hashes(data):
+    """{field: hash of its canonical JSON} of the tracked fields"""
+    return {
+        field: _digest(json.dumps(normalize_field(data.get(field)), sort_keys=True, ensure_ascii=False))
+        for field in TRACKED_FIELDS
+    }
+
+def content_hashes(data):
+    """(field hashes, fingerprint of the tracked record) - equal fingerprints = no change for the detector"""
+    hashes = field_hashes(data)
+    return hashes, _digest(''.join(hashes[field] for field in TRACKED_FIELDS))
+
+def hash_columns(data):
+    """field_hashes (JSON) and fingerprint column values of parsed data"""
+    hashes, fingerprint = content_hashes(data)
+    return json.dumps(hashes), fingerprint
@@ -1,6 +1,10 @@
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from config.settings import DATABASE_URL
+from psycopg2.pool import ThreadedConnectionPool
+from config.settings import DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
 
 def get_db_connection():
     """Vytvoř DB connection"""
@@ -8,8 +12,125 @@ def get_db_connection():
     conn.autocommit = True
     return conn
 
+def values_sql(row_template, rows):
+    """VALUES list with one row_template per row (for multi-row INSERT / UPDATE ... FROM (VALUES ...))"""
+    return ', '.join([row_template] * len(rows))
+
+def flatten_rows(rows):
+    return [value for row in rows for value in row]
+
 def get_cursor(conn, dict_cursor=True):
     """Vytvoř cursor"""
     if dict_cursor:
         return conn.cursor(cursor_factory=RealDictCursor)
     return conn.cursor()
+
+class CountingConnectionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool, který čeká na volné spojení (místo PoolError) a sbírá metriky"""
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        self.connects = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.discarded = 0
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def _connect(self, key=None):
+        self.connects += 1
+        return super()._connect(key)
+
+    def acquire(self, timeout=None):
+        """Get a connection, blocking while all maxconn connections are checked out"""
+        if not self._slots.acquire(blocking=False):
+            started = time.monotonic()
+            # threading.Semaphore treats timeout=-1 as "already expired", so no timeout must mean no argument
+            acquired = self._slots.acquire() if timeout is None else self._slots.acquire(timeout=timeout)
+            if not acquired:
+                raise psycopg2.pool.PoolError("connection pool exhausted (timeout)")
+            self.waits += 1
+            self.wait_seconds += time.monotonic() - started
+        try:
+            conn = self.getconn()
+            if conn.closed:
+                # server-side disconnect while idle in the pool
+                self.putconn(conn, close=True)
+                self.discarded += 1
+                conn = self.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        self.checkouts += 1
+        return conn
+
+    def release(self, conn, close=False):
+        try:
+            if close or conn.closed:
+                self.discarded += 1
+            self.putconn(conn, close=close or bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        idle = len(self._pool)
+        in_use = len(self._used)
+        return {
+            'size': idle + in_use,
+            'in_use': in_use,
+            'idle': idle,
+            'max_size': self.maxconn,
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'waits': self.waits,
+            'wait_ms': round(self.wait_seconds * 1000, 1),
+            'discarded': self.discarded,
+        }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Process-wide connection pool (lazy)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = CountingConnectionPool(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DATABASE_URL)
+    return _pool
+
+@contextmanager
+def pooled_connection(autocommit=True):
+    """
+    Půjčí connection z poolu a po použití ji vrátí.
+    With autocommit=False an unfinished transaction is rolled back before the connection goes back.
+    Broken connections (OperationalError/InterfaceError) are closed instead of reused.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    try:
+        if conn.autocommit != autocommit:
+            conn.autocommit = autocommit
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        if not broken and not conn.closed and not conn.autocommit:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        pool.release(conn, close=broken)
+
+def pool_stats():
+    """Metriky poolu (None pokud pool ještě nevznikl)"""
+    return _pool.stats() if _pool is not None else None
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
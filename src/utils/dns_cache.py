@@ -0,0 +1,129 @@
+import asyncio
+import socket
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.async_db import async_connection
+from config.settings import DNS_CONCURRENCY, DNS_TIMEOUT, DNS_POSITIVE_TTL, DNS_NEGATIVE_TTL
+
+logger = logging.getLogger('scraper')
+
+# getaddrinfo errors meaning the name does not exist / has no address (cached as dead);
+# anything else (EAI_AGAIN, timeouts) is transient and not cached
+DEAD_ERRNOS = {socket.EAI_NONAME} | ({socket.EAI_NODATA} if hasattr(socket, 'EAI_NODATA') else set())
+
+class DnsCache:
+    """
+    Bulk async DNS pre-resolution with a local TTL cache backed by the shared scr_dns_cache table.
+    resolve_many() -> {host: (resolved, ip_address, error)}, resolved is None when the answer is unknown (transient error).
+    """
+
+    def __init__(self, concurrency=DNS_CONCURRENCY, timeout=DNS_TIMEOUT,
+                 positive_ttl=DNS_POSITIVE_TTL, negative_ttl=DNS_NEGATIVE_TTL):
+        self.timeout = timeout
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Own resolver threads: getaddrinfo blocks, and on the loop's default executor the lookups would compete
+        # with every other run_in_executor / to_thread call (and a timed-out lookup would keep a shared thread busy)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='dns')
+        self._local = {}
+        self.hits = 0
+        self.lookups = 0
+
+    def _local_get(self, host):
+        entry = self._local.get(host)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        self._local.pop(host, None)
+        return None
+
+    def _local_put(self, host, answer):
+        ttl = self.positive_ttl if answer[0] else self.negative_ttl
+        self._local[host] = (answer, time.monotonic() + ttl)
+
+    async def _lookup(self, host):
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            try:
+                infos = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM),
+                    self.timeout
+                )
+                return True, infos[0][4][0] if infos else None, None
+            except socket.gaierror as e:
+                if e.errno in DEAD_ERRNOS:
+                    return False, None, e.strerror or str(e)
+                return None, None, str(e)
+            except (asyncio.TimeoutError, OSError, UnicodeError) as e:
+                return None, None, str(e) or type(e).__name__
+
+    async def _load_shared(self, hosts):
+        async with async_connection() as conn:
+            cur = await conn.execute("""
+                SELECT host, resolved, ip_address, error
+                FROM scr_dns_cache
+                WHERE host = ANY(%s) AND expires_at > NOW()
+            """, (list(hosts),))
+            return {row[0]: (row[1], row[2], row[3]) for row in await cur.fetchall()}
+
+    async def _store_shared(self, answers):
+        rows = [
+            (host, resolved, ip, error, self.positive_ttl if resolved else self.negative_ttl)
+            for host, (resolved, ip, error) in answers.items()
+            if resolved is not None
+        ]
+        if not rows:
+            return
+        async with async_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany("""
+                    INSERT INTO scr_dns_cache (host, resolved, ip_address, error, checked_at, expires_at)
+                    VALUES (%s, %s, %s, %s, NOW(), NOW() + %s * INTERVAL '1 second')
+                    ON CONFLICT (host) DO UPDATE
+                    SET resolved = EXCLUDED.resolved, ip_address = EXCLUDED.ip_address, error = EXCLUDED.error,
+                        checked_at = EXCLUDED.checked_at, expires_at = EXCLUDED.expires_at
+                """, rows)
+
+    async def resolve_many(self, hosts):
+        answers = {}
+        missing = set()
+        for host in set(filter(None, hosts)):
+            self.lookups += 1
+            answer = self._local_get(host)
+            if answer is not None:
+                self.hits += 1
+                answers[host] = answer
+            else:
+                missing.add(host)
+        if not missing:
+            return answers
+
+        try:
+            shared = await self._load_shared(missing)
+        except Exception as e:
+            logger.warning(f"DNS cache table unavailable: {e}")
+            shared = {}
+        for host, answer in shared.items():
+            self.hits += 1
+            self._local_put(host, answer)
+            answers[host] = answer
+        missing -= shared.keys()
+
+        fresh = dict(zip(missing, await asyncio.gather(*(self._lookup(host) for host in missing))))
+        for host, answer in fresh.items():
+            if answer[0] is not None:
+                self._local_put(host, answer)
+        answers.update(fresh)
+
+        try:
+            await self._store_shared(fresh)
+        except Exception as e:
+            logger.warning(f"Failed to store DNS answers: {e}")
+        return answers
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {'lookups': self.lookups, 'hits': self.hits, 'cached_hosts': len(self._local)}
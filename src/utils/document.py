@@ -0,0 +1,88 @@
+import json
+from functools import cached_property
+import lxml.html
+from lxml import etree
+
+_UTF8_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# Visible text: every text node outside <script>/<style> (nav/footer are kept - contact data lives there)
+_TEXT_XPATH = etree.XPath('//text()[not(ancestor::script) and not(ancestor::style)]')
+_HREF_XPATH = etree.XPath('//a[@href]/@href')
+_JSON_LD_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()')
+_META_PROPERTY_XPATH = etree.XPath('//meta[@property]')
+
+def _parse(html):
+    """lxml.html tree; BeautifulSoup (lxml.html.soupparser) only as fallback for documents lxml rejects"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str with an <?xml encoding=...?> declaration
+        try:
+            return lxml.html.document_fromstring(html.encode('utf-8'), parser=_UTF8_PARSER)
+        except Exception:
+            pass
+    except Exception:
+        pass
+    try:
+        from lxml.html import soupparser
+        return soupparser.fromstring(html)
+    except Exception:
+        return lxml.html.document_fromstring('<html></html>')
+
+class ParsedDocument:
+    """
+    HTML parsed once per page, shared by language detection, link discovery and extraction.
+    Derived views (text, links, ...) are computed lazily and cached.
+    """
+
+    def __init__(self, html):
+        self.html = html or ''
+        self.tree = _parse(self.html)
+
+    @cached_property
+    def lang(self):
+        """<html lang> attribute (raw) or None"""
+        root = self.tree.getroottree().getroot()
+        return root.get('lang') or None
+
+    @cached_property
+    def text(self):
+        """Visible text, whitespace-normalized (like BeautifulSoup get_text(' ', strip=True) without script/style)"""
+        return ' '.join(s.strip() for s in _TEXT_XPATH(self.tree) if s.strip())
+
+    @cached_property
+    def links(self):
+        """href attributes of all <a> tags, in document order"""
+        return [str(href) for href in _HREF_XPATH(self.tree)]
+
+    @cached_property
+    def title(self):
+        title = self.tree.find('.//title')
+        if title is None:
+            return None
+        return title.text_content().strip() or None
+
+    @cached_property
+    def json_ld(self):
+        """Parsed JSON-LD blocks (invalid ones skipped)"""
+        blocks = []
+        for raw in _JSON_LD_XPATH(self.tree):
+            try:
+                blocks.append(json.loads(raw))
+            except ValueError:
+                pass
+        return blocks
+
+    def meta_properties(self, prefix):
+        """{property without prefix: content} of <meta property="prefix..."> tags"""
+        return {
+            meta.get('property')[len(prefix):]: meta.get('content')
+            for meta in _META_PROPERTY_XPATH(self.tree)
+            if meta.get('property').startswith(prefix)
+        }
+
+def as_document(html_or_doc):
+    """Accept raw HTML or an already parsed document"""
+    if isinstance(html_or_doc, ParsedDocument):
+        return html_or_doc
+    return ParsedDocument(html_or_doc)
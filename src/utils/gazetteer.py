@@ -0,0 +1,195 @@
+import logging
+import mmap
+import os
+import time
+from functools import lru_cache
+import mmh3
+from profusion import Bloom
+from src.utils.mapped_bloom import MappedBloom, process_rss_kb
+from config.settings import GAZETTEER_DIR, ADDRESS_BLOOM_MMAP, ADDRESS_BLOOM_CACHE_DIR
+
+logger = logging.getLogger('parser')
+
+# Gazetteer lists, in probe order (the first list containing a token wins)
+POST_CODE, MUNICIPALITY, STREET = 'POST_CODE', 'MUNICIPALITY', 'STREET'
+KINDS = [(POST_CODE, 'post_codes'), (MUNICIPALITY, 'municipalities'), (STREET, 'streets')]
+
+# Per-country rules of the address state machine:
+#   post_code_digits - digits of a post code token (anchor of the address windows)
+#   post_code_split  - (digits, digits) when the post code is written as two tokens ('110 00'), joined before lookup
+#   accept / skip / split - street type words kept, filler words ignored, words starting a new address
+GAZETTEER_PROFILES = {
+    'be': {
+        'post_code_digits': 4,
+        'accept': ['ROUTE', 'RUE', 'AVENUE'],
+        'skip': ['BELGIUM', 'BELGIE', '-', ',', 'DU', 'DE', 'BUSINESS', 'CENTER'],
+        'split': ['ADRESSE'],
+    },
+    'nl': {
+        'post_code_digits': 4,
+        'accept': [],
+        'skip': ['NEDERLAND', 'THE', 'NETHERLANDS', '-'],
+        'split': ['ADRES', 'BEZOEKADRES', 'POSTADRES'],
+    },
+    'fr': {
+        'post_code_digits': 5,
+        'accept': ['RUE', 'AVENUE', 'ROUTE', 'BOULEVARD', 'CHEMIN', 'IMPASSE', 'ALLEE', 'PLACE', 'QUAI'],
+        'skip': ['FRANCE', 'CEDEX', 'DE', 'DU', 'DES', 'LA', 'LE', '-'],
+        'split': ['ADRESSE'],
+    },
+    'de': {
+        'post_code_digits': 5,
+        'accept': [],
+        'skip': ['DEUTSCHLAND', 'GERMANY', '-'],
+        'split': ['ADRESSE', 'ANSCHRIFT'],
+    },
+    'cz': {
+        'post_code_digits': 5,
+        'post_code_split': (3, 2),
+        'accept': [],
+        'skip': ['CESKA', 'REPUBLIKA', 'CR', 'CZ', '-'],
+        'split': ['ADRESA', 'SIDLO', 'PROVOZOVNA'],
+    },
+    'sk': {
+        'post_code_digits': 5,
+        'post_code_split': (3, 2),
+        'accept': [],
+        'skip': ['SLOVENSKA', 'SLOVENSKO', 'REPUBLIKA', 'SR', 'SK', '-'],
+        'split': ['ADRESA', 'SIDLO', 'PREVADZKA'],
+    },
+}
+
+def gazetteer_path(directory, country, kind, suffix):
+    return os.path.join(directory, f"{country}_address_{kind}.{suffix}")
+
+class TermTable:
+    """
+    Exact set of gazetteer tokens: a sorted, newline-separated UTF-8 file mapped read-only,
+    membership by binary search over the bytes (no per-process copy, nothing to deserialize).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+
+    def __contains__(self, term):
+        key = term.encode('utf-8')
+        data = self.data
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b'\n', 0, mid) + 1
+            end = data.find(b'\n', start)
+            if end < 0:
+                end = len(data)
+            line = data[start:end]
+            if line == key:
+                return True
+            if line < key:
+                lo = end + 1
+            else:
+                hi = start
+        return False
+
+    @staticmethod
+    def write(path, terms):
+        """Sorted unique terms, one per line (written under a temporary name, then renamed)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for term in sorted({t.encode('utf-8') for t in terms}):
+                f.write(term + b'\n')
+        os.replace(tmp_path, path)
+
+def open_bloom(path):
+    if ADDRESS_BLOOM_MMAP:
+        try:
+            return MappedBloom(path, ADDRESS_BLOOM_CACHE_DIR)
+        except OSError as e:
+            logger.warning(f"Could not map {path} ({e}), loading a private copy")
+    if not os.path.isfile(path):
+        # profusion.Bloom silently creates an empty filter for a missing path
+        raise FileNotFoundError(path)
+    return Bloom(path=path)
+
+class Gazetteer:
+    """
+    Address token lists of one country: a Bloom filter per list (post codes, municipalities, streets) for the fast
+    negative answer, confirmed by the exact term table when the country has one (<cc>_address_<kind>.terms).
+    Built by `scripts/bloom_admin.py build-gazetteer`.
+    """
+
+    def __init__(self, country, directory=GAZETTEER_DIR):
+        self.country = country
+        self.profile = GAZETTEER_PROFILES[country]
+        started = time.monotonic()
+        rss_before = process_rss_kb()
+        self.blooms = {}
+        self.tables = {}
+        for tag, kind in KINDS:
+            self.blooms[tag] = open_bloom(gazetteer_path(directory, country, kind, 'bloom.dat'))
+            table_path = gazetteer_path(directory, country, kind, 'terms')
+            if os.path.isfile(table_path):
+                self.tables[tag] = TermTable(table_path)
+        self._probes = [(tag, self.blooms[tag], self.tables.get(tag)) for tag, _ in KINDS]
+
+        filters = self.blooms.values()
+        self.load_stats = {
+            'load_ms': round((time.monotonic() - started) * 1000, 1),
+            'mapped': all(isinstance(f, MappedBloom) for f in filters),
+            'filter_bytes': sum(len(f.bf) for f in filters),
+            'exact': sorted(kind for tag, kind in KINDS if tag in self.tables),
+            'rss_delta_kb': process_rss_kb() - rss_before,
+        }
+        logger.info(
+            f"Gazetteer '{country}' {'mapped' if self.load_stats['mapped'] else 'loaded'}: "
+            f"{self.load_stats['filter_bytes'] // 1024} kB of filters in {self.load_stats['load_ms']} ms, "
+            f"exact tables {self.load_stats['exact'] or 'none'}, RSS +{self.load_stats['rss_delta_kb']} kB"
+        )
+
+    def lookup(self, term):
+        """
+        List of a normalized token (POST_CODE, MUNICIPALITY, STREET) or None. The filters share the hash function
+        (mmh3 with seeds 0..k-1), so each digest is computed once and reused for every filter (a miss usually
+        ends after 1-2 hashes); a filter hit the exact table rejects falls through to the next list.
+        """
+        data = term.encode('utf-8')
+        digests = []
+        for tag, bloom, table in self._probes:
+            bf, bins = bloom.bf, bloom.bins
+            for seed in range(bloom.hashes):
+                if seed == len(digests):
+                    digests.append(mmh3.hash(data, seed=seed))
+                index = digests[seed] % bins
+                if not (bf[index // 8] >> (index % 8)) & 1:
+                    break
+            else:
+                if table is None or term in table:
+                    return tag
+        return None
+
+def build_gazetteer(country, terms_by_kind, directory=GAZETTEER_DIR, error_rate=0.001):
+    """
+    Write the Bloom filters and exact term tables of a country.
+    terms_by_kind: {'post_codes' | 'municipalities' | 'streets': normalized tokens}. Returns {kind: term count}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for _, kind in KINDS:
+        terms = set(terms_by_kind.get(kind, ()))
+        bloom = Bloom(capacity=max(len(terms), 1), error_ratio=error_rate)
+        for term in terms:
+            bloom.add(term)
+        bloom.save(gazetteer_path(directory, country, kind, 'bloom.dat'))
+        TermTable.write(gazetteer_path(directory, country, kind, 'terms'), terms)
+        counts[kind] = len(terms)
+    available_countries.cache_clear()
+    return counts
+
+@lru_cache(maxsize=None)
+def available_countries(directory=GAZETTEER_DIR):
+    """Countries with a gazetteer installed in directory"""
+    return frozenset(
+        country for country in GAZETTEER_PROFILES
+        if all(os.path.isfile(gazetteer_path(directory, country, kind, 'bloom.dat')) for _, kind in KINDS)
+    )
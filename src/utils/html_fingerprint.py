@@ -0,0 +1,35 @@
+import hashlib
+import re
+
+# Per-request noise of otherwise identical pages, removed before hashing (regexes over the raw HTML, no tree)
+COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+# Scripts and styles are not content; JSON-LD is (structured data of the listing)
+SCRIPT_RE = re.compile(
+    r'<script\b(?![^>]*application/ld\+json)[^>]*>.*?</script\s*>|<style\b[^>]*>.*?</style\s*>',
+    re.DOTALL | re.IGNORECASE
+)
+NONCE_RE = re.compile(r'\snonce\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+)', re.IGNORECASE)
+# Hidden form tokens and meta tags carrying CSRF / view-state values
+TOKEN_TAG_RE = re.compile(
+    r'<(?:input|meta)\b[^>]*(?:csrf|xsrf|_token|authenticity_token|requestverificationtoken|__viewstate|__eventvalidation)[^>]*>',
+    re.IGNORECASE
+)
+# Cache-buster query parameters of asset URLs (?v=123, &_=1700000000)
+CACHE_BUSTER_RE = re.compile(r'([?&](?:v|ver|version|_|t|ts|cb|cache|timestamp)=)[^&"\'\s>]*', re.IGNORECASE)
+# Date-times (generated-at stamps, "last updated" of the render); plain dates are kept - they can be content
+TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?')
+WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_html(html):
+    """Raw HTML without comments, scripts/styles, nonces, CSRF tokens, cache busters and timestamps"""
+    html = COMMENT_RE.sub('', html)
+    html = SCRIPT_RE.sub('', html)
+    html = TOKEN_TAG_RE.sub('', html)
+    html = NONCE_RE.sub('', html)
+    html = CACHE_BUSTER_RE.sub(r'\1', html)
+    html = TIMESTAMP_RE.sub('', html)
+    return WHITESPACE_RE.sub(' ', html).strip()
+
+def html_fingerprint(html):
+    """Fingerprint of a page: equal for re-scrapes that differ only in per-request noise"""
+    return hashlib.blake2b(normalize_html(html).encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
@@ -0,0 +1,141 @@
+import re
+import httpx
+from config.settings import USER_AGENT, HTTP_FETCH_TIMEOUT, HTTP_MIN_BODY_BYTES, HTTP_MIN_TEXT_CHARS, HTTP_MAX_BODY_BYTES
+
+# Status codes that the browser would not change - saved directly from the HTTP tier
+FINAL_STATUS_CODES = {200, 404, 410}
+
+SPA_MARKERS = [
+    re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|q-app|svelte)["\'][^>]*>\s*</div>', re.IGNORECASE),
+    re.compile(r'<app-root[^>]*>\s*</app-root>', re.IGNORECASE),
+    re.compile(r'<html[^>]+ng-app', re.IGNORECASE),
+    re.compile(r'<body[^>]+ng-app', re.IGNORECASE),
+]
+NOSCRIPT_BLOCK = re.compile(r'<noscript[^>]*>(.*?)</noscript>', re.IGNORECASE | re.DOTALL)
+NOSCRIPT_WALL = re.compile(r'(?:enable|activate|requires?|turn on|aktivujte|povolte|activeer|activez)\b.{0,60}javascript', re.IGNORECASE | re.DOTALL)
+CLIENT_REDIRECT = re.compile(r'<meta[^>]+http-equiv=["\']?refresh', re.IGNORECASE)
+SCRIPT_STYLE = re.compile(r'<(script|style|noscript|template)[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+TAGS = re.compile(r'<[^>]+>')
+
+def visible_text_length(html):
+    """Rychlý odhad délky viditelného textu (bez parsování DOM)"""
+    text = TAGS.sub(' ', SCRIPT_STYLE.sub(' ', html))
+    return len(''.join(text.split()))
+
+def escalation_reason(html, content_type=None):
+    """
+    Heuristika zda stránku z plain GET musí vyrenderovat prohlížeč.
+    Returns: reason string, or None when the static HTML is good enough.
+    """
+    if content_type and 'html' not in content_type.lower():
+        return 'non_html'
+    if not html or len(html.encode('utf-8', 'ignore')) < HTTP_MIN_BODY_BYTES:
+        return 'tiny_body'
+    for marker in SPA_MARKERS:
+        if marker.search(html):
+            return 'spa_marker'
+    for block in NOSCRIPT_BLOCK.findall(html):
+        if NOSCRIPT_WALL.search(TAGS.sub(' ', block)):
+            return 'noscript_wall'
+    if visible_text_length(html) < HTTP_MIN_TEXT_CHARS:
+        return 'js_shell' if '<script' in html.lower() else 'tiny_body'
+    if CLIENT_REDIRECT.search(html):
+        return 'client_redirect'
+    return None
+
+def conditional_headers(etag=None, last_modified=None):
+    """Request headers revalidating a stored page (validators of its last response), {} without validators"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+def declared_length(headers):
+    """Content-Length of a response in bytes, None when missing or invalid"""
+    try:
+        return int(headers.get('content-length'))
+    except (TypeError, ValueError):
+        return None
+
+class HttpFetcher:
+    """Plain async GET tier (httpx); stránky, které heuristika označí, se eskalují na Playwright"""
+
+    def __init__(self, timeout=HTTP_FETCH_TIMEOUT, max_body_bytes=HTTP_MAX_BODY_BYTES):
+        self.max_body_bytes = max_body_bytes
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=timeout,
+            headers={
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            },
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def read_body(self, response):
+        """Body bytes of a streamed response, None when it exceeds max_body_bytes (stops reading there)"""
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def fetch(self, url, validators=None):
+        """
+        GET url, conditional when validators (conditional_headers()) are given.
+        The body is streamed: non-HTML responses and bodies over max_body_bytes are escalated
+        ('non_html' / 'too_large') without being downloaded or decoded.
+        Returns: dict(html, status_code, headers, final_url, ip_address, escalate, revalidation) - escalate is
+        a reason or None; revalidation is 'hit' (304, html None), 'miss' (validators sent, full page) or None
+        Raises httpx.HTTPError on network errors.
+        """
+        async with self.client.stream('GET', url, headers=validators or None) as response:
+            ip_address = None
+            stream = response.extensions.get('network_stream')
+            if stream is not None:
+                server_addr = stream.get_extra_info('server_addr')
+                if server_addr:
+                    ip_address = server_addr[0]
+
+            fetched = {
+                'html': None,
+                'status_code': response.status_code,
+                'headers': dict(response.headers),
+                'final_url': str(response.url),
+                'ip_address': ip_address,
+                'escalate': None,
+                'revalidation': 'miss' if validators else None,
+            }
+            # 304 of the requested URL itself; after a redirect the validators belong to another page
+            if validators and response.status_code == 304 and not response.history:
+                fetched['revalidation'] = 'hit'
+                return fetched
+
+            content_type = response.headers.get('content-type')
+            length = declared_length(response.headers)
+            if response.status_code not in FINAL_STATUS_CODES:
+                fetched['escalate'] = f"status_{response.status_code}"
+                return fetched
+            if response.status_code == 200 and content_type and 'html' not in content_type.lower():
+                fetched['escalate'] = 'non_html'
+                return fetched
+            if length is not None and length > self.max_body_bytes:
+                fetched['escalate'] = 'too_large'
+                return fetched
+
+            body = await self.read_body(response)
+            if body is None:
+                fetched['escalate'] = 'too_large'
+                return fetched
+            fetched['html'] = body.decode(response.encoding or 'utf-8', errors='replace')
+
+        if response.status_code == 200:
+            fetched['escalate'] = escalation_reason(fetched['html'], content_type)
+        return fetched
@@ -1,27 +1,110 @@
-from langdetect import detect_langs
-from bs4 import BeautifulSoup
+import re
+from collections import OrderedDict
+from langdetect import DetectorFactory, PROFILES_DIRECTORY
+from src.utils.document import ParsedDocument, as_document
+from config.settings import LANGUAGE_SAMPLE_CHARS, LANGUAGE_CACHE_SIZE
 
-def detect_language(html):
+# Declared-language hints, searched in the head of the raw HTML without building a tree
+HTML_LANG_RE = re.compile(r'<html\b[^>]*?\slang\s*=\s*["\']?\s*([a-zA-Z]{2,3})(?![a-zA-Z])', re.IGNORECASE)
+META_CONTENT_LANGUAGE_RE = re.compile(
+    r'<meta\b[^>]*?http-equiv\s*=\s*["\']?content-language["\']?[^>]*?content\s*=\s*["\']?\s*([a-zA-Z]{2,3})(?![a-zA-Z])'
+    r'|<meta\b[^>]*?content\s*=\s*["\']?\s*([a-zA-Z]{2,3})(?![a-zA-Z])[^>]*?http-equiv\s*=\s*["\']?content-language\b',
+    re.IGNORECASE
+)
+OG_LOCALE_RE = re.compile(
+    r'<meta\b[^>]*?property\s*=\s*["\']?og:locale["\']?[^>]*?content\s*=\s*["\']?\s*([a-zA-Z]{2,3})(?![a-zA-Z])'
+    r'|<meta\b[^>]*?content\s*=\s*["\']?\s*([a-zA-Z]{2,3})(?![a-zA-Z])[^>]*?property\s*=\s*["\']?og:locale["\']?[\s/>]',
+    re.IGNORECASE
+)
+HINT_SCAN_CHARS = 32768
+
+_cache = OrderedDict()
+_factory = None
+
+def _first_group(match):
+    return next(g for g in match.groups() if g).lower()
+
+def declared_language(html, content_language=None):
+    """
+    Language the page declares: <html lang>, Content-Language (HTTP header or meta http-equiv), og:locale.
+    Returns (language_code, confidence) or None.
+    """
+    head = html[:HINT_SCAN_CHARS]
+    match = HTML_LANG_RE.search(head)
+    if match:
+        return match.group(1)[:2].lower(), 0.99
+    if content_language:
+        code = content_language.split(',')[0].strip()[:2].lower()
+        if code.isalpha() and len(code) == 2:
+            return code, 0.95
+    match = META_CONTENT_LANGUAGE_RE.search(head)
+    if match:
+        return _first_group(match)[:2], 0.95
+    match = OG_LOCALE_RE.search(head)
+    if match:
+        return _first_group(match)[:2], 0.9
+    return None
+
+def text_sample(text, size=LANGUAGE_SAMPLE_CHARS):
+    """Bounded sample from the middle of the text (menus and cookie banners sit at the edges)"""
+    if len(text) <= size:
+        return text
+    start = (len(text) - size) // 2
+    return text[start:start + size]
+
+def _detector_factory():
+    """Own langdetect factory: profiles loaded once per process, seeded (its sampling is random without a seed)"""
+    global _factory
+    if _factory is None:
+        factory = DetectorFactory()
+        factory.load_profile(PROFILES_DIRECTORY)
+        factory.seed = 0
+        _factory = factory
+    return _factory
+
+def detect_text_language(text):
+    """langdetect on a bounded sample: (language_code, confidence)"""
+    detector = _detector_factory().create()
+    detector.set_max_text_length(LANGUAGE_SAMPLE_CHARS)
+    detector.append(text_sample(text))
+    results = detector.get_probabilities()
+    return results[0].lang, results[0].prob
+
+def detect_language(html, url=None, content_language=None):
     """
-    Detekuje jazyk z HTML
+    Detekuje jazyk z HTML (raw HTML or a ParsedDocument)
+    Declared language first (regex over the raw HTML, no parse), otherwise langdetect on a text sample.
+    With url the result is cached for the page (repeated calls for one fetch do not repeat the work).
     Returns: (language_code, confidence)
     """
-    # Zkus HTML lang attribute
-    soup = BeautifulSoup(html, 'lxml')
-    html_tag = soup.find('html')
-    if html_tag and html_tag.get('lang'):
-        lang = html_tag.get('lang')[:2].lower()
-        return lang, 0.99
+    raw = html.html if isinstance(html, ParsedDocument) else (html or '')
+    key = None
+    if url:
+        key = (url, hash(raw))
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = declared_language(raw, content_language) or _detect_from_text(html)
+
+    if key:
+        _cache[key] = result
+        if len(_cache) > LANGUAGE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+def _detect_from_text(html):
+    doc = as_document(html)
 
-    # Extract text
-    text = soup.get_text(separator=' ', strip=True)
-    text = ' '.join(text.split())[:10000]
+    # lang attribute the regex did not catch (unusual markup) - the tree has it
+    if doc.lang:
+        return doc.lang[:2].lower(), 0.99
 
+    text = doc.text
     if len(text) < 50:
         return None, 0.0
 
     try:
-        results = detect_langs(text)
-        return results[0].lang, results[0].prob
-    except:
+        return detect_text_language(text)
+    except Exception:
         return None, 0.0
@@ -0,0 +1,77 @@
+import json
+import mmap
+import os
+import shutil
+import zipfile
+import mmh3
+from profusion import BloomException
+
+def process_rss_kb():
+    """Resident set size of this process in kB (peak RSS where /proc is not available)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class MappedBloom:
+    """
+    Read-only profusion Bloom filter (*.bloom.dat) whose bit array is a read-only mmap of an uncompressed copy
+    in cache_dir. All processes on the host map the same file, so they share one page-cache copy
+    instead of each holding its own bytearray. Compatible with profusion.Bloom: bf, bins, hashes, `in`.
+    """
+
+    def __init__(self, path, cache_dir):
+        with zipfile.ZipFile(path) as zf:
+            try:
+                metadata = json.loads(zf.read('metadata.json'))
+                if metadata['program'] != 'profusion' or metadata['type'] != 'bloom':
+                    raise BloomException(f"Unrecognized file format '{path}'")
+                self.bins = metadata['bins']
+                self.hashes = metadata['hashes']
+            except KeyError as e:
+                raise BloomException(f"Invalid file format: missing {e}")
+
+            self.bitmap_path = self._bitmap_path(path, cache_dir)
+            if not os.path.exists(self.bitmap_path):
+                os.makedirs(cache_dir, exist_ok=True)
+                # written under a temporary name - concurrent workers never map a partial file
+                tmp_path = f"{self.bitmap_path}.{os.getpid()}.tmp"
+                with zf.open('bf.bin') as src, open(tmp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, self.bitmap_path)
+
+        with open(self.bitmap_path, 'rb') as f:
+            self.bf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _bitmap_path(path, cache_dir):
+        """Cache file name tied to the source file version (size + mtime), a rebuilt filter gets a new copy"""
+        stat = os.stat(path)
+        return os.path.join(cache_dir, f"{os.path.basename(path)}.{stat.st_size}-{stat.st_mtime_ns}.bin")
+
+    @property
+    def mapped_bytes(self):
+        return len(self.bf)
+
+    def check(self, s):
+        data = s.encode('utf-8') if isinstance(s, str) else s
+        bf, bins = self.bf, self.bins
+        for seed in range(self.hashes):
+            index = mmh3.hash(data, seed=seed) % bins
+            if not (bf[index // 8] >> (index % 8)) & 1:
+                return False
+        return True
+
+    def __contains__(self, s):
+        return self.check(s)
+
+    def __len__(self):
+        return self.bins
+
+    def close(self):
+        self.bf.close()
@@ -1,8 +1,8 @@
 import re
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 from src.utils.urls import same_domain
 from src.utils.country import COUNTRY_LANG_MAP
+from src.utils.document import as_document
 
 MULTIPAGE_PATTERNS = {
     'cs': {
@@ -53,9 +53,10 @@ def find_promising_links(html, base_url, language=None, country=None):
     """
     Najde nadějné odkazy na stejné doméně.
     Checks patterns for given language AND all languages associated with the country.
+    html: raw HTML or a ParsedDocument.
     Returns: list of (url, category) - sorted by relevance, limited to top 5.
     """
-    soup = BeautifulSoup(html, 'lxml')
+    doc = as_document(html)
     
     # Collect languages to check
     langs_to_check = set()
@@ -73,8 +74,8 @@ def find_promising_links(html, base_url, language=None, country=None):
     candidates = []
     seen = set()
 
-    for link in soup.find_all('a', href=True):
-        url = urljoin(base_url, link['href'])
+    for href in doc.links:
+        url = urljoin(base_url, href)
 
         # Musí být stejná doména
         if not same_domain(url, base_url):
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import re
+from urllib.parse import urljoin
+from config.settings import PAGE_READY_CAP_MS, PAGE_QUIET_MS, MAX_CLIENT_REDIRECTS, CLIENT_REDIRECT_MAX_DELAY
+
+logger = logging.getLogger('scraper')
+
+# Navigation replaced the document while we read it (JS redirect, location.href = ...)
+NAVIGATION_ERRORS = ("Execution context was destroyed", "page is navigating")
+
+META_REFRESH_RE = re.compile(
+    r'<meta[^>]+http-equiv=["\']?refresh["\']?[^>]*content=["\']?\s*(\d+)\s*;?\s*(?:url\s*=\s*)?["\']?([^"\'>\s]*)',
+    re.IGNORECASE
+)
+
+# Resolves after PAGE_QUIET_MS without DOM mutations, or at the cap
+DOM_QUIET_JS = """
+([quietMs, capMs]) => new Promise(resolve => {
+    let timer;
+    const done = signal => { observer.disconnect(); clearTimeout(timer); clearTimeout(cap); resolve(signal); };
+    const observer = new MutationObserver(() => { clearTimeout(timer); timer = setTimeout(() => done('dom_quiet'), quietMs); });
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    timer = setTimeout(() => done('dom_quiet'), quietMs);
+    const cap = setTimeout(() => done('cap'), capMs);
+})
+"""
+
+def meta_refresh_target(html, base_url, max_delay=CLIENT_REDIRECT_MAX_DELAY):
+    """Target URL of an (immediate) <meta http-equiv="refresh"> client-side redirect, or None"""
+    match = META_REFRESH_RE.search(html[:20000])
+    if not match or not match.group(2):
+        return None
+    if int(match.group(1)) > max_delay:
+        return None
+    target = urljoin(base_url, match.group(2))
+    return target if target.split('#')[0] != base_url.split('#')[0] else None
+
+async def wait_until_settled(page, quiet_ms=PAGE_QUIET_MS, cap_ms=PAGE_READY_CAP_MS):
+    """
+    Page is past domcontentloaded - wait for network idle or DOM mutation quiescence, whichever comes first,
+    at most cap_ms. Returns the signal: 'networkidle', 'dom_quiet', 'cap' or 'navigated'.
+    """
+    async def network_idle():
+        await page.wait_for_load_state('networkidle', timeout=cap_ms)
+        return 'networkidle'
+
+    async def dom_quiet():
+        return await page.evaluate(DOM_QUIET_JS, [quiet_ms, cap_ms])
+
+    tasks = [asyncio.ensure_future(network_idle()), asyncio.ensure_future(dom_quiet())]
+    signal = 'cap'
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=cap_ms / 1000 + 1, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            task = done.pop()
+            if task.exception() is None:
+                signal = task.result()
+                break
+            if any(marker in str(task.exception()) for marker in NAVIGATION_ERRORS):
+                signal = 'navigated'
+                break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return signal
+
+async def read_ready_content(page, max_redirects=MAX_CLIENT_REDIRECTS):
+    """
+    Ready-state strategy of the browser tier (navigation itself waits only for domcontentloaded):
+    settle (network idle / DOM quiet / cap), follow client-side redirects (JS navigation, meta refresh)
+    explicitly up to max_redirects times, then read the DOM.
+    Returns (html, ready_signal, response of the last explicit navigation or None).
+    """
+    response = None
+    redirects = 0
+    while True:
+        signal = await wait_until_settled(page)
+        if signal == 'navigated' and redirects < max_redirects:
+            # JS redirect replaced the document - wait for the new one
+            redirects += 1
+            await page.wait_for_load_state('domcontentloaded')
+            continue
+        try:
+            html = await page.content()
+        except Exception as e:
+            if redirects < max_redirects and any(marker in str(e) for marker in NAVIGATION_ERRORS):
+                redirects += 1
+                await page.wait_for_load_state('domcontentloaded')
+                continue
+            raise
+
+        target = meta_refresh_target(html, page.url)
+        if target and redirects < max_redirects:
+            redirects += 1
+            logger.debug(f"Following meta refresh {page.url} -> {target}")
+            response = await page.goto(target, wait_until='domcontentloaded')
+            continue
+        return html, signal, response
@@ -1,4 +1,5 @@
 import re
+from src.utils.document import ParsedDocument
 
 PATTERNS = {
     'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
@@ -30,15 +31,31 @@ PATTERNS = {
     }
 }
 
+# Compiled once at import (the extractors run for every page)
+EMAIL_RE = re.compile(PATTERNS['email'], re.IGNORECASE)
+PHONE_RES = {country: re.compile(pattern) for country, pattern in PATTERNS['phone'].items()}
+PHONE_SEPARATORS_RE = re.compile(r'[\s\-\./]')
+ORG_NUM_RES = {country: re.compile(pattern) for country, pattern in PATTERNS['org_num'].items()}
+NON_DIGIT_RE = re.compile(r'[^0-9]')
+SOCIAL_MEDIA_RES = {platform: re.compile(pattern, re.IGNORECASE) for platform, pattern in PATTERNS['social_media'].items()}
+# Prefilter: literal host parts every social media pattern requires - one scan rejects the vast majority of hrefs
+SOCIAL_MEDIA_HINT_RE = re.compile(
+    r'facebook\.com/|twitter\.com/|x\.com/|instagram\.com/|linkedin\.com/|youtube\.com/'
+    r'|google\.com/maps|goo\.gl/maps/|business\.google\.com/|g\.page/',
+    re.IGNORECASE
+)
+
 def extract_emails(text):
     """Extract všechny emaily"""
-    return list(set(re.findall(PATTERNS['email'], text, re.IGNORECASE)))
+    if '@' not in text:
+        return []
+    return list(set(EMAIL_RE.findall(text)))
 
 def extract_phones(text, country='cz'):
     """Extract telefony podle zeme"""
-    pattern = PATTERNS['phone'].get(country, PATTERNS['phone']['cz'])
-    phones = re.findall(pattern, text)
-    return [re.sub(r'[\s\-\./]', '', p) for p in phones]  # normalize removing spaces, dots, dashes, slashes
+    pattern = PHONE_RES.get(country, PHONE_RES['cz'])
+    phones = pattern.findall(text)
+    return [PHONE_SEPARATORS_RE.sub('', p) for p in phones]  # normalize removing spaces, dots, dashes, slashes
 
 def validate_cz_ico(ico):
     """Validate CZ IČO (checksum)"""
@@ -70,7 +87,7 @@ def validate_be_org_num(org_num):
     - Modulo 97 check
     """
     # Normalize: remove dots, spaces, BE prefix
-    clean = re.sub(r'[^0-9]', '', org_num)
+    clean = NON_DIGIT_RE.sub('', org_num)
     
     if len(clean) == 9:
         clean = '0' + clean
@@ -99,11 +116,11 @@ def validate_be_org_num(org_num):
 
 def extract_org_num(text, country='cz'):
     """Extract Organization Number (IČO, etc.) with validation"""
-    pattern = PATTERNS['org_num'].get(country)
+    pattern = ORG_NUM_RES.get(country)
     if not pattern:
         return None
 
-    matches = re.findall(pattern, text)
+    matches = pattern.findall(text)
     for match in matches:
         # Match can be tuple if groups are used, but here simple groups
         candidate = match if isinstance(match, str) else match[0]
@@ -125,19 +142,25 @@ def extract_org_num(text, country='cz'):
 def extract_social_media(text):
     """Extract social media links from text (not robust for HREF)"""
     result = {}
-    for platform, pattern in PATTERNS['social_media'].items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            result[platform] = matches[0]
+    if not SOCIAL_MEDIA_HINT_RE.search(text):
+        return result
+    for platform, pattern in SOCIAL_MEDIA_RES.items():
+        match = pattern.search(text)
+        if match:
+            result[platform] = match.group(0)
     return result
 
 def extract_social_media_from_soup(soup):
-    """Extract social media links from 'a' tags hrefs"""
+    """Extract social media links from 'a' tags hrefs (BeautifulSoup or ParsedDocument)"""
     result = {}
-    # Iterate all links
-    for a in soup.find_all('a', href=True):
-        href = a['href']
-        for platform, pattern in PATTERNS['social_media'].items():
-            if platform not in result and re.search(pattern, href, re.IGNORECASE):
+    hrefs = soup.links if isinstance(soup, ParsedDocument) else (a['href'] for a in soup.find_all('a', href=True))
+    # Iterate all links - only the few passing the prefilter go through the per-platform patterns
+    for href in hrefs:
+        if not SOCIAL_MEDIA_HINT_RE.search(href):
+            continue
+        for platform, pattern in SOCIAL_MEDIA_RES.items():
+            if platform not in result and pattern.search(href):
                 result[platform] = href
+        if len(result) == len(SOCIAL_MEDIA_RES):
+            break
     return result
\ No newline at end of file
@@ -0,0 +1,112 @@
+import asyncio
+import time
+import logging
+from config.settings import (
+    SCRAPE_DELAY, SCRAPER_MAX_PER_HOST, POLITENESS_MAX_DELAY_SECONDS, POLITENESS_SLOW_RESPONSE_SECONDS
+)
+
+logger = logging.getLogger('scraper')
+
+# Host told us to slow down
+BACKOFF_STATUS_CODES = {429, 503}
+
+class _HostState:
+    __slots__ = ('tokens', 'updated', 'in_flight', 'waiting', 'delay', 'wakeup')
+
+    def __init__(self, delay):
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+        self.delay = delay
+        self.wakeup = asyncio.Event()
+
+class DomainScheduler:
+    """
+    Politeness per host: token bucket (1 request per `delay` seconds, burst 1), max in-flight requests
+    and adaptive delay - doubled on 429/503, x1.5 on slow responses, decays back to base_delay on success.
+    """
+
+    def __init__(self, base_delay=SCRAPE_DELAY, max_per_host=SCRAPER_MAX_PER_HOST,
+                 max_delay=POLITENESS_MAX_DELAY_SECONDS, slow_response=POLITENESS_SLOW_RESPONSE_SECONDS):
+        self.base_delay = base_delay
+        self.max_per_host = max_per_host
+        self.max_delay = max_delay
+        self.slow_response = slow_response
+        self._hosts = {}
+
+    def _state(self, domain):
+        state = self._hosts.get(domain)
+        if state is None:
+            state = self._hosts[domain] = _HostState(self.base_delay)
+        return state
+
+    def _refill(self, state):
+        now = time.monotonic()
+        if state.delay > 0:
+            state.tokens = min(1.0, state.tokens + (now - state.updated) / state.delay)
+        else:
+            state.tokens = 1.0
+        state.updated = now
+
+    async def acquire(self, domain):
+        """Wait until the host has a free slot and a token"""
+        state = self._state(domain)
+        while True:
+            self._refill(state)
+            if state.in_flight < self.max_per_host and state.tokens >= 1.0:
+                state.tokens -= 1.0
+                state.in_flight += 1
+                return
+            timeout = None
+            if state.in_flight < self.max_per_host:
+                timeout = (1.0 - state.tokens) * state.delay
+            state.waiting += 1
+            try:
+                await asyncio.wait_for(state.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                state.waiting -= 1
+
+    def release(self, domain, status_code=None, elapsed=None):
+        """Request to the host finished - adapt its delay from the outcome and wake up waiters"""
+        state = self._hosts.get(domain)
+        if state is None:
+            return
+        state.in_flight = max(0, state.in_flight - 1)
+        if status_code in BACKOFF_STATUS_CODES:
+            self._set_delay(domain, state, max(state.delay, self.base_delay, 1.0) * 2)
+            # the token bucket starts empty after a backoff
+            state.tokens = min(state.tokens, 0.0)
+        elif elapsed is not None and elapsed > self.slow_response:
+            self._set_delay(domain, state, max(state.delay, self.base_delay, 1.0) * 1.5)
+        elif state.delay > self.base_delay:
+            self._refill(state)
+            state.delay = max(self.base_delay, state.delay * 0.8)
+
+        state.wakeup.set()
+        state.wakeup = asyncio.Event()
+        if state.in_flight == 0 and state.waiting == 0 and state.delay == self.base_delay:
+            # idle host at base rate - keep the map small on long runs
+            self._refill(state)
+            if state.tokens >= 1.0:
+                del self._hosts[domain]
+
+    def _set_delay(self, domain, state, delay):
+        self._refill(state)
+        delay = min(delay, self.max_delay)
+        if delay != state.delay:
+            logger.info(f"Politeness: {domain} delay {state.delay:.1f}s -> {delay:.1f}s")
+        state.delay = delay
+
+    def backed_off_domains(self):
+        """Hosts currently slowed down above base delay"""
+        return {domain for domain, state in self._hosts.items() if state.delay > self.base_delay}
+
+    def stats(self):
+        return {
+            'hosts': len(self._hosts),
+            'in_flight': sum(state.in_flight for state in self._hosts.values()),
+            'backed_off': len(self.backed_off_domains()),
+        }
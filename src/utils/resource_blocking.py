@@ -0,0 +1,72 @@
+import logging
+from src.utils.urls import url_domain
+from config.settings import BROWSER_BLOCK_RESOURCES, BROWSER_BLOCKED_RESOURCE_TYPES, BROWSER_BLOCKED_DOMAINS
+
+logger = logging.getLogger('scraper')
+
+class ResourceBlocker:
+    """
+    Route profile of the browser tier: aborts sub-requests the scraper does not need for page.content()
+    (images, fonts, media, third-party trackers/ads). The main document is never blocked.
+    Per-page stats: requests/bytes actually loaded and blocked requests by resource type / denied domain.
+    """
+
+    def __init__(self, resource_types=BROWSER_BLOCKED_RESOURCE_TYPES, denied_domains=BROWSER_BLOCKED_DOMAINS,
+                 enabled=BROWSER_BLOCK_RESOURCES):
+        self.resource_types = set(resource_types)
+        self.denied_domains = set(denied_domains)
+        self.enabled = enabled
+
+    def is_denied_domain(self, url, site_domain=None):
+        """Request goes to a denied third-party domain (or its subdomain) - never the scraped site itself"""
+        domain = url_domain(url)
+        if not domain:
+            return False
+        if site_domain and (domain == site_domain or domain.endswith('.' + site_domain)):
+            return False
+        parts = domain.split('.')
+        return any('.'.join(parts[i:]) in self.denied_domains for i in range(len(parts)))
+
+    def block_reason(self, resource_type, url, site_domain=None):
+        """'type:<resource type>', 'domain' or None when the request may load"""
+        if resource_type == 'document':
+            return None
+        if resource_type in self.resource_types:
+            return f"type:{resource_type}"
+        if self.is_denied_domain(url, site_domain):
+            return 'domain'
+        return None
+
+    async def install(self, page, site_url=None):
+        """Route the page's requests through the profile; returns the (live) stats dict of the page"""
+        site_domain = url_domain(site_url)
+        stats = {'requests': 0, 'transferred_bytes': 0, 'blocked_requests': 0, 'blocked_by_type': {}, 'blocked_by_domain': 0}
+
+        async def on_finished(request):
+            stats['requests'] += 1
+            try:
+                sizes = await request.sizes()
+                stats['transferred_bytes'] += sizes['responseBodySize'] + sizes['responseHeadersSize']
+            except Exception:
+                pass
+
+        page.on('requestfinished', on_finished)
+        if not self.enabled:
+            return stats
+
+        async def handle(route):
+            request = route.request
+            reason = self.block_reason(request.resource_type, request.url, site_domain)
+            if reason is None:
+                await route.continue_()
+                return
+            stats['blocked_requests'] += 1
+            if reason == 'domain':
+                stats['blocked_by_domain'] += 1
+            else:
+                by_type = stats['blocked_by_type']
+                by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+            await route.abort('blockedbyclient')
+
+        await page.route('**/*', handle)
+        return stats
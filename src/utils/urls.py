@@ -63,6 +63,27 @@ def extract_domain(url):
     except:
         return ""
 
+DOMAIN_RE = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?(?:[^/?#@]*@)?([^/?#:]+)')
+
+def url_domain(url):
+    """
+    Normalizovaná doména fronty/blacklistu: host bez portu a úvodního 'www.'.
+    Accepts a URL or a bare host; must match scr_url_domain() in the DB (migration 015).
+    """
+    if not url:
+        return None
+    match = DOMAIN_RE.match(url.strip())
+    if not match:
+        return None
+    domain = match.group(1).lower()
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain or None
+
+def subdomain_like_pattern(domain):
+    """LIKE pattern on reverse(domain) matching subdomains of `domain` (uses idx_scr_queue_domain_reversed)"""
+    return domain[::-1].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '.%'
+
 def same_domain(url1, url2):
     """Kontroluje zda jsou URL ze stejné domény"""
     return extract_domain(url1) == extract_domain(url2)
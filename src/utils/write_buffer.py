@@ -0,0 +1,73 @@
+import asyncio
+import logging
+
+logger = logging.getLogger('scraper')
+
+class WriteBehindBuffer:
+    """
+    Sbírá záznamy a zapisuje je dávkově: po max_items záznamech nebo nejpozději po max_delay_ms.
+    write_batch(items) is an async callable doing the actual (set-based) writes,
+    on_flushed(items) is called after every flush attempt, successful or not.
+    A failed or lost batch is not retried here - its queue items keep their lease and get reclaimed.
+    """
+
+    def __init__(self, write_batch, max_items, max_delay_ms, on_flushed=None):
+        self.write_batch = write_batch
+        self.max_items = max_items
+        self.max_delay = max_delay_ms / 1000
+        self.on_flushed = on_flushed
+        self._pending = []
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self.flushes = 0
+        self.flushed_items = 0
+        self.failed_items = 0
+
+    def start(self):
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.max_delay)
+            await self.flush()
+
+    async def submit(self, item):
+        self._pending.append(item)
+        if len(self._pending) >= self.max_items:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await self.write_batch(batch)
+                self.flushes += 1
+                self.flushed_items += len(batch)
+            except Exception as e:
+                self.failed_items += len(batch)
+                logger.error(f"Write-behind flush of {len(batch)} items failed: {e}")
+            finally:
+                if self.on_flushed:
+                    self.on_flushed(batch)
+
+    async def close(self):
+        """Stop the timer and flush what is left"""
+        if self._timer is not None:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+            self._timer = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'flushes': self.flushes,
+            'flushed_items': self.flushed_items,
+            'failed_items': self.failed_items,
+        }
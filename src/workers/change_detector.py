@@ -1,13 +1,20 @@
 import json
+import select
 import time
-from src.utils.db import get_db_connection, get_cursor
+from src.utils.db import get_db_connection, get_cursor, values_sql, flatten_rows
 from src.utils.logging_config import setup_logging
-from config.settings import LOG_DIR, WEBHOOK_URL
+from src.utils.content_hash import TRACKED_FIELDS, normalize_field
+from config.settings import LOG_DIR, WEBHOOK_URL, CHANGE_BATCH_SIZE, CHANGE_IDLE_SECONDS
 import os
 import requests
 from datetime import datetime
 
 class ChangeDetector:
+    """
+    Consumes scr_change_queue (filled by a trigger on scr_parsed_data) in batches and compares every new
+    parsed version with the previous version of its listing - cost per new row, not per table scan.
+    """
+
     def __init__(self):
         self.conn = get_db_connection()
         self.logger = setup_logging('change_detector', f'{LOG_DIR}/change_detector.log')
@@ -21,31 +28,20 @@ class ChangeDetector:
                 WHERE uni_listing_id = %s
                 ORDER BY extracted_at DESC
                 LIMIT 2
-            """)
+            """, (uni_listing_id,))
             return cur.fetchall()
 
-    def detect_changes(self, old_data, new_data):
+    def detect_changes(self, old_data, new_data, fields=TRACKED_FIELDS):
         """
         Porovná 2 JSON objekty a vrátí změny
         Returns: list of (field_name, old_value, new_value)
         """
         changes = []
 
-        # Fields to track
-        tracked_fields = [
-            'company_name', 'emails', 'phones', 'org_num',
-            'addresses', 'opening_hours', 'social_media'
-        ]
-
-        for field in tracked_fields:
-            old_val = old_data.get(field)
-            new_val = new_data.get(field)
-
+        for field in fields:
             # Normalize lists for comparison
-            if isinstance(old_val, list):
-                old_val = sorted([str(x) for x in old_val])
-            if isinstance(new_val, list):
-                new_val = sorted([str(x) for x in new_val])
+            old_val = normalize_field(old_data.get(field))
+            new_val = normalize_field(new_data.get(field))
 
             if old_val != new_val:
                 changes.append((
@@ -56,20 +52,15 @@ class ChangeDetector:
 
         return changes
 
-    def save_changes(self, uni_listing_id, changes):
-        """Uloží změny do change_history"""
-        if not changes:
+    def save_changes(self, cur, history):
+        """Uloží změny do change_history (rows: uni_listing_id, field, old, new)"""
+        if not history:
             return
-
-        with get_cursor(self.conn, dict_cursor=False) as cur:
-            for field, old_val, new_val in changes:
-                cur.execute("""
-                    INSERT INTO scr_change_history
-                    (uni_listing_id, field_name, old_value, new_value)
-                    VALUES (%s, %s, %s, %s)
-                """, (uni_listing_id, field, old_val, new_val))
-
-            self.conn.commit()
+        cur.execute(f"""
+            INSERT INTO scr_change_history
+            (uni_listing_id, field_name, old_value, new_value)
+            VALUES {values_sql('(%s, %s, %s, %s)', history)}
+        """, flatten_rows(history))
 
     def notify_change(self, uni_listing_id, changes):
         """Pošli webhook notification při změně"""
@@ -94,62 +85,129 @@ class ChangeDetector:
         except Exception as e:
             self.logger.error(f"Webhook failed: {e}")
 
-    def process_one(self):
-        """Zpracuje jeden listing"""
-        # Get listings s více než 1 parsovaným výsledkem
-        with get_cursor(self.conn) as cur:
-            cur.execute("""
-                SELECT uni_listing_id, COUNT(*) as cnt
-                FROM scr_parsed_data
-                WHERE uni_listing_id IS NOT NULL
-                GROUP BY uni_listing_id
-                HAVING COUNT(*) >= 2
-                ORDER BY MAX(extracted_at) DESC
+    def claim_batch(self, cur, batch_size):
+        """
+        Take up to batch_size events with the content hashes of the new and the previous version of the listing.
+        The events are deleted in the batch transaction - a crash rolls them back into the queue.
+        """
+        cur.execute("""
+            WITH claimed AS (
+                DELETE FROM scr_change_queue
+                WHERE change_id IN (
+                    SELECT change_id FROM scr_change_queue
+                    ORDER BY change_id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING change_id, uni_listing_id, parsed_id
+            )
+            SELECT c.change_id, c.uni_listing_id, n.parsed_id, n.fingerprint, n.field_hashes,
+                   p.parsed_id AS previous_id, p.fingerprint AS previous_fingerprint,
+                   p.field_hashes AS previous_field_hashes
+            FROM claimed c
+            JOIN scr_parsed_data n ON n.parsed_id = c.parsed_id
+            LEFT JOIN LATERAL (
+                SELECT o.parsed_id, o.fingerprint, o.field_hashes
+                FROM scr_parsed_data o
+                WHERE o.uni_listing_id = n.uni_listing_id
+                  AND (o.extracted_at, o.parsed_id) < (n.extracted_at, n.parsed_id)
+                ORDER BY o.extracted_at DESC, o.parsed_id DESC
                 LIMIT 1
-            """)
-
-            row = cur.fetchone()
-            if not row:
-                return False
-
-            uni_listing_id = row['uni_listing_id']
-
-        # Get latest 2 data
-        results = self.get_latest_data(uni_listing_id)
-        if len(results) < 2:
-            return False
-
-        new_data = results[0]['data']
-        old_data = results[1]['data']
-        new_parsed_id = results[0]['parsed_id']
-
-        self.logger.info(f"Checking changes for listing {uni_listing_id}")
-
-        # Detect changes
-        changes = self.detect_changes(old_data, new_data)
-
-        if changes:
-            self.logger.info(f"  -> Found {len(changes)} changes")
-            self.save_changes(uni_listing_id, changes)
+            ) p ON TRUE
+            ORDER BY c.change_id
+        """, (batch_size,))
+        return cur.fetchall()
+
+    def load_data(self, cur, parsed_ids, cache):
+        """Data of parsed versions not in cache yet (one query)"""
+        missing = list({parsed_id for parsed_id in parsed_ids if parsed_id not in cache})
+        if missing:
+            cur.execute("SELECT parsed_id, data FROM scr_parsed_data WHERE parsed_id = ANY(%s)", (missing,))
+            cache.update((row['parsed_id'], row['data']) for row in cur.fetchall())
+        return cache
+
+    @staticmethod
+    def changed_fields(old_fingerprint, old_hashes, new_fingerprint, new_hashes):
+        """Tracked fields whose hashes differ; None when a version has no hashes (stored before content hashing)"""
+        if not old_hashes or not new_hashes:
+            return None
+        if old_fingerprint == new_fingerprint:
+            return []
+        return [field for field in TRACKED_FIELDS if old_hashes.get(field) != new_hashes.get(field)]
+
+    def process_batch(self, batch_size=CHANGE_BATCH_SIZE):
+        """Zpracuje dávku událostí z fronty; returns the number of events (0 = queue empty)"""
+        notifications = []
+        # One transaction per batch (the connection is autocommit otherwise)
+        self.conn.autocommit = False
+        try:
+            with self.conn:
+                with get_cursor(self.conn) as cur:
+                    events = self.claim_batch(cur, batch_size)
+                    data = {}
+                    changed = []
+                    duplicates = []
+                    # version deleted as a duplicate in this batch -> the version it duplicated
+                    replaced = {}
+                    for event in events:
+                        previous = (event['previous_id'], event['previous_fingerprint'], event['previous_field_hashes'])
+                        while previous[0] in replaced:
+                            previous = replaced[previous[0]]
+                        if previous[0] is None:
+                            # first version of the listing
+                            continue
+
+                        fields = self.changed_fields(previous[1], previous[2], event['fingerprint'], event['field_hashes'])
+                        if fields is None:
+                            self.load_data(cur, [previous[0], event['parsed_id']], data)
+                            fields = [c[0] for c in self.detect_changes(data[previous[0]], data[event['parsed_id']])]
+                        if fields:
+                            changed.append((event['uni_listing_id'], previous[0], event['parsed_id'], fields))
+                        else:
+                            duplicates.append(event['parsed_id'])
+                            replaced[event['parsed_id']] = previous
+
+                    # Data is read only for versions with changed fields
+                    self.load_data(cur, [i for _, old_id, new_id, _ in changed for i in (old_id, new_id)], data)
+                    history = []
+                    for uni_listing_id, old_id, new_id, fields in changed:
+                        changes = self.detect_changes(data[old_id], data[new_id], fields)
+                        if changes:
+                            self.logger.info(f"Listing {uni_listing_id}: {len(changes)} changes")
+                            history.extend((uni_listing_id,) + change for change in changes)
+                            notifications.append((uni_listing_id, changes))
+
+                    self.save_changes(cur, history)
+                    if duplicates:
+                        # No changes - the new version is a duplicate of the previous one
+                        cur.execute("DELETE FROM scr_parsed_data WHERE parsed_id = ANY(%s)", (duplicates,))
+        finally:
+            self.conn.autocommit = True
+
+        if events:
+            self.logger.info(
+                f"Checked {len(events)} versions: {len(notifications)} changed, {len(duplicates)} duplicates deleted"
+            )
+        for uni_listing_id, changes in notifications:
             self.notify_change(uni_listing_id, changes)
-        else:
-            self.logger.info(f"  -> No changes detected, deleting duplicate version (parsed_id: {new_parsed_id})")
-            with get_cursor(self.conn, dict_cursor=False) as cur:
-                cur.execute("DELETE FROM scr_parsed_data WHERE parsed_id = %s", (new_parsed_id,))
-                self.conn.commit()
+        return len(events)
 
-        return True
+    def wait_for_changes(self, timeout=CHANGE_IDLE_SECONDS):
+        """Sleep until the scr_parsed_data trigger sends NOTIFY scr_change_queue (or the timeout)"""
+        if select.select([self.conn], [], [], timeout) != ([], [], []):
+            self.conn.poll()
+            self.conn.notifies.clear()
 
     def run(self):
         """Main loop"""
         self.logger.info("Change detector started")
+        with get_cursor(self.conn, dict_cursor=False) as cur:
+            cur.execute("LISTEN scr_change_queue")
 
         while True:
             try:
-                if not self.process_one():
-                    self.logger.info("No changes to detect, waiting...")
-                    time.sleep(300) # 5 minut
-                    continue
+                if not self.process_batch():
+                    self.wait_for_changes()
             except Exception as e:
                 self.logger.error(f"Error in change detector: {e}")
                 time.sleep(60)
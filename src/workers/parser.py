@@ -1,8 +1,12 @@
-from bs4 import BeautifulSoup
 import json
+import os
+import socket
 import time
 import re
-from src.utils.db import get_db_connection, get_cursor
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.db import get_db_connection, get_cursor, values_sql, flatten_rows
+from src.utils.content_hash import CHANGED_VERSION_FILTER, PARSED_DATA_ROW, hash_columns, unique_versions
 from src.utils.patterns import (
     extract_emails, extract_phones, extract_org_num, extract_social_media_from_soup
 )
@@ -10,14 +14,22 @@ from src.utils.address import extract_addresses_from_text
 from src.utils.logging_config import setup_logging
 from src.utils.country import detect_country
 from src.utils.multipage import find_promising_links
+from src.utils.document import as_document
+from src.utils.language import detect_language
 from src.utils.storage import read_raw_html
-from config.settings import LOG_DIR
+from config.settings import LOG_DIR, PARSER_WORKERS, PARSER_BATCH_SIZE, PARSER_LEASE_SECONDS
 from src.utils.urls import normalize_url
 
+# Sub-pages are discovered only on pages shallower than this
+SUBPAGE_MAX_DEPTH = 2
+
 class Parser:
-    def __init__(self):
-        self.conn = get_db_connection()
+    def __init__(self, connect=True):
+        # Process-pool workers only parse - no DB connection
+        self.conn = get_db_connection() if connect else None
         self.logger = setup_logging('parser', f'{LOG_DIR}/parser.log')
+        # Identifies this process as lease_owner of claimed scrape results (batch mode)
+        self.lease_owner = f"{socket.gethostname()}:{os.getpid()}"
 
     def get_next_scrape_result(self):
         """Získá další scrape_result k parsování"""
@@ -34,48 +46,37 @@ class Parser:
             """)
             return cur.fetchone()
 
-    def extract_structured_data(self, soup):
+    def extract_structured_data(self, doc):
         """Extract JSON-LD, microdata, OpenGraph"""
         data = {}
 
         # JSON-LD
-        json_ld = soup.find('script', type='application/ld+json')
-        if json_ld and json_ld.string:
-            try:
-                data['json_ld'] = json.loads(json_ld.string)
-            except:
-                pass
+        if doc.json_ld:
+            data['json_ld'] = doc.json_ld[0]
 
         # OpenGraph
-        og_tags = soup.find_all('meta', property=lambda x: x and x.startswith('og:'))
-        if og_tags:
-            data['opengraph'] = {
-                tag.get('property')[3:]: tag.get('content')
-                for tag in og_tags
-            }
+        opengraph = doc.meta_properties('og:')
+        if opengraph:
+            data['opengraph'] = opengraph
 
         return data
 
-    def extract_text_content(self, soup):
-        """Extract plain text z HTML"""
-        # Remove script, style
-        # Don't remove nav/footer as they often contain contact info
-        for elem in soup(['script', 'style']):
-            elem.decompose()
-
-        return soup.get_text(separator=' ', strip=True)
+    def extract_text_content(self, doc):
+        """Extract plain text z HTML (script/style skipped; nav/footer kept as they often contain contact info)"""
+        return doc.text
 
     def parse_html(self, html, language, url):
         """
         Parse HTML a extrahuje data
+        html: raw HTML or a ParsedDocument (parsed once, shared with link discovery)
         Returns: dict s extracted data
         """
-        soup = BeautifulSoup(html, 'lxml')
-        
-        # Social media extraction from soup (links)
-        social_media = extract_social_media_from_soup(soup)
-        
-        text = self.extract_text_content(soup)
+        doc = as_document(html)
+
+        # Social media extraction from links
+        social_media = extract_social_media_from_soup(doc)
+
+        text = self.extract_text_content(doc)
         
         # Detect country context
         country = detect_country(url, language)
@@ -97,12 +98,12 @@ class Parser:
             'emails': extract_emails(text),
             'phones': phones,
             'org_num': org_num,
-            'addresses': extract_addresses_from_text(text, language),
+            'addresses': extract_addresses_from_text(text, language, country),
             'social_media': social_media,
         }
 
         # Structured data
-        structured = self.extract_structured_data(soup)
+        structured = self.extract_structured_data(doc)
         if structured:
             data['structured'] = structured
 
@@ -115,8 +116,8 @@ class Parser:
         elif 'opengraph' in structured and structured['opengraph'].get('site_name'):
             data['company_name'] = structured['opengraph']['site_name']
         # 3. Title tag
-        elif soup.title and soup.title.string:
-            data['company_name'] = soup.title.string.strip()
+        elif doc.title:
+            data['company_name'] = doc.title
 
         return data
 
@@ -141,17 +142,22 @@ class Parser:
         quality_score = self.calculate_quality_score(data, language)
 
         with get_cursor(self.conn, dict_cursor=False) as cur:
-            cur.execute("""
+            cur.execute(f"""
                 INSERT INTO scr_parsed_data
-                (result_id, uni_listing_id, content_language, data, quality_score, opco)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                (result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+                SELECT v.* FROM (VALUES {PARSED_DATA_ROW})
+                    AS v(result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+                WHERE {CHANGED_VERSION_FILTER}
                 RETURNING parsed_id
             """, (
                 result_id, uni_listing_id, language,
-                json.dumps(data), quality_score, opco
+                json.dumps(data), quality_score, opco, *hash_columns(data)
             ))
 
-            parsed_id = cur.fetchone()[0]
+            row = cur.fetchone()
+            parsed_id = row[0] if row else None
+            if parsed_id is None:
+                self.logger.info(f"  -> Unchanged since the last version of listing {uni_listing_id}, not stored")
 
             # Mark scrape_result as processed
             cur.execute("""
@@ -211,8 +217,9 @@ class Parser:
         self.logger.info(f"Parsing: {url} ({language})")
 
         try:
-            # Parse
-            data = self.parse_html(html, language, url)
+            # Parse (once - the document is shared with link discovery below)
+            doc = as_document(html)
+            data = self.parse_html(doc, language, url)
             country = data.get('country')
 
             # Get uni_listing_id
@@ -225,8 +232,8 @@ class Parser:
             # Check max depth first? Assume max depth is handled by scraper usually, 
             # but if we add here, we should probably check.
             # For now, let's just add if depth < 2 (hardcoded limit for now, or fetch from DB rules)
-            if depth < 2:
-                promising = find_promising_links(html, url, language, country)
+            if depth < SUBPAGE_MAX_DEPTH:
+                promising = find_promising_links(doc, url, language, country)
                 if promising:
                     # Need parent_scrape_id -> result_id (this result is the parent of the new subpage)
                     # Actually scrape_queue.parent_scrape_id refers to scrape_results.id of parent?
@@ -242,6 +249,163 @@ class Parser:
 
         return True
 
+    def parse_item(self, item, html=None):
+        """
+        Parse one scrape result (CPU-bound, runs in a process-pool worker in batch mode).
+        Returns a picklable outcome: parsed data, quality score and promising sub-pages, or the error.
+        """
+        result_id = item['result_id']
+        html = html or read_raw_html(item)
+        if not html:
+            return {'result_id': result_id, 'error': 'Could not read HTML'}
+
+        language = item['detected_language']
+        url = item['url']
+        try:
+            doc = as_document(html)
+            data = self.parse_html(doc, language, url)
+            promising = []
+            if (item.get('depth') or 0) < SUBPAGE_MAX_DEPTH:
+                promising = find_promising_links(doc, url, language, data.get('country'))
+            return {
+                'result_id': result_id,
+                'data': data,
+                'quality_score': self.calculate_quality_score(data, language),
+                'promising': promising,
+            }
+        except Exception as e:
+            return {'result_id': result_id, 'error': str(e)}
+
+    def claim_batch(self, batch_size=PARSER_BATCH_SIZE):
+        """
+        Lease a batch of unparsed results (new, or processing with an expired lease of a crashed parser),
+        together with the queue data the write-back needs.
+        """
+        with get_cursor(self.conn) as cur:
+            cur.execute("""
+                WITH candidates AS (
+                    SELECT r.result_id, q.depth, q.opco, q.uni_listing_id
+                    FROM scr_scrape_results r
+                    LEFT JOIN scr_scrape_queue q ON r.queue_id = q.queue_id
+                    WHERE (r.processing_status = 'new'
+                        OR (r.processing_status = 'processing' AND r.lease_expires_at < NOW()))
+                      AND (r.html IS NOT NULL OR r.html_path IS NOT NULL)
+                    ORDER BY r.scraped_at ASC
+                    LIMIT %s
+                    FOR UPDATE OF r SKIP LOCKED
+                )
+                UPDATE scr_scrape_results r
+                SET processing_status = 'processing',
+                    lease_owner = %s,
+                    lease_expires_at = NOW() + %s * INTERVAL '1 second'
+                FROM candidates c
+                WHERE r.result_id = c.result_id
+                RETURNING r.result_id, r.html, r.html_path, r.detected_language, r.url, r.queue_id,
+                          c.depth, c.opco, c.uni_listing_id
+            """, (batch_size, self.lease_owner, PARSER_LEASE_SECONDS))
+            return [dict(row) for row in cur.fetchall()]
+
+    def save_batch(self, items, outcomes):
+        """
+        Write back a parsed batch in one transaction: result statuses (only rows we still lease),
+        multi-row INSERT of parsed data, sub-pages.
+        """
+        items_by_id = {item['result_id']: item for item in items}
+        statuses = [
+            (o['result_id'], 'failed' if 'error' in o else 'processed', o.get('error'))
+            for o in outcomes
+        ]
+        # One transaction for the whole batch (the connection is autocommit otherwise)
+        self.conn.autocommit = False
+        try:
+            with self.conn:
+                with get_cursor(self.conn, dict_cursor=False) as cur:
+                    cur.execute(f"""
+                        UPDATE scr_scrape_results r
+                        SET processing_status = v.status,
+                            error_message = COALESCE(v.error, r.error_message),
+                            lease_owner = NULL, lease_expires_at = NULL
+                        FROM (VALUES {values_sql('(%s::int, %s::text, %s::text)', statuses)}) AS v(result_id, status, error)
+                        WHERE r.result_id = v.result_id
+                          AND r.lease_owner = %s
+                        RETURNING r.result_id
+                    """, flatten_rows(statuses) + [self.lease_owner])
+                    owned = {row[0] for row in cur.fetchall()}
+                    if len(owned) < len(statuses):
+                        self.logger.warning(f"{len(statuses) - len(owned)} results skipped (lease lost)")
+
+                    parsed = [o for o in outcomes if 'error' not in o and o['result_id'] in owned]
+                    if parsed:
+                        rows = unique_versions([
+                            (o['result_id'], items_by_id[o['result_id']]['uni_listing_id'],
+                             items_by_id[o['result_id']]['detected_language'], json.dumps(o['data']),
+                             o['quality_score'], items_by_id[o['result_id']]['opco'],
+                             *hash_columns(o['data']))
+                            for o in parsed
+                        ])
+                        # Unchanged re-scrapes (same fingerprint as the listing's latest version) are skipped
+                        cur.execute(f"""
+                            INSERT INTO scr_parsed_data
+                            (result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+                            SELECT v.* FROM (VALUES {values_sql(PARSED_DATA_ROW, rows)})
+                                AS v(result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+                            WHERE {CHANGED_VERSION_FILTER}
+                        """, flatten_rows(rows))
+                        if cur.rowcount < len(parsed):
+                            self.logger.info(f"{len(parsed) - cur.rowcount} unchanged versions not stored")
+
+                    # Sub-pages (one row per URL - ON CONFLICT DO UPDATE cannot touch a row twice)
+                    subpages = {}
+                    for o in parsed:
+                        item = items_by_id[o['result_id']]
+                        for url, category in o['promising']:
+                            subpages.setdefault(url, (
+                                url, normalize_url(url), item['uni_listing_id'], o['result_id'],
+                                (item.get('depth') or 0) + 1, item['opco']
+                            ))
+                    if subpages:
+                        cur.execute(f"""
+                            INSERT INTO scr_scrape_queue
+                            (url, normalized_url, uni_listing_id, parent_scrape_id, depth, priority, opco)
+                            VALUES {values_sql('(%s, %s, %s, %s, %s, 5, %s)', subpages)}
+                            ON CONFLICT (url) DO UPDATE
+                            SET normalized_url = COALESCE(scr_scrape_queue.normalized_url, EXCLUDED.normalized_url)
+                        """, flatten_rows(subpages.values()))
+        finally:
+            self.conn.autocommit = True
+        return len(parsed)
+
+    def run_batch(self, max_items=None, workers=PARSER_WORKERS, batch_size=PARSER_BATCH_SIZE):
+        """Batch mode: lease batches of results, parse them in a process pool, write back set-based"""
+        self.logger.info(f"Parser worker started (batch mode, {workers} processes, batch {batch_size})")
+        processed = 0
+        started = time.monotonic()
+
+        # spawn, not fork - the worker holds an open DB connection and logging handlers
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_parse_worker
+        ) as pool:
+            while not max_items or processed < max_items:
+                items = self.claim_batch(min(batch_size, max_items - processed) if max_items else batch_size)
+                if not items:
+                    self.logger.info("Nothing to parse, exiting.")
+                    break
+
+                batch_started = time.monotonic()
+                chunksize = max(1, len(items) // (workers * 4))
+                outcomes = list(pool.map(_parse_item, items, chunksize=chunksize))
+                saved = self.save_batch(items, outcomes)
+                processed += len(items)
+
+                elapsed = time.monotonic() - batch_started
+                total = time.monotonic() - started
+                self.logger.info(
+                    f"Parsed {saved}/{len(items)} in {elapsed:.1f}s ({len(items) / elapsed:.1f} items/s), "
+                    f"total {processed} ({processed / total:.1f} items/s)"
+                )
+
+        self.conn.close()
+
     def run(self, max_items=None):
         """Main loop"""
         processed = 0
@@ -259,6 +423,40 @@ class Parser:
 
         self.conn.close()
 
+# Parser instance of a process-pool worker
+_worker_parser = None
+
+def init_parse_worker():
+    global _worker_parser
+    _worker_parser = Parser(connect=False)
+
+def _parse_item(item):
+    return _worker_parser.parse_item(item)
+
+def parse_fetched(html, url, language=None, find_links=False):
+    """
+    Parse-on-fetch stage of the scraper (process-pool task): language, sub-page links and parsed data
+    of freshly fetched HTML from a single parse, without the raw HTML round trip through RAW_HTML_DIR.
+    language: (code, confidence) already known, or None to detect it.
+    """
+    parser = _worker_parser or Parser(connect=False)
+    try:
+        doc = as_document(html)
+        lang, lang_conf = language or detect_language(doc, url)
+        data = parser.parse_html(doc, lang, url)
+        return {
+            'language': lang,
+            'language_confidence': lang_conf,
+            'promising': find_promising_links(doc, url, lang) if find_links else [],
+            'data': data,
+            'quality_score': parser.calculate_quality_score(data, lang),
+        }
+    except Exception as e:
+        return {'error': str(e)}
+
 if __name__ == '__main__':
     parser = Parser()
-    parser.run()
+    if PARSER_WORKERS > 1:
+        parser.run_batch()
+    else:
+        parser.run()
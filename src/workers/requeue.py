@@ -22,9 +22,10 @@ class RequeueWorker:
                 JOIN scr_scrape_results sr ON sr.result_id = pd.result_id
                 WHERE pd.quality_score > 50
                   AND pd.extracted_at < NOW() - INTERVAL '%s days'
-                  AND sr.url NOT IN (
-                      SELECT url FROM scr_domain_blacklist
-                      WHERE auto_added = TRUE
+                  AND NOT EXISTS (
+                      SELECT 1 FROM scr_domain_blacklist b
+                      WHERE b.domain = ANY(scr_domain_suffixes(scr_url_domain(sr.url)))
+                        AND b.auto_added = TRUE
                   )
                   AND NOT EXISTS (
                       SELECT 1 FROM scr_scrape_queue sq
@@ -3,47 +3,99 @@ import json
 import time
 import socket
 import logging
-import shutil
-import glob
-import tempfile
 import os
 import sys
-import subprocess
 import http.client
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
 from datetime import datetime, timedelta
-from crawlee import Request
+from urllib.parse import urlparse
+from crawlee import Request, ConcurrencySettings
 from crawlee.crawlers import PlaywrightCrawler
-from crawlee import Request
 from crawlee.storage_clients import MemoryStorageClient
-from crawlee.configuration import Configuration
-from src.utils.db import get_db_connection, get_cursor
+from src.utils.db import get_db_connection, get_cursor, values_sql, flatten_rows
+from src.utils.async_db import async_connection, async_cursor, async_pool_stats, close_async_pool
+from src.utils.browser_pool import create_browser_pool, BrowserRecycler, kill_child_browsers, remove_stale_profile_dirs
+from src.utils.http_fetch import HttpFetcher, conditional_headers
+from src.utils.write_buffer import WriteBehindBuffer
+from src.utils.politeness import DomainScheduler
+from src.utils.dns_cache import DnsCache
+from src.utils.resource_blocking import ResourceBlocker
+from src.utils.page_ready import read_ready_content
 from src.utils.language import detect_language
-from src.utils.urls import extract_domain, normalize_url
+from src.utils.content_hash import CHANGED_VERSION_FILTER, PARSED_DATA_ROW, hash_columns, unique_versions
+from src.utils.html_fingerprint import html_fingerprint
+from src.utils.document import ParsedDocument
+from src.utils.urls import extract_domain, normalize_url, url_domain, subdomain_like_pattern
 from src.utils.logging_config import setup_logging
 from src.utils.multipage import find_promising_links
 from src.utils.storage import save_raw_html
-from config.settings import SCRAPE_DELAY, USER_AGENT, MAX_RETRIES, PLAYWRIGHT_HEADLESS, LOG_DIR, SCRAPE_TIMEOUT, REQUEUE_INTERVAL_DAYS, SCRAPER_MAX_RUNTIME_SECONDS
+from src.workers.parser import parse_fetched, init_parse_worker
+from config.settings import (
+    SCRAPE_DELAY, USER_AGENT, MAX_RETRIES, PLAYWRIGHT_HEADLESS, LOG_DIR, SCRAPE_TIMEOUT, REQUEUE_INTERVAL_DAYS,
+    SCRAPER_MAX_RUNTIME_SECONDS, SCRAPER_MAX_CONCURRENCY, SCRAPER_PREFETCH_BUFFER, SCRAPE_LEASE_SECONDS,
+    BROWSER_RSS_CHECK_SECONDS, HTTP_FIRST_ENABLED, HTTP_FETCH_CONCURRENCY, DB_POOL_STATS_SECONDS,
+    RESULT_FLUSH_ITEMS, RESULT_FLUSH_MS, SCRAPER_MAX_PER_HOST, SCRAPER_CLAIM_WINDOW, DNS_PRERESOLVE_ENABLED,
+    PARSE_ON_FETCH, PARSE_ON_FETCH_WORKERS, SKIP_UNCHANGED_PAGES, HTTP_REVALIDATION
+)
+
+# Browser navigation returns at domcontentloaded, the ready-state strategy takes it from there
+GOTO_OPTIONS = {'wait_until': 'domcontentloaded'}
+
+# Dead pages - the item fails instead of being re-scraped in REQUEUE_INTERVAL_DAYS
+HARD_FAILURE_STATUS_CODES = {404, 410}
 
 class Scraper:
     def __init__(self):
         self.conn = get_db_connection()
         self.logger = setup_logging('scraper', f'{LOG_DIR}/scraper.log')
         self._current_crawler = None
+        self._recycler = None
+        # Identifies this process as lease_owner of claimed queue items
+        self.lease_owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._http_fetcher = None
+        # Write-behind buffer: results/queue status are flushed in batches
+        self._writer = WriteBehindBuffer(
+            self.write_completions, RESULT_FLUSH_ITEMS, RESULT_FLUSH_MS, on_flushed=self.on_completions_flushed
+        )
+        self._max_depth_cache = {}
+        # Politeness: per-host rate/concurrency; queue_id -> domain of held items, queue_id -> domain of host slots
+        self._scheduler = DomainScheduler()
+        self._item_domains = {}
+        self._host_slots = {}
+        # queue_id -> start of the running fetch / duration of the last fetch (per-host response time)
+        self._fetch_started = {}
+        self._fetch_elapsed = {}
+        self._dns_cache = DnsCache() if DNS_PRERESOLVE_ENABLED else None
+        # Browser tier route profile; queue_id -> network stats of the item's page
+        self._blocker = ResourceBlocker()
+        self._page_stats = {}
+        # Parse-on-fetch process pool (PARSE_ON_FETCH), started in run()
+        self._parse_pool = None
+        # Streaming mode: bounded buffer of prefetched queue items and browser slots
+        self._buffer = None
+        self._browser_slots = None
+        self._browser_queue_ids = set()
+        # queue_id -> dispatch time of items handed to the crawler and not finished yet
+        self._in_flight = {}
         # Suppress verbose Crawlee errors (stack traces for 404s/DNS)
         # logging.getLogger('crawlee.crawlers._playwright._playwright_crawler').setLevel(logging.CRITICAL)
 
-    def create_request_for_item(self, item):
+    def create_request_for_item(self, item, upgrade_https=True, escalation_reason=None):
         """Build a Crawlee Request for a queue item, proactively upgrading http:// to https://"""
         raw_url = item['url']
         target_url = raw_url
         is_https_upgrade = False
 
-        if raw_url.startswith("http://"):
+        if upgrade_https and raw_url.startswith("http://"):
             target_url = "https://" + raw_url[7:]
             is_https_upgrade = True
 
+        # always_enqueue: the long-lived crawler must not deduplicate URLs scraped earlier in this run
         return Request.from_url(
             target_url,
+            always_enqueue=True,
             user_data={
                 "queue_id": item['queue_id'],
                 "retry_count": item['retry_count'],
@@ -52,37 +104,27 @@ class Scraper:
                 "depth": item['depth'],
                 "priority": item.get('priority', 0),
                 "original_url": raw_url,
-                "is_https_upgrade_attempt": is_https_upgrade
+                "is_https_upgrade_attempt": is_https_upgrade,
+                "escalation_reason": escalation_reason,
+                "previous_result_id": item.get('previous_result_id'),
+                "previous_fingerprint": item.get('previous_fingerprint')
             }
         )
 
-    def cleanup_temp_dirs(self):
-        """Clean up temporary directories created by Playwright/Crawlee and kill zombies"""
+    def cleanup_temp_dirs(self, kill_browsers=False):
+        """
+        Clean up browser leftovers without touching other scrapers running on the same host:
+        stale profile dirs of killed runs and, on shutdown, this process's own browser tree.
+        """
         try:
-            # 1. Kill zombie chromium processes (Linux only)
-            if sys.platform.startswith('linux'):
-                try:
-                    subprocess.run(["pkill", "-f", "chromium"], capture_output=True)
-                    subprocess.run(["pkill", "-f", "chrome"], capture_output=True)
-                except Exception:
-                    pass
-
-            # 2. Clean temp dirs
-            tmp_dir = tempfile.gettempdir()
-            # Pattern observed by user
-            pattern = os.path.join(tmp_dir, "apify-playwright-*") 
-            count = 0
-            for path in glob.glob(pattern):
-                # Safety: check if it looks like a temp dir and is a directory
-                if os.path.isdir(path):
-                    try:
-                        shutil.rmtree(path, ignore_errors=True)
-                        count += 1
-                    except Exception:
-                        pass
+            if kill_browsers:
+                killed = kill_child_browsers()
+                if killed:
+                    self.logger.debug(f"Terminated {killed} leftover browser processes")
 
+            count = remove_stale_profile_dirs()
             if count > 0:
-                self.logger.debug(f"Cleaned up {count} temporary Playwright directories")
+                self.logger.debug(f"Cleaned up {count} stale Playwright profile directories")
         except Exception as e:
             self.logger.warning(f"Failed to clean up temp dirs: {e}")
 
@@ -101,209 +143,539 @@ class Scraper:
         except Exception as e:
             self.logger.warning(f"Failed to reset Crawlee global state: {e}")
 
-    def fetch_batch(self, batch_size=20):
-        """Fetch batch of URLs from DB"""
+    def claim_batch(self, batch_size=20, exclude_domains=()):
+        """
+        Atomically lease up to batch_size URLs (pending or with an expired lease) for this scraper.
+        Leased rows are 'processing' with lease_owner/lease_expires_at; expired leases are reclaimed.
+        Hosts are interleaved: at most SCRAPER_MAX_PER_HOST items per domain out of a candidate window
+        of SCRAPER_CLAIM_WINDOW x batch_size rows; exclude_domains (busy/backed off hosts) are skipped.
+        Each row carries the item's previous fetched result (previous_result_id, previous_fingerprint) and the
+        validators of its response (previous_etag, previous_last_modified) or NULLs.
+        """
         self.conn.rollback() # Ensure fresh transaction
-        self.logger.debug(f"Fetching batch of {batch_size} URLs...")
+        self.logger.debug(f"Claiming batch of {batch_size} URLs...")
         with get_cursor(self.conn) as cur:
+            # Items whose lease expired too many times are given up
             cur.execute("""
-                SELECT queue_id, url, uni_listing_id, opco, retry_count, depth
-                FROM scr_scrape_queue
-                WHERE status = 'pending'
-                  AND next_scrape_at <= NOW()
-                  AND NOT EXISTS (
-                      SELECT 1 FROM scr_domain_blacklist 
-                      WHERE url LIKE '%%' || domain || '%%'
-                  )
-                ORDER BY priority DESC, added_at ASC
-                LIMIT %s
-                FOR UPDATE SKIP LOCKED
-            """, (batch_size,))
+                UPDATE scr_scrape_queue
+                SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL,
+                    last_scrape_at = NOW()
+                WHERE status = 'processing'
+                  AND lease_expires_at < NOW()
+                  AND retry_count >= %s
+            """, (MAX_RETRIES,))
+            if cur.rowcount:
+                self.logger.warning(f"Failed {cur.rowcount} items with repeatedly expired leases")
+
+            cur.execute("""
+                WITH candidates AS (
+                    SELECT queue_id, domain, priority, added_at
+                    FROM scr_scrape_queue
+                    WHERE ((status = 'pending' AND next_scrape_at <= NOW())
+                        OR (status = 'processing' AND lease_expires_at < NOW()))
+                      AND NOT EXISTS (
+                          SELECT 1 FROM scr_domain_blacklist b
+                          WHERE b.domain = ANY(scr_domain_suffixes(scr_scrape_queue.domain))
+                      )
+                      AND COALESCE(domain <> ALL(%s), TRUE)
+                    ORDER BY priority DESC, added_at ASC
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ),
+                ranked AS (
+                    SELECT queue_id, priority, added_at,
+                           ROW_NUMBER() OVER (PARTITION BY domain ORDER BY priority DESC, added_at ASC) AS host_rank
+                    FROM candidates
+                )
+                UPDATE scr_scrape_queue q
+                SET status = 'processing',
+                    lease_owner = %s,
+                    lease_expires_at = NOW() + %s * INTERVAL '1 second',
+                    retry_count = CASE WHEN q.status = 'processing' THEN q.retry_count + 1 ELSE q.retry_count END
+                FROM (
+                    SELECT queue_id
+                    FROM ranked
+                    WHERE host_rank <= %s
+                    ORDER BY host_rank, priority DESC, added_at ASC
+                    LIMIT %s
+                ) claimed
+                LEFT JOIN LATERAL (
+                    SELECT r.result_id, r.content_fingerprint,
+                           r.headers->>'etag' AS etag, r.headers->>'last-modified' AS last_modified
+                    FROM scr_scrape_results r
+                    WHERE r.queue_id = claimed.queue_id
+                      AND r.content_fingerprint IS NOT NULL
+                    ORDER BY r.scraped_at DESC, r.result_id DESC
+                    LIMIT 1
+                ) prev ON TRUE
+                WHERE q.queue_id = claimed.queue_id
+                RETURNING q.queue_id, q.url, q.uni_listing_id, q.opco, q.retry_count, q.depth, q.priority, q.domain,
+                          prev.result_id AS previous_result_id, prev.content_fingerprint AS previous_fingerprint,
+                          prev.etag AS previous_etag, prev.last_modified AS previous_last_modified
+            """, (
+                list(exclude_domains), batch_size * SCRAPER_CLAIM_WINDOW,
+                self.lease_owner, SCRAPE_LEASE_SECONDS, SCRAPER_MAX_PER_HOST, batch_size
+            ))
             rows = cur.fetchall()
-            self.logger.debug(f"Fetched {len(rows)} rows from DB")
+            self.logger.debug(f"Claimed {len(rows)} rows from DB")
             return rows
 
-    def update_queue_status_sync(self, queue_id, status, retry_count=None, next_scrape_at=None):
-        conn = get_db_connection()
+    async def renew_leases(self, queue_ids):
+        """Heartbeat: extend leases of items this scraper still holds (one statement for all)"""
+        if not queue_ids:
+            return
         try:
-            with get_cursor(conn, dict_cursor=False) as cur:
-                if retry_count is not None and next_scrape_at is not None:
-                    cur.execute("""
-                        UPDATE scr_scrape_queue
-                        SET status = %s, retry_count = %s, next_scrape_at = %s,
-                            last_scrape_at = CASE WHEN %s IN ('completed', 'failed') THEN NOW() ELSE last_scrape_at END
-                        WHERE queue_id = %s
-                    """, (status, retry_count, next_scrape_at, status, queue_id))
-                else:
-                    cur.execute("""
-                        UPDATE scr_scrape_queue
-                        SET status = %s,
-                            last_scrape_at = CASE WHEN %s IN ('completed', 'failed') THEN NOW() ELSE last_scrape_at END
-                        WHERE queue_id = %s
-                    """, (status, status, queue_id))
-                conn.commit()
-        finally:
-            conn.close()
+            async with async_connection() as conn:
+                await conn.execute("""
+                    UPDATE scr_scrape_queue
+                    SET lease_expires_at = NOW() + %s * INTERVAL '1 second'
+                    WHERE queue_id = ANY(%s)
+                      AND lease_owner = %s
+                      AND status = 'processing'
+                """, (SCRAPE_LEASE_SECONDS, list(queue_ids), self.lease_owner))
+        except Exception as e:
+            self.logger.error(f"Error renewing leases: {e}")
 
-    def handle_redirect_sync(self, queue_id, original_url, final_url, uni_listing_id, opco, depth, priority=0):
-        """Mark original URL as 'redirected' and insert final_url as a new queue item"""
-        conn = get_db_connection()
+    async def release_leases(self, queue_ids):
+        """Return leased but unprocessed items to the queue"""
+        if not queue_ids:
+            return
         try:
-            with get_cursor(conn, dict_cursor=False) as cur:
-                # 1. Mark original item as 'redirected'
-                cur.execute("""
+            async with async_connection() as conn:
+                cur = await conn.execute("""
                     UPDATE scr_scrape_queue
-                    SET status = 'redirected'
-                    WHERE queue_id = %s
-                """, (queue_id,))
-
-                # 2. Insert final_url into queue as new item (or return existing if present)
-                norm_final_url = normalize_url(final_url)
-                cur.execute("""
-                    INSERT INTO scr_scrape_queue
-                    (url, normalized_url, uni_listing_id, opco, depth, priority, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, 'pending')
-                    ON CONFLICT (url) DO UPDATE
-                    SET uni_listing_id = COALESCE(scr_scrape_queue.uni_listing_id, EXCLUDED.uni_listing_id),
-                        opco = COALESCE(scr_scrape_queue.opco, EXCLUDED.opco),
-                        normalized_url = COALESCE(scr_scrape_queue.normalized_url, EXCLUDED.normalized_url)
-                    RETURNING queue_id
-                """, (final_url, norm_final_url, uni_listing_id, opco, depth, priority))
-                new_queue_id = cur.fetchone()[0]
-                conn.commit()
-                self.logger.info(f"Redirect handled: {original_url} (queue_id {queue_id} -> redirected) -> {final_url} (queue_id {new_queue_id})")
-                return new_queue_id
+                    SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL
+                    WHERE queue_id = ANY(%s)
+                      AND lease_owner = %s
+                      AND status = 'processing'
+                """, (list(queue_ids), self.lease_owner))
+                if cur.rowcount > 0:
+                    self.logger.info(f"Released {cur.rowcount} leased items back to pending")
+        except Exception as e:
+            self.logger.error(f"Error releasing leases: {e}")
+
+    async def handle_redirect(self, queue_id, original_url, final_url, uni_listing_id, opco, depth, priority=0):
+        """Mark original URL as 'redirected' and insert final_url as a new queue item"""
+        try:
+            async with async_connection() as conn:
+                async with conn.transaction():
+                    # 1. Mark original item as 'redirected' (only while we still hold its lease)
+                    cur = await conn.execute("""
+                        UPDATE scr_scrape_queue
+                        SET status = 'redirected', lease_owner = NULL, lease_expires_at = NULL
+                        WHERE queue_id = %s
+                          AND lease_owner = %s
+                    """, (queue_id, self.lease_owner))
+                    if cur.rowcount == 0:
+                        self.logger.warning(f"Lease of queue_id {queue_id} lost, not recording redirect {original_url} -> {final_url}")
+                        return queue_id
+
+                    # 2. Insert final_url into queue as new item (or return existing if present)
+                    norm_final_url = normalize_url(final_url)
+                    cur = await conn.execute("""
+                        INSERT INTO scr_scrape_queue
+                        (url, normalized_url, uni_listing_id, opco, depth, priority, status)
+                        VALUES (%s, %s, %s, %s, %s, %s, 'pending')
+                        ON CONFLICT (url) DO UPDATE
+                        SET uni_listing_id = COALESCE(scr_scrape_queue.uni_listing_id, EXCLUDED.uni_listing_id),
+                            opco = COALESCE(scr_scrape_queue.opco, EXCLUDED.opco),
+                            normalized_url = COALESCE(scr_scrape_queue.normalized_url, EXCLUDED.normalized_url)
+                        RETURNING queue_id
+                    """, (final_url, norm_final_url, uni_listing_id, opco, depth, priority))
+                    new_queue_id = (await cur.fetchone())[0]
+            self.logger.info(f"Redirect handled: {original_url} (queue_id {queue_id} -> redirected) -> {final_url} (queue_id {new_queue_id})")
+            return new_queue_id
         except Exception as e:
             self.logger.error(f"Error handling redirect {original_url} -> {final_url}: {e}")
-            conn.rollback()
             return queue_id
-        finally:
-            conn.close()
 
-    def add_domain_to_blacklist_sync(self, domain, reason="no_dns"):
-        conn = get_db_connection()
+    async def add_domain_to_blacklist(self, domain, reason="no_dns"):
+        """Blacklist a domain and take its pending queue items off the dequeue path"""
         try:
-            with get_cursor(conn, dict_cursor=False) as cur:
-                cur.execute("""
-                    INSERT INTO scr_domain_blacklist (domain, reason, fail_count, first_failed_at, last_failed_at, auto_added)
-                    VALUES (%s, %s, 1, NOW(), NOW(), TRUE)
-                    ON CONFLICT (domain) DO UPDATE
-                    SET fail_count = scr_domain_blacklist.fail_count + 1,
-                        last_failed_at = NOW()
-                """, (domain, reason))
-                conn.commit()
-                self.logger.info(f"Blacklisted domain {domain} (reason: {reason})")
+            async with async_connection() as conn:
+                async with conn.transaction():
+                    await conn.execute("""
+                        INSERT INTO scr_domain_blacklist (domain, reason, fail_count, first_failed_at, last_failed_at, auto_added)
+                        VALUES (%s, %s, 1, NOW(), NOW(), TRUE)
+                        ON CONFLICT (domain) DO UPDATE
+                        SET fail_count = scr_domain_blacklist.fail_count + 1,
+                            last_failed_at = NOW()
+                    """, (domain, reason))
+                    cur = await conn.execute("""
+                        UPDATE scr_scrape_queue
+                        SET status = 'blacklisted'
+                        WHERE (domain = %s OR reverse(domain) LIKE %s)
+                          AND status = 'pending'
+                    """, (domain, subdomain_like_pattern(domain)))
+            self.logger.info(f"Blacklisted domain {domain} (reason: {reason}), {cur.rowcount} pending items marked blacklisted")
         except Exception as e:
             self.logger.warning(f"Failed to blacklist domain {domain}: {e}")
-        finally:
-            conn.close()
 
-    def save_result_sync(self, queue_id, url, scrape_result):
-        """Sync save result"""
-        self.logger.debug(f"Saving result for {url} (queue_id: {queue_id})")
-        conn = get_db_connection()
+    async def subpages_allowed(self, parent_url, depth):
+        """Sub-pages of the page are enqueued only below the domain's max depth"""
+        domain = extract_domain(parent_url)
+        max_depth = self._max_depth_cache.get(domain)
+        if max_depth is None:
+            max_depth = 2
+            async with async_connection() as conn:
+                async with async_cursor(conn) as cur:
+                    await cur.execute("SELECT max_depth FROM scr_domain_multipage_rules WHERE domain = %s AND enabled = TRUE", (domain,))
+                    row = await cur.fetchone()
+                    if row: max_depth = row['max_depth']
+            self._max_depth_cache[domain] = max_depth
+        return depth < max_depth
+
+    async def find_subpages(self, parent_url, doc, language, depth):
+        """Promising sub-page URLs to enqueue (empty when the domain's max depth is reached); doc: ParsedDocument"""
+        if not await self.subpages_allowed(parent_url, depth):
+            return []
+        promising = await asyncio.to_thread(find_promising_links, doc, parent_url, language)
+        return [url for url, category in promising]
+
+    async def record_completion(self, source_queue_id, queue_id, url, result, status,
+                                retry_count=None, next_scrape_at=None, uni_listing_id=None, depth=0, language=None,
+                                opco=None, previous=None):
+        """
+        Hand a finished item (result + queue status + subpages) to the write-behind buffer.
+        The item stays in flight (lease renewed) until its batch is flushed.
+        previous: (result_id, content_fingerprint) of the item's last result - an unchanged page is 'not_modified'.
+        """
+        if result.get('revalidation') == 'hit' and previous:
+            # 304 to the conditional GET: the previous result's page
+            result['content_fingerprint'], result['same_as_result_id'] = previous[1], previous[0]
+            self.logger.info(f"Revalidated (304), not modified since result {previous[0]}: {url}")
+        elif result.get('html') and status == 'completed':
+            result['content_fingerprint'] = await asyncio.to_thread(html_fingerprint, result['html'])
+            if SKIP_UNCHANGED_PAGES and previous and previous[1] == result['content_fingerprint']:
+                # Same page as last time: html_path and language of the previous result, nothing to parse
+                self.logger.info(f"Page not modified since result {previous[0]}: {url}")
+                result['same_as_result_id'] = previous[0]
+
+        parsed = None
+        if self._parse_pool and result.get('html') and status == 'completed' and not result.get('same_as_result_id'):
+            parsed = await self.parse_on_fetch(url, result['html'], language, uni_listing_id, depth)
+
+        if result.get('same_as_result_id'):
+            lang, lang_conf, subpages = None, None, []
+        elif parsed:
+            lang, lang_conf = parsed['language'], parsed['language_confidence']
+            subpages = [url for url, category in parsed['promising']]
+        else:
+            lang, lang_conf, subpages = await self.language_and_subpages(
+                url, result, status, language, uni_listing_id, depth
+            )
+
+        await self._writer.submit({
+            'source_queue_id': source_queue_id,
+            'queue_id': queue_id,
+            'url': url,
+            'result': result,
+            'language': lang,
+            'language_confidence': lang_conf,
+            'status': status,
+            'retry_count': retry_count,
+            'next_scrape_at': next_scrape_at,
+            'uni_listing_id': uni_listing_id,
+            'opco': opco,
+            'depth': depth,
+            'subpages': subpages,
+            'parsed': parsed,
+        })
+
+    async def parse_on_fetch(self, url, html, language, uni_listing_id, depth):
+        """
+        Parse a fresh page in the parse-on-fetch pool (language, sub-pages and parsed data from one parse).
+        None on failure - the result then stays 'new' for the parser worker.
+        """
+        find_links = bool(uni_listing_id) and await self.subpages_allowed(url, depth)
+        loop = asyncio.get_running_loop()
         try:
-            with get_cursor(conn, dict_cursor=False) as cur:
-                lang, lang_conf = None, 0.0
-                if scrape_result.get('html'):
-                    lang, lang_conf = detect_language(scrape_result['html'])
-
-                cur.execute("""
-                    INSERT INTO scr_scrape_results
-                    (queue_id, url, html, html_path, html_size, status_code, headers, ip_address,
-                     redirected_from, detected_language, language_confidence, error_message)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING result_id
-                """, (
-                    queue_id, url, None, None, 0, scrape_result.get('status_code'),
-                    json.dumps(scrape_result.get('headers')) if scrape_result.get('headers') else None,
-                    scrape_result.get('ip_address'),
-                    scrape_result.get('redirected_from'), lang, lang_conf,
-                    scrape_result.get('error')
-                ))
-                result_id = cur.fetchone()[0]
-
-                if scrape_result.get('html'):
-                    html_path, html_size = save_raw_html(url, scrape_result['html'], result_id=result_id)
-                    cur.execute("""
-                        UPDATE scr_scrape_results
-                        SET html_path = %s, html_size = %s
-                        WHERE result_id = %s
-                    """, (html_path, html_size, result_id))
-
-                conn.commit()
-                self.logger.debug(f"Result saved with ID {result_id}")
-                return result_id
-        finally:
-            conn.close()
-
-    def add_subpages_sync(self, parent_id, parent_url, html, language, uni_listing_id, depth):
-         conn = get_db_connection()
-         try:
-             # get max depth
-             domain = extract_domain(parent_url)
-             max_depth = 2
-             with get_cursor(conn) as cur:
-                 cur.execute("SELECT max_depth FROM scr_domain_multipage_rules WHERE domain = %s AND enabled = TRUE", (domain,))
-                 row = cur.fetchone()
-                 if row: max_depth = row['max_depth']
-
-             if depth >= max_depth: return
-
-             promising = find_promising_links(html, parent_url, language)
-             with get_cursor(conn, dict_cursor=False) as cur:
-                 for url, category in promising:
-                     norm_url = normalize_url(url)
-                     cur.execute("""
-                        INSERT INTO scr_scrape_queue
-                        (url, normalized_url, uni_listing_id, parent_scrape_id, depth, priority)
-                        VALUES (%s, %s, %s, %s, %s, 5)
-                        ON CONFLICT (url) DO UPDATE
-                        SET normalized_url = COALESCE(scr_scrape_queue.normalized_url, EXCLUDED.normalized_url)
-                     """, (url, norm_url, uni_listing_id, parent_id, depth + 1))
-                 conn.commit()
-
-             if promising:
-                 self.logger.info(f"  -> Added {len(promising)} sub-pages to queue")
-         finally:
-             conn.close()
-
-    def reconcile_batch_sync(self, batch_ids):
-        """Ensure no items are left in processing state after batch"""
-        if not batch_ids:
-            return
-            
-        self.logger.debug(f"Reconciling batch of {len(batch_ids)} items...")
-        conn = get_db_connection()
+            parsed = await loop.run_in_executor(self._parse_pool, parse_fetched, html, url, language, find_links)
+        except Exception as e:
+            self.logger.warning(f"Parse on fetch failed for {url}: {e}")
+            return None
+        if 'error' in parsed:
+            self.logger.warning(f"Parse on fetch failed for {url}: {parsed['error']}")
+            return None
+        return parsed
+
+    async def language_and_subpages(self, url, result, status, language, uni_listing_id, depth):
+        """Language and promising sub-pages of a stored page (without parse on fetch)"""
+        lang, lang_conf = language or (None, 0.0)
+        html = result.get('html')
+        # The page is parsed only for link discovery (shared with language detection); a declared language
+        # is read from the raw HTML / Content-Language header without a tree
+        doc = None
+        if html and uni_listing_id and status == 'completed':
+            doc = await asyncio.to_thread(ParsedDocument, html)
+        if html and language is None:
+            content_language = (result.get('headers') or {}).get('content-language')
+            lang, lang_conf = await asyncio.to_thread(detect_language, doc or html, url, content_language)
+
+        subpages = []
+        if doc is not None:
+            self.logger.debug(f"Checking for subpages on {url}")
+            subpages = await self.find_subpages(url, doc, lang, depth)
+        return lang, lang_conf, subpages
+
+    async def write_completions(self, batch):
+        """
+        Flush of the write-behind buffer - one transaction, set-based statements for the whole batch:
+        multi-row INSERT of results, raw HTML files, UPDATE ... FROM (VALUES) of html_path and queue status, subpages.
+        """
+        async with async_connection() as conn:
+            async with conn.transaction():
+                async with async_cursor(conn, dict_cursor=False) as cur:
+                    # 1. Results
+                    rows = []
+                    for c in batch:
+                        r = c['result']
+                        if r.get('same_as_result_id'):
+                            processing_status = 'not_modified'
+                        else:
+                            processing_status = 'processed' if c.get('parsed') else 'new'
+                        rows.append((
+                            c['queue_id'], c['url'], 0, r.get('status_code'),
+                            json.dumps(r.get('headers')) if r.get('headers') else None,
+                            r.get('ip_address'), r.get('redirected_from'),
+                            c['language'], c['language_confidence'], r.get('error'),
+                            r.get('fetch_tier'), r.get('escalation_reason'),
+                            json.dumps(r['fetch_stats']) if r.get('fetch_stats') else None,
+                            r.get('time_to_content_ms'), r.get('ready_signal'), r.get('revalidation'), processing_status,
+                            r.get('content_fingerprint'), r.get('same_as_result_id')
+                        ))
+                    await cur.execute(f"""
+                        INSERT INTO scr_scrape_results
+                        (queue_id, url, html_size, status_code, headers, ip_address,
+                         redirected_from, detected_language, language_confidence, error_message,
+                         fetch_tier, escalation_reason, fetch_stats, time_to_content_ms, ready_signal, revalidation,
+                         processing_status, content_fingerprint, same_as_result_id)
+                        VALUES {values_sql('(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)', rows)}
+                        RETURNING result_id, queue_id, url
+                    """, flatten_rows(rows))
+                    result_ids = {}
+                    for result_id, queue_id, url in await cur.fetchall():
+                        result_ids.setdefault((queue_id, url), []).append(result_id)
+                    for c in batch:
+                        c['result_id'] = result_ids[(c['queue_id'], c['url'])].pop(0)
+
+                    # 2. Raw HTML on disk, paths back in one UPDATE
+                    pages = [
+                        (c['url'], c['result']['html'], c['result_id'])
+                        for c in batch if c['result'].get('html') and not c['result'].get('same_as_result_id')
+                    ]
+                    if pages:
+                        paths = await asyncio.to_thread(
+                            lambda: [(result_id, *save_raw_html(url, html, result_id=result_id)) for url, html, result_id in pages]
+                        )
+                        await cur.execute(f"""
+                            UPDATE scr_scrape_results r
+                            SET html_path = v.html_path, html_size = v.html_size
+                            FROM (VALUES {values_sql('(%s::int, %s::text, %s::int)', paths)}) AS v(result_id, html_path, html_size)
+                            WHERE r.result_id = v.result_id
+                        """, flatten_rows(paths))
+
+                    # Not modified pages share the file (and language) of the previous result; a 304 response
+                    # keeps the previous headers under its own (validators of the next revalidation)
+                    unchanged = [c['result_id'] for c in batch if c['result'].get('same_as_result_id')]
+                    if unchanged:
+                        await cur.execute("""
+                            UPDATE scr_scrape_results r
+                            SET html_path = p.html_path, html_size = p.html_size,
+                                detected_language = p.detected_language, language_confidence = p.language_confidence,
+                                headers = CASE WHEN r.revalidation = 'hit'
+                                               THEN COALESCE(p.headers, '{}'::jsonb) || COALESCE(r.headers, '{}'::jsonb)
+                                               ELSE r.headers END
+                            FROM scr_scrape_results p
+                            WHERE r.result_id = ANY(%s)
+                              AND p.result_id = r.same_as_result_id
+                        """, (unchanged,))
+
+                    # Parsed data of pages parsed on fetch (the parser worker skips them - already 'processed')
+                    parsed = unique_versions([
+                        (c['result_id'], c['uni_listing_id'], c['language'], json.dumps(c['parsed']['data']),
+                         c['parsed']['quality_score'], c.get('opco'), *hash_columns(c['parsed']['data']))
+                        for c in batch if c.get('parsed')
+                    ])
+                    if parsed:
+                        # Unchanged re-scrapes (same fingerprint as the listing's latest version) are skipped
+                        await cur.execute(f"""
+                            INSERT INTO scr_parsed_data
+                            (result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+                            SELECT v.* FROM (VALUES {values_sql(PARSED_DATA_ROW, parsed)})
+                                AS v(result_id, uni_listing_id, content_language, data, quality_score, opco, field_hashes, fingerprint)
+                            WHERE {CHANGED_VERSION_FILTER}
+                        """, flatten_rows(parsed))
+
+                    # 3. Queue status - the item itself only while we hold its lease (a lost lease may be
+                    # reclaimed by another scraper), a redirect target only when nobody leases it
+                    statuses = [
+                        (c['queue_id'], c['status'], c['retry_count'], c['next_scrape_at'], c['queue_id'] == c['source_queue_id'])
+                        for c in batch
+                    ]
+                    await cur.execute(f"""
+                        UPDATE scr_scrape_queue q
+                        SET status = v.status,
+                            retry_count = COALESCE(v.retry_count, q.retry_count),
+                            next_scrape_at = COALESCE(v.next_scrape_at, q.next_scrape_at),
+                            last_scrape_at = CASE WHEN v.status IN ('completed', 'failed') THEN NOW() ELSE q.last_scrape_at END,
+                            lease_owner = NULL, lease_expires_at = NULL
+                        FROM (VALUES {values_sql('(%s::int, %s::text, %s::int, %s::timestamp, %s::boolean)', statuses)})
+                            AS v(queue_id, status, retry_count, next_scrape_at, leased)
+                        WHERE q.queue_id = v.queue_id
+                          AND (q.lease_owner = %s OR (NOT v.leased AND q.lease_owner IS NULL))
+                    """, flatten_rows(statuses) + [self.lease_owner])
+                    if cur.rowcount < len(statuses):
+                        self.logger.warning(f"{len(statuses) - cur.rowcount} queue status updates skipped (lease lost)")
+
+                    # 4. Subpages (one row per URL - ON CONFLICT DO UPDATE cannot touch a row twice)
+                    subpages = {}
+                    for c in batch:
+                        for url in c['subpages']:
+                            subpages.setdefault(url, (url, normalize_url(url), c['uni_listing_id'], c['result_id'], c['depth'] + 1))
+                    if subpages:
+                        await cur.execute(f"""
+                            INSERT INTO scr_scrape_queue
+                            (url, normalized_url, uni_listing_id, parent_scrape_id, depth, priority)
+                            VALUES {values_sql('(%s, %s, %s, %s, %s, 5)', subpages)}
+                            ON CONFLICT (url) DO UPDATE
+                            SET normalized_url = COALESCE(scr_scrape_queue.normalized_url, EXCLUDED.normalized_url)
+                        """, flatten_rows(subpages.values()))
+
+        self.logger.debug(f"Flushed {len(batch)} results, {len(subpages)} sub-pages")
+
+    def on_completions_flushed(self, batch):
+        for c in batch:
+            self.finish_item(c['source_queue_id'])
+
+    async def store_page(self, request_url, user_data, final_url, result):
+        """Persist a fetched page (any tier): redirect bookkeeping, result, queue status, subpages"""
+        queue_id = user_data['queue_id']
+        uni_listing_id = user_data.get('uni_listing_id')
+        depth = user_data.get('depth', 0)
+        content = result['html']
+
+        # Check for redirect (client-side or server-side) or HTTPS upgrade
+        original_url = user_data.get('original_url', request_url)
+        is_https_upgrade = user_data.get('is_https_upgrade_attempt', False)
+
+        target_url = request_url
+        target_queue_id = queue_id
+
+        if is_https_upgrade or (final_url and final_url != original_url):
+             effective_final_url = final_url if final_url else request_url
+             self.logger.info(f"Redirect / HTTPS upgrade: {original_url} -> {effective_final_url}")
+             result['redirected_from'] = original_url
+             target_url = effective_final_url
+             opco = user_data.get('opco')
+             priority = user_data.get('priority', 0)
+             target_queue_id = await self.handle_redirect(
+                 queue_id, original_url, effective_final_url, uni_listing_id, opco, depth, priority
+             )
+
+        if not result['status_code']:
+            result['status_code'] = 200
+
+        if result['status_code'] != 200 and result.get('revalidation') != 'hit' and not result.get('error'):
+            reason = http.client.responses.get(result['status_code'], 'HTTP Error')
+            result['error'] = f"status code: {result['status_code']} ({reason})"
+
+        self.release_host(queue_id, result['status_code'])
+
+        self.logger.debug(f"Got content for {target_url} ({result.get('fetch_tier')} tier), saving result...")
+
+        if result['status_code'] in HARD_FAILURE_STATUS_CODES:
+            # Same queue state as the browser tier, where crawlee raises "status code: 404" into failed_request_handler
+            status, retry_count, next_scrape = self.failure_status(result['error'], user_data.get('retry_count', 0))
+        else:
+            status, retry_count, next_scrape = 'completed', None, datetime.now() + timedelta(days=REQUEUE_INTERVAL_DAYS)
+
+        # Previous result is that of the claimed item - not of a redirect target
+        previous = None
+        if target_queue_id == queue_id and user_data.get('previous_fingerprint'):
+            previous = (user_data['previous_result_id'], user_data['previous_fingerprint'])
+
+        # Result, status and subpages for target_queue_id go through the write-behind buffer
+        await self.record_completion(
+            queue_id, target_queue_id, target_url, result, status, retry_count,
+            next_scrape_at=next_scrape, uni_listing_id=uni_listing_id, depth=depth, opco=user_data.get('opco'),
+            previous=previous
+        )
+        self.release_browser_slot(queue_id)
+        self.logger.info(f"Finished processing {target_url}")
+
+    async def try_http_tier(self, item):
+        """
+        Fetch the item with a plain GET first.
+        Returns None when the page was stored, otherwise a Request for the Playwright tier.
+        """
+        request = self.create_request_for_item(item)
+        urls = [request.url]
+        if request.user_data.get('is_https_upgrade_attempt'):
+            urls.append(item['url'])
+
+        reason = 'http_error'
+        # Conditional GET of a requeued page with the validators of its last response (not of an upgraded URL)
+        validators = None
+        if HTTP_REVALIDATION and item.get('previous_fingerprint'):
+            validators = conditional_headers(item.get('previous_etag'), item.get('previous_last_modified'))
+
+        for url in urls:
+            try:
+                self.mark_fetch_started(item['queue_id'])
+                fetched = await self._http_fetcher.fetch(url, validators if url == item['url'] else None)
+            except Exception as e:
+                self.logger.debug(f"HTTP tier failed for {url}: {e}")
+                continue
+            finally:
+                self.mark_fetch_finished(item['queue_id'])
+
+            upgrade_https = url == request.url
+            if fetched['escalate']:
+                reason = fetched['escalate']
+                self.logger.debug(f"Escalating {url} to browser ({reason})")
+                return self.create_request_for_item(item, upgrade_https=upgrade_https, escalation_reason=reason)
+
+            result = {
+                'html': fetched['html'],
+                'status_code': fetched['status_code'],
+                'headers': fetched['headers'],
+                'ip_address': fetched['ip_address'],
+                'redirected_from': None,
+                'error': None,
+                'fetch_tier': 'http',
+                'escalation_reason': None,
+                'time_to_content_ms': int(self._fetch_elapsed.get(item['queue_id'], 0) * 1000),
+                'revalidation': fetched.get('revalidation')
+            }
+            user_data = dict(self.create_request_for_item(item, upgrade_https=upgrade_https).user_data)
+            self.logger.info(f"Processing {url} (http tier)")
+            try:
+                await self.store_page(url, user_data, fetched['final_url'], result)
+            except Exception as e:
+                self.logger.error(f"Error storing {url} from http tier: {e}")
+            return None
+
+        return self.create_request_for_item(item, escalation_reason=reason)
+
+    async def pre_navigation(self, context):
+        """
+        Navigation to the host starts - response time is measured from here to the handler.
+        Installs the resource-blocking route profile on the page.
+        """
+        queue_id = context.request.user_data['queue_id']
         try:
-            with get_cursor(conn, dict_cursor=False) as cur:
-                # Placeholders for IN clause
-                placeholders = ','.join(['%s'] * len(batch_ids))
-                query = f"""
-                    UPDATE scr_scrape_queue
-                    SET status = 'failed'
-                    WHERE queue_id IN ({placeholders})
-                      AND status = 'processing'
-                """
-                cur.execute(query, tuple(batch_ids))
-                count = cur.rowcount
-                conn.commit()
-                if count > 0:
-                    self.logger.warning(f"Reconciled {count} stuck items in batch (set to failed)")
+            self._page_stats[queue_id] = await self._blocker.install(context.page, context.request.url)
         except Exception as e:
-            self.logger.error(f"Error reconciling batch: {e}")
-        finally:
-            conn.close()
+            self.logger.debug(f"Route profile not installed for {context.request.url}: {e}")
+        self.mark_fetch_started(queue_id)
 
     async def request_handler(self, context):
         request = context.request
         page = context.page
-
-        # User data passed via request.user_data
         queue_id = request.user_data['queue_id']
-        retry_count = request.user_data['retry_count']
-        uni_listing_id = request.user_data.get('uni_listing_id')
-        depth = request.user_data.get('depth', 0)
+        navigation_started = self._fetch_started.get(queue_id)
+        self.mark_fetch_finished(queue_id)
 
         self.logger.info(f"Processing {request.url}")
 
@@ -313,85 +685,57 @@ class Scraper:
             'headers': {},
             'ip_address': None,
             'redirected_from': None,
-            'error': None
+            'error': None,
+            'fetch_tier': 'browser',
+            'escalation_reason': request.user_data.get('escalation_reason'),
+            'fetch_stats': None,
+            'time_to_content_ms': None,
+            'ready_signal': None
         }
 
         try:
-            # Enforce a hard timeout on the page content retrieval
-            # This protects against Playwright hanging internally
             self.logger.debug(f"Waiting for content from {request.url}")
-            
-            # Retry logic for "Execution context was destroyed" (client-side redirects)
-            for attempt in range(3):
-                try:
-                    content = await page.content()
-                    break # Success
-                except Exception as e:
-                    if "Execution context was destroyed" in str(e) and attempt < 2:
-                        self.logger.warning(f"Execution context destroyed for {request.url}, retrying ({attempt+1}/3)...")
-                        await asyncio.sleep(1) # Wait for navigation/redirect to settle
-                        continue
-                    raise e # Re-raise if not handled or max retries reached
-            
+            content, result['ready_signal'], redirect_response = await read_ready_content(page)
+            if navigation_started is not None:
+                result['time_to_content_ms'] = int((time.monotonic() - navigation_started) * 1000)
+
             result['html'] = content
-            
-            # Check for redirect (client-side or server-side) or HTTPS upgrade
-            final_url = page.url
-            original_url = request.user_data.get('original_url', request.url)
-            is_https_upgrade = request.user_data.get('is_https_upgrade_attempt', False)
-
-            target_url = request.url
-            target_queue_id = queue_id
-
-            if is_https_upgrade or (final_url and final_url != original_url):
-                 effective_final_url = final_url if final_url else request.url
-                 self.logger.info(f"Redirect / HTTPS upgrade: {original_url} -> {effective_final_url}")
-                 result['redirected_from'] = original_url
-                 target_url = effective_final_url
-                 opco = request.user_data.get('opco')
-                 priority = request.user_data.get('priority', 0)
-                 loop = asyncio.get_running_loop()
-                 target_queue_id = await loop.run_in_executor(
-                     None, self.handle_redirect_sync, queue_id, original_url, effective_final_url, uni_listing_id, opco, depth, priority
-                 )
-            
-            # Extract more info from the page/response
-            if hasattr(context, 'response') and context.response:
-                result['status_code'] = context.response.status
-                result['headers'] = context.response.headers
-                server_addr = await context.response.server_addr()
+            result['fetch_stats'] = self._page_stats.pop(queue_id, None)
+
+            # Extract more info from the page/response (of the followed client-side redirect, if any)
+            response = redirect_response or getattr(context, 'response', None)
+            if response:
+                result['status_code'] = response.status
+                result['headers'] = response.headers
+                server_addr = await response.server_addr()
                 if server_addr:
                     result['ip_address'] = server_addr.get('ipAddress')
 
-            if not result['status_code']:
-                result['status_code'] = 200
-
-            if result['status_code'] != 200 and not result.get('error'):
-                reason = http.client.responses.get(result['status_code'], 'HTTP Error')
-                result['error'] = f"status code: {result['status_code']} ({reason})"
-
-            self.logger.debug(f"Got content for {target_url}, saving result...")
-
-            # Save result with final target_url and target_queue_id
-            loop = asyncio.get_running_loop()
-            result_id = await loop.run_in_executor(None, self.save_result_sync, target_queue_id, target_url, result)
-
-            # Update status for target_queue_id
-            next_scrape = datetime.now() + timedelta(days=REQUEUE_INTERVAL_DAYS)
-            await loop.run_in_executor(None, self.update_queue_status_sync, target_queue_id, 'completed', None, next_scrape)
-
-            # Subpages
-            if uni_listing_id:
-                self.logger.debug(f"Checking for subpages on {target_url}")
-                lang, _ = detect_language(content)
-                await loop.run_in_executor(None, self.add_subpages_sync, result_id, target_url, content, lang, uni_listing_id, depth)
-            
-            self.logger.info(f"Finished processing {target_url}")
+            await self.store_page(request.url, request.user_data, page.url, result)
 
         except Exception as e:
             self.logger.warning(f"Error scraping {request.url}: {e}")
             raise e
 
+    def is_hang_error(self, error):
+        """Timeout of navigation or of the request handler (hung page)"""
+        return isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in str(error)
+
+    async def error_handler(self, context, error):
+        """Called by Crawlee before a request is retried - recycle the browser of a hung page"""
+        if self._recycler and self.is_hang_error(error):
+            self._recycler.retire_for_page(getattr(context, 'page', None))
+
+    def failure_status(self, err_str, retry_count):
+        """Queue outcome of a failed page (any tier): (status, retry_count, next_scrape_at)"""
+        is_hard_failure = ("ERR_NAME_NOT_RESOLVED" in err_str or 
+                           "could not translate host name" in err_str or 
+                           "status code: 404" in err_str or 
+                           "status code: 410" in err_str)
+        if not is_hard_failure and retry_count < MAX_RETRIES:
+            return 'pending', retry_count + 1, datetime.now() + timedelta(hours=1)
+        return 'failed', None, None
+
     async def failed_request_handler(self, context, error):
         """Handle failed requests"""
         request = context.request
@@ -399,6 +743,10 @@ class Scraper:
         queue_id = request.user_data['queue_id']
         retry_count = request.user_data['retry_count']
         err_str = str(error)
+
+        self.mark_fetch_finished(queue_id)
+        if self._recycler and self.is_hang_error(error):
+            self._recycler.retire_for_page(getattr(context, 'page', None))
         
         # Simple one-line warning
         self.logger.warning(f"Page unavailable: {request.url} ({err_str})")
@@ -411,6 +759,7 @@ class Scraper:
             self.logger.info(f"HTTPS upgrade attempt failed for {request.url} ({err_str}), falling back to HTTP: {original_url}")
             fallback_request = Request.from_url(
                 original_url,
+                always_enqueue=True,
                 user_data={
                     "queue_id": queue_id,
                     "retry_count": retry_count,
@@ -419,7 +768,10 @@ class Scraper:
                     "depth": request.user_data.get('depth', 0),
                     "priority": request.user_data.get('priority', 0),
                     "original_url": original_url,
-                    "is_https_upgrade_attempt": False
+                    "is_https_upgrade_attempt": False,
+                    "escalation_reason": request.user_data.get('escalation_reason'),
+                    "previous_result_id": request.user_data.get('previous_result_id'),
+                    "previous_fingerprint": request.user_data.get('previous_fingerprint')
                 }
             )
             if self._current_crawler:
@@ -432,34 +784,26 @@ class Scraper:
             'headers': {},
             'ip_address': None,
             'redirected_from': None,
-            'error': err_str
+            'error': err_str,
+            'fetch_tier': 'browser',
+            'escalation_reason': request.user_data.get('escalation_reason'),
+            'fetch_stats': self._page_stats.pop(queue_id, None)
         }
 
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self.save_result_sync, queue_id, request.url, result)
-
-        is_hard_failure = ("ERR_NAME_NOT_RESOLVED" in err_str or 
-                           "could not translate host name" in err_str or 
-                           "status code: 404" in err_str or 
-                           "status code: 410" in err_str)
+        if "ERR_NAME_NOT_RESOLVED" in err_str or "could not translate host name" in err_str:
+            host = urlparse(request.url).hostname
+            if host:
+                await self.add_domain_to_blacklist(host, "no_dns")
+        status, next_retry_count, next_try = self.failure_status(err_str, retry_count)
 
-        if is_hard_failure:
-            if "ERR_NAME_NOT_RESOLVED" in err_str or "could not translate host name" in err_str:
-                from urllib.parse import urlparse
-                domain = urlparse(request.url).netloc
-                if domain:
-                    await loop.run_in_executor(None, self.add_domain_to_blacklist_sync, domain, "no_dns")
-            await loop.run_in_executor(None, self.update_queue_status_sync, queue_id, 'failed')
-        elif retry_count >= MAX_RETRIES:
-             await loop.run_in_executor(None, self.update_queue_status_sync, queue_id, 'failed')
-        else:
-             next_try = datetime.now() + timedelta(hours=1)
-             await loop.run_in_executor(None, self.update_queue_status_sync, queue_id, 'pending', retry_count + 1, next_try)
+        self.release_host(queue_id)
+        await self.record_completion(queue_id, queue_id, request.url, result, status, next_retry_count, next_try)
+        self.release_browser_slot(queue_id)
 
     def process_one(self):
         """Zpracuje jedno URL (pro testování a debugging)"""
         self.logger.debug("Starting process_one")
-        batch = self.fetch_batch(1)
+        batch = self.claim_batch(1)
         if not batch:
             self.logger.debug("No items found in batch")
             return False
@@ -467,9 +811,6 @@ class Scraper:
         item = batch[0]
         self.logger.info(f"Processing one: {item['url']}")
 
-        # Mark as processing
-        self.update_queue_status_sync(item['queue_id'], 'processing')
-
         request_list = [self.create_request_for_item(item)]
 
         async def run_crawler():
@@ -480,12 +821,20 @@ class Scraper:
                 headless=PLAYWRIGHT_HEADLESS,
                 request_handler_timeout=timedelta(seconds=SCRAPE_TIMEOUT),
                 navigation_timeout=timedelta(seconds=SCRAPE_TIMEOUT),
+                goto_options=GOTO_OPTIONS,
                 browser_launch_options={"args": ["--no-sandbox"]},
             )
-            crawler.failed_request_handler = self.failed_request_handler
+            crawler.pre_navigation_hook(self.pre_navigation)
+            crawler.failed_request_handler(self.failed_request_handler)
             self._current_crawler = crawler
             self.logger.debug("Running crawler")
-            await crawler.run(request_list)
+            self._writer.start()
+            try:
+                await crawler.run(request_list)
+            finally:
+                await self._writer.close()
+                # the pool is bound to this (short-lived) event loop
+                await close_async_pool()
             self.logger.debug("Crawler finished")
 
         try:
@@ -506,74 +855,291 @@ class Scraper:
              self.logger.error(f"Error in process_one: {e}")
              return False
 
-    async def run(self):
-        self.logger.info("Starting Crawlee Scraper...")
-        start_time = time.time()
+    def create_crawler(self):
+        """Long-lived PlaywrightCrawler nad sdíleným browser poolem (běží po celou dobu procesu)"""
+        browser_pool = create_browser_pool()
+        self._recycler = BrowserRecycler(browser_pool)
+
+        crawler = PlaywrightCrawler(
+            browser_pool=browser_pool,
+            request_handler=self.request_handler,
+            storage_client=MemoryStorageClient(),
+            max_request_retries=1,
+            keep_alive=True,
+            concurrency_settings=ConcurrencySettings(max_concurrency=SCRAPER_MAX_CONCURRENCY),
+            request_handler_timeout=timedelta(seconds=SCRAPE_TIMEOUT),
+            navigation_timeout=timedelta(seconds=SCRAPE_TIMEOUT),
+            goto_options=GOTO_OPTIONS,
+        )
+        crawler.pre_navigation_hook(self.pre_navigation)
+        crawler.error_handler(self.error_handler)
+        crawler.failed_request_handler(self.failed_request_handler)
+        self._current_crawler = crawler
+        return crawler
+
+    async def watch_browser_memory(self):
+        """Periodically recycle browsers whose process tree grew over BROWSER_MAX_RSS_MB"""
+        while True:
+            await asyncio.sleep(BROWSER_RSS_CHECK_SECONDS)
+            if self._recycler:
+                self._recycler.check_memory()
+
+    async def report_pool_stats(self):
+        """Periodically log DB pool metrics (connections, checkouts, time spent waiting for a free connection)"""
+        while True:
+            await asyncio.sleep(DB_POOL_STATS_SECONDS)
+            stats = async_pool_stats()
+            if stats:
+                dns = self._dns_cache.stats() if self._dns_cache else None
+                self.logger.info(f"DB pool: {stats}, write buffer: {self._writer.stats()}, DNS cache: {dns}")
+
+    def release_browser_slot(self, queue_id):
+        """Page is done in the browser - free its slot (persisting may still be pending in the write buffer)"""
+        if queue_id in self._browser_queue_ids:
+            self._browser_queue_ids.discard(queue_id)
+            self._browser_slots.release()
+
+    async def acquire_host(self, queue_id, domain):
+        """Wait for the politeness slot of the item's host"""
+        await self._scheduler.acquire(domain)
+        self._host_slots[queue_id] = domain
+
+    def mark_fetch_started(self, queue_id):
+        """HTTP request / browser navigation to the host starts (response time excludes local queueing)"""
+        self._fetch_started[queue_id] = time.monotonic()
+
+    def mark_fetch_finished(self, queue_id):
+        started = self._fetch_started.pop(queue_id, None)
+        if started is not None:
+            self._fetch_elapsed[queue_id] = time.monotonic() - started
+
+    def release_host(self, queue_id, status_code=None):
+        """Host request finished - the outcome (429/503, slow response of the last fetch) adapts the host's delay"""
+        self._fetch_started.pop(queue_id, None)
+        elapsed = self._fetch_elapsed.pop(queue_id, None)
+        domain = self._host_slots.pop(queue_id, None)
+        if domain:
+            self._scheduler.release(domain, status_code, elapsed)
+
+    def busy_domains(self):
+        """Hosts not to claim now: enough of their items held locally, or slowed down after 429/503"""
+        held = Counter(domain for domain in self._item_domains.values() if domain)
+        busy = {domain for domain, count in held.items() if count >= SCRAPER_MAX_PER_HOST}
+        return busy | self._scheduler.backed_off_domains()
 
+    def finish_item(self, queue_id):
+        """Item was handled (stored or failed) - drop it from in-flight and free its browser and host slot"""
+        self._in_flight.pop(queue_id, None)
+        self._item_domains.pop(queue_id, None)
+        self._page_stats.pop(queue_id, None)
+        self.release_host(queue_id)
+        self.release_browser_slot(queue_id)
+
+    async def prefetch(self, start_time):
+        """
+        Producer: keep the bounded buffer filled with queue items marked as processing.
+        Returns False when the queue is empty, True when max runtime was reached.
+        """
+        loop = asyncio.get_running_loop()
         while True:
-            # Check elapsed time
             elapsed = time.time() - start_time
             if elapsed >= SCRAPER_MAX_RUNTIME_SECONDS:
                 self.logger.info(f"Max runtime reached ({elapsed:.0f}s >= {SCRAPER_MAX_RUNTIME_SECONDS}s). Exiting cleanly.")
-                break
+                return True
 
-            # 1. Reset global state at the start of each iteration to prevent accumulation and ServiceConflictError
-            self.reset_crawlee_global_state()
+            free = self._buffer.maxsize - self._buffer.qsize()
+            if free < SCRAPER_PREFETCH_BUFFER // 4:
+                await asyncio.sleep(0.2)
+                continue
 
-            # 2. Fetch batch
-            # Used small batch size (20) to ensure regular browser restarts and avoid memory leaks/hangs
-            batch = self.fetch_batch(20)
+            batch = await loop.run_in_executor(None, self.claim_batch, free, self.busy_domains())
             if not batch:
-                self.logger.info("Queue empty, exiting.")
-                sys.exit(10)
+                # In-flight pages may still add subpages / redirect targets
+                if self._buffer.empty() and not self._in_flight:
+                    self.logger.info("Queue empty, exiting.")
+                    return False
+                await asyncio.sleep(1)
+                continue
 
-            self.logger.info(f"Fetched {len(batch)} URLs")
+            self.logger.info(f"Claimed {len(batch)} URLs")
+            if self._dns_cache:
+                batch = await self.pre_resolve(batch)
+            for item in batch:
+                # Buffered, no local deadline until dispatched
+                self._in_flight[item['queue_id']] = None
+                self._item_domains[item['queue_id']] = item.get('domain') or url_domain(item['url'])
+                await self._buffer.put(item)
 
-            # Force total isolation for this batch by using a fresh configuration and unique storage directory
-            batch_storage_dir = tempfile.mkdtemp(prefix="crawlee_batch_storage_")
-            batch_config = Configuration()
-            batch_config.storage_dir = batch_storage_dir
+    async def pre_resolve(self, batch):
+        """
+        DNS pre-resolution of claimed items (bulk, cached). Items whose host does not exist are failed
+        and their domain blacklisted without taking a fetch slot. Returns the items to fetch.
+        """
+        hosts = {}
+        for item in batch:
+            try:
+                hosts[item['queue_id']] = urlparse(item['url']).hostname
+            except ValueError:
+                hosts[item['queue_id']] = None
+        answers = await self._dns_cache.resolve_many(hosts.values())
 
-            request_list = []
-            for item in batch:
-                # Mark as processing immediately
-                self.update_queue_status_sync(item['queue_id'], 'processing')
-                request_list.append(self.create_request_for_item(item))
+        alive = []
+        dead_hosts = set()
+        for item in batch:
+            resolved, _, error = answers.get(hosts[item['queue_id']], (None, None, None))
+            if resolved is not False:
+                alive.append(item)
+                continue
 
-            # Configure Crawler with isolation
-            crawler = PlaywrightCrawler(
-                configuration=batch_config,
-                request_handler=self.request_handler,
-                storage_client=MemoryStorageClient(),
-                max_requests_per_crawl=25,
-                max_request_retries=1,
-                headless=PLAYWRIGHT_HEADLESS,
-                request_handler_timeout=timedelta(seconds=SCRAPE_TIMEOUT),
-                navigation_timeout=timedelta(seconds=SCRAPE_TIMEOUT),
-                browser_launch_options={"args": ["--no-sandbox"]},
+            queue_id = item['queue_id']
+            # The host that failed, not its www-less queue domain: a dead www.x.be must not blacklist x.be
+            host = hosts[queue_id]
+            if host and host not in dead_hosts:
+                dead_hosts.add(host)
+                await self.add_domain_to_blacklist(host, "no_dns")
+            result = {
+                'html': None,
+                'status_code': 0,
+                'headers': {},
+                'ip_address': None,
+                'redirected_from': None,
+                'error': f"net::ERR_NAME_NOT_RESOLVED (DNS pre-resolution: {error})",
+                'fetch_tier': 'dns',
+                'escalation_reason': None
+            }
+            self._in_flight[queue_id] = None
+            await self.record_completion(queue_id, queue_id, item['url'], result, 'failed')
+
+        if dead_hosts:
+            self.logger.info(f"DNS pre-resolution: {len(batch) - len(alive)} items of {len(dead_hosts)} dead hosts failed without fetch")
+        return alive
+
+    async def consume(self, crawler):
+        """Consumer: take items from the buffer as slots free up (HTTP tier first, then a browser slot)"""
+        while True:
+            item = await self._buffer.get()
+            if item is None:
+                return
+
+            queue_id = item['queue_id']
+            domain = self._item_domains.get(queue_id) or url_domain(item['url'])
+            try:
+                await self.acquire_host(queue_id, domain)
+                self._in_flight[queue_id] = time.time() + SCRAPE_LEASE_SECONDS
+                if self._http_fetcher:
+                    request = await self.try_http_tier(item)
+                else:
+                    request = self.create_request_for_item(item)
+
+                if request is not None and request.user_data.get('escalation_reason') in ('status_429', 'status_503'):
+                    # Host asked us to slow down - back off and wait for its slot again before the browser retry
+                    self.release_host(queue_id, int(request.user_data['escalation_reason'][len('status_'):]))
+                    await self.acquire_host(queue_id, domain)
+                    self._in_flight[queue_id] = time.time() + SCRAPE_LEASE_SECONDS
+
+                if request is not None:
+                    await self._browser_slots.acquire()
+                    self._browser_queue_ids.add(queue_id)
+                    self._in_flight[queue_id] = time.time() + SCRAPE_LEASE_SECONDS
+                    await crawler.add_requests([request])
+            except Exception as e:
+                self.logger.error(f"Error dispatching {item['url']}: {e}")
+
+    async def maintain_leases(self):
+        """
+        Renew DB leases of buffered/in-flight items. Items that overran their local deadline (hung)
+        are dropped - their lease is no longer renewed, expires and the item is reclaimed.
+        """
+        last_renew = time.time()
+        while True:
+            await asyncio.sleep(5)
+            now = time.time()
+            expired = [queue_id for queue_id, deadline in self._in_flight.items() if deadline and deadline < now]
+            for queue_id in expired:
+                self.logger.warning(f"Item {queue_id} overran its lease, leaving it for reclaim")
+                self.finish_item(queue_id)
+
+            if now - last_renew >= SCRAPE_LEASE_SECONDS / 3:
+                await self.renew_leases(list(self._in_flight))
+                last_renew = now
+
+    async def drain(self, consumers):
+        """Stop consumers, return buffered items to the queue and wait for in-flight pages"""
+        returned = []
+        while not self._buffer.empty():
+            item = self._buffer.get_nowait()
+            if item is not None:
+                returned.append(item['queue_id'])
+                self._in_flight.pop(item['queue_id'], None)
+        await self.release_leases(returned)
+
+        for _ in consumers:
+            await self._buffer.put(None)
+        await asyncio.gather(*consumers, return_exceptions=True)
+
+        deadline = time.time() + SCRAPE_LEASE_SECONDS
+        while self._in_flight and time.time() < deadline:
+            await asyncio.sleep(0.2)
+
+    async def run(self):
+        self.logger.info("Starting Crawlee Scraper...")
+        start_time = time.time()
+
+        # Temp dirs left by previous killed runs (never kills browsers of other scrapers)
+        self.cleanup_temp_dirs()
+        self.reset_crawlee_global_state()
+
+        if PARSE_ON_FETCH:
+            # spawn, not fork - the scraper process runs threads (DB pool, browser driver)
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_ON_FETCH_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_parse_worker
             )
-            crawler.failed_request_handler = self.failed_request_handler
-            self._current_crawler = crawler
 
-            # Run crawler on this batch
+        crawler = self.create_crawler()
+        crawler_task = asyncio.create_task(crawler.run([]))
+        watchdog_task = asyncio.create_task(self.watch_browser_memory())
+        lease_task = asyncio.create_task(self.maintain_leases())
+        pool_stats_task = asyncio.create_task(self.report_pool_stats())
+        self._writer.start()
+
+        self._buffer = asyncio.Queue(maxsize=SCRAPER_PREFETCH_BUFFER)
+        self._browser_slots = asyncio.Semaphore(SCRAPER_MAX_CONCURRENCY)
+        consumer_count = SCRAPER_MAX_CONCURRENCY
+        if HTTP_FIRST_ENABLED:
+            self._http_fetcher = HttpFetcher()
+            consumer_count = max(HTTP_FETCH_CONCURRENCY, SCRAPER_MAX_CONCURRENCY)
+        consumers = [asyncio.create_task(self.consume(crawler)) for _ in range(consumer_count)]
+
+        has_more = True
+        try:
+            has_more = await self.prefetch(start_time)
+        finally:
+            await self.drain(consumers)
+            lease_task.cancel()
+            watchdog_task.cancel()
+            pool_stats_task.cancel()
+            if self._in_flight:
+                # Unfinished items keep their lease until it expires and another scraper reclaims them
+                self.logger.warning(f"{len(self._in_flight)} items still in flight at shutdown")
+            if self._http_fetcher:
+                await self._http_fetcher.close()
+            crawler.stop("Scraper finished feeding the queue")
             try:
-                self.logger.info(f"Starting batch execution (isolation dir: {batch_storage_dir})...")
-                await crawler.run(request_list)
+                await crawler_task
             except Exception as e:
-                self.logger.error(f"Batch execution failed with error: {e}")
-            finally:
-                # 3. Aggressive cleanup after EVERY batch
-                self.cleanup_temp_dirs()
-                try:
-                    if os.path.exists(batch_storage_dir):
-                        shutil.rmtree(batch_storage_dir, ignore_errors=True)
-                except Exception:
-                    pass
-
-                # Reconcile batch status (fix stuck items)
-                batch_ids = [item['queue_id'] for item in batch]
-                loop = asyncio.get_running_loop()
-                await loop.run_in_executor(None, self.reconcile_batch_sync, batch_ids)
+                self.logger.error(f"Crawler finished with error: {e}")
+            await self._writer.close()
+            if self._parse_pool:
+                self._parse_pool.shutdown()
+            if self._dns_cache:
+                self._dns_cache.close()
+            self.logger.info(f"Write buffer: {self._writer.stats()}, DB pool: {async_pool_stats()}")
+            await close_async_pool()
+            self.cleanup_temp_dirs(kill_browsers=True)
+
+        if not has_more:
+            sys.exit(10)
 
 if __name__ == '__main__':
     scraper = Scraper()
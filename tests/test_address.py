@@ -0,0 +1,59 @@
+import os
+import pytest
+from profusion import Bloom
+from src.utils.address import AddressExtractor, BLOOM_DIR, unaccent, normalize_token
+from src.utils.mapped_bloom import MappedBloom
+
+def test_unaccent():
+    assert unaccent("Chaussée de Louvain") == "Chaussee de Louvain"
+    # characters without an ASCII decomposition are dropped, like the previous encode('ascii', 'ignore')
+    assert unaccent("België Ærø ß") == "Belgie r "
+    assert unaccent("Kerkstraat") == "Kerkstraat"
+    assert normalize_token("Liège") == "LIEGE"
+
+@pytest.fixture(scope='module')
+def extractor():
+    extractor = AddressExtractor()
+    if not extractor.loaded:
+        pytest.skip("Address bloom filters not available")
+    return extractor
+
+@pytest.mark.parametrize('text,expected', [
+    ("Bakkerij Janssens, Kerkstraat 12, 9000 Gent, België. Tel 09 123 45 67", ['BAKKERIJ JANSSENS KERKSTRAAT 12 9000 GENT']),
+    ("Stationsstraat 45 bus 2, 3000 Leuven", ['STATIONSSTRAAT 45 BUS 2 3000 LEUVEN']),
+    ("Chaussée de Louvain 431, 1380 Lasne, Belgique", ['CHAUSSEE LOUVAIN 431 1380']),
+    ("Avenue Louise 54, 1050 Ixelles", ['AVENUE LOUISE 54 1050 IXELLES']),
+    ("Boulevard Anspach 100 1000 Bruxelles, TVA BE 0403.170.701, +32 2 555 12 12", ['BOULEVARD ANSPACH 100 1000 BRUXELLES']),
+    ("Lorem ipsum dolor sit amet 1234 5678 9012 3456 consectetur", []),
+])
+def test_extract_addresses(extractor, text, expected):
+    assert extractor.extract_addresses(text) == expected
+
+def test_extract_addresses_only_scans_post_code_windows(extractor):
+    filler = ' '.join(['contact openingsuren cookies privacy beleid nieuws'] * 200)
+    text = f"{filler} Kerkstraat 12, 9000 Gent {filler} Avenue Louise 54, 1050 Ixelles {filler}"
+    words = text.split()
+    windows = extractor.candidate_windows(words, 5)
+    assert len(windows) == 2
+    assert all(end - start == 11 for start, end in windows)
+    assert sorted(extractor.extract_addresses(text, window=5)) == sorted(extractor.extract_addresses(text, window=0)) == [
+        'AVENUE LOUISE 54 1050 IXELLES', 'KERKSTRAAT 12 9000 GENT'
+    ]
+
+def test_candidate_windows_merge_overlaps(extractor):
+    words = "Kerkstraat 12 9000 Gent of 1000 Brussel".split()
+    assert extractor.candidate_windows(words, 3) == [[0, 9]]
+
+def test_mapped_bloom_matches_profusion(tmp_path):
+    path = os.path.join(BLOOM_DIR, "be_address_post_codes.bloom.dat")
+    if not os.path.isfile(path):
+        pytest.skip("Address bloom filters not available")
+    private = Bloom(path=path)
+    mapped = MappedBloom(path, str(tmp_path))
+    assert (mapped.bins, mapped.hashes) == (private.bins, private.hashes)
+    for term in ['1000', '9000', '3000', '0000', '99999', 'GENT', 'KERKSTRAAT']:
+        assert (term in mapped) == (term in private)
+
+    # the uncompressed copy is extracted once and reused by the next process
+    assert os.listdir(tmp_path) == [os.path.basename(mapped.bitmap_path)]
+    assert MappedBloom(path, str(tmp_path)).bitmap_path == mapped.bitmap_path
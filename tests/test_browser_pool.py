@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock, patch
+from src.utils.browser_pool import BrowserRecycler
+
+def make_pool(*controllers):
+    pool = MagicMock()
+    pool.active_browsers = list(controllers)
+    return pool
+
+def test_retire_for_page_retires_owner_only():
+    page = object()
+    owner = MagicMock(pages=[page])
+    other = MagicMock(pages=[object()])
+    pool = make_pool(other, owner)
+
+    recycler = BrowserRecycler(pool)
+    assert recycler.retire_for_page(page) is True
+    pool._retire_browser.assert_called_once_with(owner)
+
+def test_retire_for_unknown_page():
+    pool = make_pool(MagicMock(pages=[]))
+    recycler = BrowserRecycler(pool)
+    assert recycler.retire_for_page(None) is False
+    assert recycler.retire_for_page(object()) is False
+    pool._retire_browser.assert_not_called()
+
+@patch('src.utils.browser_pool.browser_tree_rss_mb')
+def test_check_memory_threshold(mock_rss):
+    a, b = MagicMock(), MagicMock()
+    pool = make_pool(a, b)
+    recycler = BrowserRecycler(pool, max_rss_mb=1000)
+
+    mock_rss.return_value = 500
+    assert recycler.check_memory() is False
+    pool._retire_browser.assert_not_called()
+
+    mock_rss.return_value = 1500
+    assert recycler.check_memory() is True
+    assert pool._retire_browser.call_count == 2
+
+def test_kill_child_browsers_only_touches_own_tree(tmp_path):
+    import subprocess
+    import sys
+    from src.utils.browser_pool import kill_child_browsers
+    profile = tmp_path / "apify-playwright-own"
+    profile.mkdir()
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)", f"--user-data-dir={profile}"])
+    try:
+        assert kill_child_browsers(timeout=5) >= 1
+        assert child.wait(timeout=5) is not None
+        assert not profile.exists()
+    finally:
+        if child.poll() is None:
+            child.kill()
+
+@patch('src.utils.browser_pool.tempfile.gettempdir')
+@patch('src.utils.browser_pool.psutil.process_iter')
+def test_remove_stale_profile_dirs_keeps_used_and_fresh(mock_iter, mock_tmp, tmp_path):
+    import os
+    import time
+    from src.utils.browser_pool import remove_stale_profile_dirs
+    mock_tmp.return_value = str(tmp_path)
+    used, stale, fresh = (tmp_path / f"apify-playwright-{name}" for name in ('used', 'stale', 'fresh'))
+    for path in (used, stale, fresh):
+        path.mkdir()
+    old = time.time() - 3600
+    for path in (used, stale):
+        os.utime(path, (old, old))
+    mock_iter.return_value = [MagicMock(cmdline=MagicMock(return_value=['chrome', f'--user-data-dir={used}']))]
+
+    assert remove_stale_profile_dirs(max_age=600) == 1
+    assert used.exists() and fresh.exists() and not stale.exists()
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.utils.content_hash import content_hashes, TRACKED_FIELDS
+from src.workers.change_detector import ChangeDetector
+
+@pytest.fixture
+def detector():
+    with patch('src.workers.change_detector.get_db_connection') as mock_conn:
+        mock_conn.return_value = MagicMock()
+        detector = ChangeDetector()
+    cur = MagicMock()
+    cur.__enter__.return_value = cur
+    detector.conn.cursor.return_value = cur
+    return detector, cur
+
+def event(change_id, parsed_id, data, previous_id, previous_data, listing='L1'):
+    hashes, fingerprint = content_hashes(data)
+    previous_hashes, previous_fingerprint = content_hashes(previous_data) if previous_data else (None, None)
+    return {
+        'change_id': change_id, 'uni_listing_id': listing, 'parsed_id': parsed_id,
+        'fingerprint': fingerprint, 'field_hashes': hashes, 'previous_id': previous_id,
+        'previous_fingerprint': previous_fingerprint, 'previous_field_hashes': previous_hashes,
+    }
+
+def test_content_hashes_are_canonical():
+    hashes, fingerprint = content_hashes({'emails': ['b@x.be', 'a@x.be'], 'url': 'https://x.be'})
+    same_hashes, same_fingerprint = content_hashes({'emails': ['a@x.be', 'b@x.be'], 'url': 'https://x.be/other'})
+    assert set(hashes) == set(TRACKED_FIELDS)
+    assert (hashes, fingerprint) == (same_hashes, same_fingerprint)
+    assert content_hashes({'emails': ['c@x.be']})[1] != fingerprint
+
+def test_process_batch_compares_hashes_and_loads_only_changed_versions(detector):
+    detector, cur = detector
+    v1 = {'emails': ['a@firma.be']}
+    v2 = {'emails': ['a@firma.be'], 'url': 'https://firma.be/'}
+    v3 = {'emails': ['b@firma.be']}
+    cur.fetchall.side_effect = [
+        [
+            event(1, 2, v2, 1, v1),
+            # v2 is deleted as a duplicate in this batch, v3 is compared with v1
+            event(2, 3, v3, 2, v2),
+            event(3, 10, {'emails': []}, None, None, listing='L2'),
+        ],
+        [{'parsed_id': 1, 'data': v1}, {'parsed_id': 3, 'data': v3}],
+    ]
+    detector.notify_change = MagicMock()
+
+    assert detector.process_batch(10) == 3
+
+    claim_sql, claim_params = cur.execute.call_args_list[0][0]
+    assert 'FOR UPDATE SKIP LOCKED' in claim_sql and 'GROUP BY' not in claim_sql
+    assert 'n.data' not in claim_sql and claim_params == (10,)
+    load_sql, load_params = cur.execute.call_args_list[1][0]
+    assert sorted(load_params[0]) == [1, 3]
+    history_sql, history_params = cur.execute.call_args_list[2][0]
+    assert 'INSERT INTO scr_change_history' in history_sql
+    assert history_params == ['L1', 'emails', '["a@firma.be"]', '["b@firma.be"]']
+    delete_sql, delete_params = cur.execute.call_args_list[3][0]
+    assert 'DELETE FROM scr_parsed_data' in delete_sql and delete_params == ([2],)
+    detector.notify_change.assert_called_once_with('L1', [('emails', '["a@firma.be"]', '["b@firma.be"]')])
+    assert detector.conn.autocommit is True
+
+def test_versions_without_hashes_are_compared_by_data(detector):
+    detector, cur = detector
+    legacy = {**event(1, 2, {}, 1, None), 'previous_fingerprint': None, 'previous_field_hashes': None}
+    cur.fetchall.side_effect = [
+        [legacy],
+        [{'parsed_id': 1, 'data': {'phones': ['021234567']}}, {'parsed_id': 2, 'data': {'phones': ['021234567']}}],
+    ]
+    assert detector.process_batch() == 1
+    assert 'DELETE FROM scr_parsed_data' in cur.execute.call_args_list[-1][0][0]
+
+def test_process_batch_empty_queue(detector):
+    detector, cur = detector
+    cur.fetchall.return_value = []
+    assert detector.process_batch() == 0
+    assert cur.execute.call_count == 1
+
+def test_get_latest_data_binds_listing(detector):
+    detector, cur = detector
+    detector.get_latest_data('L1')
+    assert cur.execute.call_args[0][1] == ('L1',)
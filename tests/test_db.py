@@ -16,3 +16,70 @@ def test_db_connection(mock_connect):
     assert cur.fetchone()[0] == 1
 
     conn.close()
+
+@patch('psycopg2.connect')
+def test_pooled_connection_reuses_connections(mock_connect):
+    from src.utils import db
+    mock_connect.side_effect = lambda *a, **kw: MagicMock(closed=0, autocommit=False)
+    db.close_pool()
+    try:
+        with db.pooled_connection() as first:
+            assert first.autocommit is True
+        with db.pooled_connection() as second:
+            assert second is first
+
+        stats = db.pool_stats()
+        assert stats['checkouts'] == 2
+        assert stats['in_use'] == 0
+        assert stats['connects'] == db.get_pool().minconn
+    finally:
+        db.close_pool()
+
+@patch('psycopg2.connect')
+def test_pooled_connection_discards_broken(mock_connect):
+    import psycopg2
+    import pytest
+    from src.utils import db
+    mock_connect.side_effect = lambda *a, **kw: MagicMock(closed=0, autocommit=True)
+    db.close_pool()
+    try:
+        with pytest.raises(psycopg2.OperationalError):
+            with db.pooled_connection() as conn:
+                raise psycopg2.OperationalError("server closed the connection")
+        conn.close.assert_called()
+        assert db.pool_stats()['discarded'] == 1
+        assert db.pool_stats()['in_use'] == 0
+    finally:
+        db.close_pool()
+
+@patch('src.utils.db.DB_POOL_MAX_SIZE', 1)
+@patch('src.utils.db.DB_POOL_MIN_SIZE', 1)
+@patch('psycopg2.connect')
+def test_exhausted_pool_waits_for_release(mock_connect):
+    import threading
+    import time
+    import psycopg2
+    import pytest
+    from src.utils import db
+    mock_connect.side_effect = lambda *a, **kw: MagicMock(closed=0, autocommit=True)
+    db.close_pool()
+    try:
+        pool = db.get_pool()
+        first = pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+        waiter.start()
+        time.sleep(0.1)
+        # second checkout blocks instead of raising PoolError
+        assert waiter.is_alive()
+        pool.release(first)
+        waiter.join(timeout=2)
+        assert got == [first]
+        assert db.pool_stats()['waits'] == 1
+
+        # an explicit timeout still gives up
+        with pytest.raises(psycopg2.pool.PoolError):
+            pool.acquire(timeout=0.05)
+        pool.release(got[0])
+    finally:
+        db.close_pool()
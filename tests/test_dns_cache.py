@@ -0,0 +1,124 @@
+import asyncio
+import socket
+import threading
+import time
+from unittest.mock import AsyncMock, patch
+from src.utils.dns_cache import DnsCache
+
+def make_resolver(answers, calls):
+    def getaddrinfo(host, port, family=0, type=0):
+        calls.append(host)
+        answer = answers[host]
+        if isinstance(answer, Exception):
+            raise answer
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (answer, 0))]
+    return getaddrinfo
+
+def resolve(cache, hosts, answers, calls):
+    with patch('src.utils.dns_cache.socket.getaddrinfo', make_resolver(answers, calls)):
+        return asyncio.run(cache.resolve_many(hosts))
+
+def make_cache(**kwargs):
+    cache = DnsCache(**kwargs)
+    cache._load_shared = AsyncMock(return_value={})
+    cache._store_shared = AsyncMock()
+    return cache
+
+def test_nxdomain_cached_as_dead():
+    cache = make_cache()
+    calls = []
+    answers = {
+        'alive.be': '1.2.3.4',
+        'dead.be': socket.gaierror(socket.EAI_NONAME, 'Name or service not known'),
+    }
+    result = resolve(cache, ['alive.be', 'dead.be'], answers, calls)
+    assert result['alive.be'] == (True, '1.2.3.4', None)
+    assert result['dead.be'][0] is False
+
+    # both answers are stored in the shared table and answered locally next time
+    stored = cache._store_shared.await_args.args[0]
+    assert set(stored) == {'alive.be', 'dead.be'}
+    calls.clear()
+    result = resolve(cache, ['alive.be', 'dead.be'], answers, calls)
+    assert calls == []
+    assert result['dead.be'][0] is False
+    assert cache.stats()['hits'] == 2
+
+def test_transient_error_not_cached():
+    cache = make_cache()
+    calls = []
+    answers = {'flaky.be': socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution')}
+    result = resolve(cache, ['flaky.be'], answers, calls)
+    assert result['flaky.be'][0] is None
+
+    resolve(cache, ['flaky.be'], answers, calls)
+    assert calls == ['flaky.be', 'flaky.be']
+
+def test_timeout_is_unknown():
+    cache = make_cache(timeout=0.01)
+    def slow(host, port, family=0, type=0):
+        time.sleep(0.2)
+    with patch('src.utils.dns_cache.socket.getaddrinfo', slow):
+        assert asyncio.run(cache.resolve_many(['slow.be']))['slow.be'][0] is None
+
+def test_concurrency_bounds_lookups_in_flight():
+    # timed-out lookups keep their resolver thread, so they still count against DNS_CONCURRENCY
+    cache = make_cache(concurrency=2, timeout=0.01)
+    lock = threading.Lock()
+    running = []
+    peak = []
+    def getaddrinfo(host, port, family=0, type=0):
+        with lock:
+            running.append(host)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(host)
+
+    with patch('src.utils.dns_cache.socket.getaddrinfo', getaddrinfo):
+        result = asyncio.run(cache.resolve_many([f'h{i}.be' for i in range(6)]))
+        cache._executor.shutdown(wait=True)
+    assert all(answer[0] is None for answer in result.values())
+    assert max(peak) <= 2
+
+@patch('src.utils.dns_cache.time.monotonic')
+def test_local_ttl_expiry(mock_monotonic):
+    cache = make_cache(positive_ttl=60, negative_ttl=10)
+    calls = []
+    answers = {
+        'alive.be': '1.2.3.4',
+        'dead.be': socket.gaierror(socket.EAI_NONAME, 'Name or service not known'),
+    }
+    mock_monotonic.return_value = 1000
+    resolve(cache, ['alive.be', 'dead.be'], answers, calls)
+
+    # negative answer expired, positive still valid
+    mock_monotonic.return_value = 1030
+    calls.clear()
+    resolve(cache, ['alive.be', 'dead.be'], answers, calls)
+    assert calls == ['dead.be']
+
+    mock_monotonic.return_value = 1100
+    calls.clear()
+    resolve(cache, ['alive.be'], answers, calls)
+    assert calls == ['alive.be']
+
+def test_shared_table_answers_and_fallback():
+    calls = []
+    answers = {'a.be': '1.1.1.1', 'b.be': '2.2.2.2'}
+
+    # answers from the shared table skip the lookup
+    cache = make_cache()
+    cache._load_shared = AsyncMock(return_value={'a.be': (False, None, 'Name or service not known')})
+    result = resolve(cache, ['a.be', 'b.be'], answers, calls)
+    assert result['a.be'][0] is False
+    assert calls == ['b.be']
+
+    # table down: resolve directly, failing store does not break the stage
+    cache = make_cache()
+    cache._load_shared = AsyncMock(side_effect=RuntimeError("connection refused"))
+    cache._store_shared = AsyncMock(side_effect=RuntimeError("connection refused"))
+    calls.clear()
+    result = resolve(cache, ['a.be', 'b.be'], answers, calls)
+    assert result == {'a.be': (True, '1.1.1.1', None), 'b.be': (True, '2.2.2.2', None)}
+    assert sorted(calls) == ['a.be', 'b.be']
@@ -0,0 +1,52 @@
+from bs4 import BeautifulSoup
+from src.utils.document import ParsedDocument, as_document
+from src.utils.language import detect_language
+from src.utils.multipage import find_promising_links
+from src.utils.patterns import extract_social_media_from_soup
+
+HTML = """
+<html lang="nl-BE">
+<head>
+    <title> Bakkerij Janssens </title>
+    <meta property="og:site_name" content="Janssens">
+    <script type="application/ld+json">{"@type": "LocalBusiness", "name": "Bakkerij Janssens BV"}</script>
+    <style>body { color: red }</style>
+</head>
+<body>
+    <nav><a href="/contact">Contact</a> <a href="https://www.facebook.com/janssens">FB</a></nav>
+    <p>Verse   broden</p>
+    <script>var x = "not text";</script>
+    <footer>BTW BE 0123.456.789</footer>
+</body>
+</html>
+"""
+
+def test_views():
+    doc = ParsedDocument(HTML)
+    assert doc.lang == 'nl-BE'
+    assert doc.title == 'Bakkerij Janssens'
+    assert doc.links == ['/contact', 'https://www.facebook.com/janssens']
+    assert doc.json_ld == [{"@type": "LocalBusiness", "name": "Bakkerij Janssens BV"}]
+    assert doc.meta_properties('og:') == {'site_name': 'Janssens'}
+    assert 'Verse   broden' in doc.text
+    assert 'BTW BE 0123.456.789' in doc.text
+    assert 'not text' not in doc.text and 'color' not in doc.text
+
+def test_text_matches_beautifulsoup():
+    soup = BeautifulSoup(HTML, 'lxml')
+    for elem in soup(['script', 'style']):
+        elem.decompose()
+    assert ParsedDocument(HTML).text == soup.get_text(separator=' ', strip=True)
+
+def test_shared_document_across_consumers():
+    doc = as_document(HTML)
+    assert as_document(doc) is doc
+    assert detect_language(doc) == ('nl', 0.99)
+    assert find_promising_links(doc, 'https://janssens.be', 'nl') == [('https://janssens.be/contact', 'contact')]
+    assert extract_social_media_from_soup(doc)['facebook'] == 'https://www.facebook.com/janssens'
+
+def test_unusual_input():
+    assert ParsedDocument('').text == ''
+    assert ParsedDocument(None).links == []
+    doc = ParsedDocument('<?xml version="1.0" encoding="utf-8"?><html><body><p>Café</p></body></html>')
+    assert doc.text == 'Café'
@@ -0,0 +1,55 @@
+import pytest
+from click.testing import CliRunner
+from src.utils.address import AddressExtractor, gazetteer_terms
+from src.utils.gazetteer import Gazetteer, TermTable, build_gazetteer, POST_CODE, MUNICIPALITY, STREET
+from scripts.bloom_admin import cli
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.utils.gazetteer.ADDRESS_BLOOM_CACHE_DIR', str(tmp_path / 'cache'))
+
+def test_term_table(tmp_path):
+    path = str(tmp_path / 'terms')
+    TermTable.write(path, ['PRAHA', 'BRNO', 'OSTRAVA', 'BRNO', 'A', 'ZLIN'])
+    table = TermTable(path)
+    for term in ['A', 'BRNO', 'OSTRAVA', 'PRAHA', 'ZLIN']:
+        assert term in table
+    for term in ['', 'B', 'BRN', 'BRNOX', 'PLZEN', 'ZZ']:
+        assert term not in table
+
+def test_exact_table_rejects_bloom_false_positives(tmp_path):
+    streets = [f"STRAAT{i}" for i in range(50)]
+    build_gazetteer('nl', {'post_codes': ['1011'], 'municipalities': ['AMSTERDAM'], 'streets': streets},
+                    str(tmp_path), error_rate=0.2)
+    gazetteer = Gazetteer('nl', str(tmp_path))
+    assert gazetteer.lookup('1011') == POST_CODE
+    assert gazetteer.lookup('AMSTERDAM') == MUNICIPALITY
+    assert all(gazetteer.lookup(s) == STREET for s in streets)
+
+    # terms the street filter lets through (20 % false positives) are not confirmed by the exact table
+    candidates = [f"WOORD{i}" for i in range(500)]
+    false_positives = [t for t in candidates if t in gazetteer.blooms[STREET]]
+    assert false_positives
+    assert all(gazetteer.lookup(t) is None for t in false_positives)
+
+def test_build_gazetteer_command_and_two_token_post_codes(tmp_path):
+    (tmp_path / 'psc.txt').write_text("110 00\n602 00\n")
+    (tmp_path / 'obce.txt').write_text("Praha\nBrno\n")
+    (tmp_path / 'ulice.txt').write_text("Vodičkova\nNáměstí Svobody\n")
+    result = CliRunner().invoke(cli, [
+        'build-gazetteer', 'cz', '--post-codes', str(tmp_path / 'psc.txt'),
+        '--municipalities', str(tmp_path / 'obce.txt'), '--streets', str(tmp_path / 'ulice.txt'),
+        '--out-dir', str(tmp_path),
+    ])
+    assert result.exit_code == 0, result.output
+    assert "cz_address_streets: 3 terms" in result.output
+
+    extractor = AddressExtractor('cz', str(tmp_path))
+    text = "Kontakt: Pekárna U Nováků, Vodičkova 12, 110 00 Praha 1. Otevřeno po-pá"
+    assert extractor.extract_addresses(text) == ['VODICKOVA 12 11000 PRAHA']
+    assert extractor.extract_addresses(text, window=0) == ['VODICKOVA 12 11000 PRAHA']
+
+def test_gazetteer_terms():
+    assert list(gazetteer_terms(["Rue de la Loi\n", "Chaussée de Louvain"])) == [
+        'RUE', 'DE', 'LA', 'LOI', 'CHAUSSEE', 'DE', 'LOUVAIN'
+    ]
@@ -0,0 +1,32 @@
+import unittest
+from src.utils.html_fingerprint import html_fingerprint, normalize_html
+
+PAGE = """<html><head>
+<meta name="csrf-token" content="{token}">
+<link rel="stylesheet" href="/style.css?ver={ver}">
+<script nonce="{token}">window.__t = {ver};</script>
+<script type="application/ld+json">{{"name": "Firma s.r.o."}}</script>
+</head><body>
+<!-- generated {ver} -->
+<form><input type="hidden" name="_token" value="{token}"></form>
+<p>Tel. +420 777 123 456, updated <time>{stamp}</time></p>
+<p>Opening 2024-05-01</p>
+</body></html>"""
+
+class TestHtmlFingerprint(unittest.TestCase):
+    def test_per_request_noise_is_ignored(self):
+        first = PAGE.format(token='abc123', ver='1700000000', stamp='2024-05-01T10:15:00+02:00')
+        second = PAGE.format(token='zzz999', ver='1700000456', stamp='2024-05-02 08:00:01')
+        self.assertEqual(html_fingerprint(first), html_fingerprint(second))
+        normalized = normalize_html(first)
+        self.assertIn('Firma s.r.o.', normalized)
+        self.assertNotIn('abc123', normalized)
+
+    def test_content_change_changes_fingerprint(self):
+        page = PAGE.format(token='abc123', ver='1', stamp='')
+        self.assertNotEqual(html_fingerprint(page), html_fingerprint(page.replace('777 123 456', '777 123 457')))
+        self.assertNotEqual(html_fingerprint(page), html_fingerprint(page.replace('2024-05-01', '2024-06-01')))
+        self.assertNotEqual(html_fingerprint(page), html_fingerprint(page.replace('Firma', 'Jina firma')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import httpx
+from src.utils.http_fetch import escalation_reason, conditional_headers, HttpFetcher
+
+BODY_TEXT = "<p>" + "Wij zijn een familiebedrijf in Gent met meer dan twintig jaar ervaring. " * 30 + "</p>"
+
+def page(body, head=""):
+    return f"<html><head><title>Firma</title>{head}</head><body>{body}</body></html>"
+
+def test_static_page_stays_on_http_tier():
+    assert escalation_reason(page(BODY_TEXT), 'text/html; charset=utf-8') is None
+
+def test_tiny_body():
+    assert escalation_reason("<html><body>Hi</body></html>") == 'tiny_body'
+
+def test_non_html():
+    assert escalation_reason(page(BODY_TEXT), 'application/pdf') == 'non_html'
+
+def test_spa_marker():
+    html = page('<div id="root"></div>' + '<script src="/static/js/main.js"></script>' * 50)
+    assert escalation_reason(html) == 'spa_marker'
+
+def test_noscript_wall():
+    html = page('<noscript><p>Please enable JavaScript to view this site.</p></noscript>' + BODY_TEXT)
+    assert escalation_reason(html) == 'noscript_wall'
+
+def test_js_shell():
+    html = page('<div id="content"></div>' + '<script>var x = "' + 'a' * 3000 + '";</script>')
+    assert escalation_reason(html) == 'js_shell'
+
+def test_conditional_fetch():
+    def handler(request):
+        if request.url.path == '/moved':
+            return httpx.Response(301, headers={'Location': 'https://firma.be/'})
+        if request.headers.get('if-none-match') == '"v1"':
+            return httpx.Response(304, headers={'ETag': '"v1"'})
+        return httpx.Response(200, headers={'ETag': '"v2"', 'Content-Type': 'text/html'}, text=page(BODY_TEXT))
+
+    async def run():
+        fetcher = HttpFetcher()
+        fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+        validators = conditional_headers('"v1"', 'Mon, 01 Jan 2024 00:00:00 GMT')
+        results = [
+            await fetcher.fetch('https://firma.be/', validators),
+            await fetcher.fetch('https://firma.be/', conditional_headers('"v0"')),
+            await fetcher.fetch('https://firma.be/'),
+            # 304 of a redirect target is not a revalidation of the requested page
+            await fetcher.fetch('https://firma.be/moved', validators),
+        ]
+        await fetcher.close()
+        return results
+
+    hit, miss, plain, redirected = asyncio.run(run())
+    assert conditional_headers() == {}
+    assert (hit['status_code'], hit['html'], hit['escalate'], hit['revalidation']) == (304, None, None, 'hit')
+    assert (miss['status_code'], miss['escalate'], miss['revalidation']) == (200, None, 'miss')
+    assert plain['revalidation'] is None
+    assert redirected['escalate'] == 'status_304'
+
+def test_fetch_checks_type_and_size_before_reading_body():
+    consumed = []
+
+    def body(size, chunk=1024):
+        async def chunks():
+            for _ in range(0, size, chunk):
+                consumed.append(chunk)
+                yield b'a' * chunk
+        return chunks()
+
+    def handler(request):
+        if request.url.path == '/file.pdf':
+            return httpx.Response(200, headers={'Content-Type': 'application/pdf'}, content=body(50_000))
+        if request.url.path == '/declared':
+            return httpx.Response(200, headers={'Content-Type': 'text/html', 'Content-Length': '50000'}, content=body(50_000))
+        if request.url.path == '/chunked':
+            return httpx.Response(200, headers={'Content-Type': 'text/html'}, content=body(50_000))
+        return httpx.Response(200, headers={'Content-Type': 'text/html; charset=utf-8'}, content=page(BODY_TEXT).encode())
+
+    async def run():
+        fetcher = HttpFetcher(max_body_bytes=10_000)
+        fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+        results = {}
+        for path in ('/file.pdf', '/declared', '/chunked', '/'):
+            consumed.clear()
+            results[path] = (await fetcher.fetch(f'https://firma.be{path}'), sum(consumed))
+        await fetcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [results[path][0]['escalate'] for path in ('/file.pdf', '/declared', '/chunked', '/')] == \
+        ['non_html', 'too_large', 'too_large', None]
+    assert all(results[path][0]['html'] is None for path in ('/file.pdf', '/declared', '/chunked'))
+    # nothing read for a non-HTML or declared-too-large body, a chunked one stops past the cap
+    assert results['/file.pdf'][1] == 0
+    assert results['/declared'][1] == 0
+    assert results['/chunked'][1] <= 11_264
+    assert results['/'][0]['html'] == page(BODY_TEXT)
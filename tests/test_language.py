@@ -19,3 +19,37 @@ def test_detect_unknown():
     # Could be unknown or something random, but checks handling
     assert lang is None
     assert conf == 0.0
+
+def test_declared_language_hints():
+    assert detect_language('<html><head><meta property="og:locale" content="nl_BE"></head><body>x</body></html>') == ('nl', 0.9)
+    assert detect_language('<html><head><meta http-equiv="Content-Language" content="fr-BE"></head></html>') == ('fr', 0.95)
+    assert detect_language('<html><body>...</body></html>', content_language='de-DE, en') == ('de', 0.95)
+    # <html lang> wins over the other hints
+    assert detect_language('<html lang="en-GB"><head><meta property="og:locale" content="nl_BE"></head></html>',
+                           content_language='de') == ('en', 0.99)
+
+def test_detection_is_cached_per_url(monkeypatch):
+    from src.utils import language
+    html = '<html><body>' + 'Dit is een Nederlandse tekst over brood en gebak uit onze bakkerij. ' * 50 + '</body></html>'
+    calls = []
+    original = language.detect_text_language
+    monkeypatch.setattr(language, 'detect_text_language', lambda text: calls.append(text) or original(text))
+
+    first = detect_language(html, 'https://bakkerij.be/')
+    assert first[0] == 'nl'
+    assert detect_language(html, 'https://bakkerij.be/') == first
+    assert len(calls) == 1
+    # deterministic (seeded) and bounded sample
+    assert detect_language(html) == first
+    assert all(len(text) > language.LANGUAGE_SAMPLE_CHARS for text in calls)
+    assert len(language.text_sample(calls[0])) == language.LANGUAGE_SAMPLE_CHARS
+
+def test_text_detection_is_seeded_on_own_factory():
+    from langdetect import DetectorFactory
+    from src.utils import language
+    text = "Dit is een korte tekst over een familiebedrijf uit Gent dat ramen en deuren plaatst. " * 3
+    results = {language.detect_text_language(text) for _ in range(5)}
+    assert len(results) == 1 and results.pop()[0] == 'nl'
+    # profiles are loaded once, langdetect's global factory state is left alone
+    assert language._detector_factory() is language._detector_factory()
+    assert DetectorFactory.seed is None
@@ -0,0 +1,47 @@
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
+from src.utils.page_ready import meta_refresh_target, read_ready_content
+
+def make_page(contents, url='https://example.be/'):
+    page = MagicMock()
+    page.url = url
+    page.wait_for_load_state = AsyncMock()
+    page.evaluate = AsyncMock(return_value='dom_quiet')
+    page.content = AsyncMock(side_effect=contents)
+    page.goto = AsyncMock()
+    return page
+
+def test_meta_refresh_target():
+    html = '<html><head><meta http-equiv="refresh" content="0; url=/nl/home"></head></html>'
+    assert meta_refresh_target(html, 'https://example.be/') == 'https://example.be/nl/home'
+    assert meta_refresh_target("<meta http-equiv='Refresh' content='2;URL=https://other.be'>", 'https://example.be/') == 'https://other.be'
+    # slow refresh (e.g. auto-reload every 5 minutes) and self-refresh are not redirects
+    assert meta_refresh_target('<meta http-equiv="refresh" content="300">', 'https://example.be/') is None
+    assert meta_refresh_target('<meta http-equiv="refresh" content="0;url=https://example.be/">', 'https://example.be/') is None
+    assert meta_refresh_target('<html></html>', 'https://example.be/') is None
+
+def test_read_ready_content_follows_js_navigation():
+    page = make_page([Exception("Execution context was destroyed, most likely because of a navigation"), '<html>ok</html>'])
+    html, signal, response = asyncio.run(read_ready_content(page))
+    assert html == '<html>ok</html>'
+    assert signal in ('networkidle', 'dom_quiet')
+    assert response is None
+    page.wait_for_load_state.assert_any_await('domcontentloaded')
+
+def test_read_ready_content_follows_meta_refresh():
+    page = make_page([
+        '<meta http-equiv="refresh" content="0;url=/home">',
+        '<html>home</html>',
+    ])
+    html, signal, response = asyncio.run(read_ready_content(page))
+    assert html == '<html>home</html>'
+    page.goto.assert_awaited_once_with('https://example.be/home', wait_until='domcontentloaded')
+    assert response is page.goto.return_value
+
+def test_read_ready_content_gives_up_after_max_redirects():
+    page = make_page([Exception("Execution context was destroyed")] * 3)
+    try:
+        asyncio.run(read_ready_content(page, max_redirects=2))
+        assert False, "expected the navigation error"
+    except Exception as e:
+        assert "Execution context was destroyed" in str(e)
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from src.workers.parser import Parser
+from src.workers.parser import Parser, parse_fetched
 
 @pytest.fixture
 def mock_db_parser():
@@ -27,3 +27,81 @@ def test_parse_simple_page(mock_db_parser):
     assert len(data['phones']) > 0
     assert data['org_num'] == '25596641'
     assert data['company_name'] == 'Test Firma s.r.o.'
+
+PAGE = """
+<html><head><title>Firma</title></head>
+<body><a href="/kontakt">Kontakt</a><p>Email: info@test.cz</p></body></html>
+"""
+
+def make_item(result_id, depth=0):
+    return {
+        'result_id': result_id, 'html': PAGE, 'html_path': None, 'detected_language': 'cs',
+        'url': 'https://test.cz', 'queue_id': 10 + result_id, 'depth': depth, 'opco': 'CZ', 'uni_listing_id': 'L1',
+    }
+
+def test_parse_item_outcome():
+    parser = Parser(connect=False)
+    outcome = parser.parse_item(make_item(1))
+    assert outcome['data']['emails'] == ['info@test.cz']
+    assert outcome['quality_score'] > 0
+    assert outcome['promising'] == [('https://test.cz/kontakt', 'contact')]
+    # no sub-pages below the max depth, unreadable HTML is an error outcome
+    assert parser.parse_item(make_item(2, depth=2))['promising'] == []
+    assert parser.parse_item({**make_item(3), 'html': None})['error'] == 'Could not read HTML'
+
+def test_save_batch_writes_only_leased_results(mock_db_parser):
+    cur = MagicMock()
+    cur.__enter__.return_value = cur
+    cur.fetchall.return_value = [(1,)]   # result 2 was re-leased by another parser
+    cur.rowcount = 1
+    mock_db_parser.conn.cursor.return_value = cur
+
+    items = [make_item(1), make_item(2)]
+    outcomes = [mock_db_parser.parse_item(item) for item in items]
+    assert mock_db_parser.save_batch(items, outcomes) == 1
+
+    update_sql, update_params = cur.execute.call_args_list[0][0]
+    assert 'AND r.lease_owner = %s' in update_sql
+    assert update_params[-1] == mock_db_parser.lease_owner
+    insert_sql, insert_params = cur.execute.call_args_list[1][0]
+    assert 'INSERT INTO scr_parsed_data' in insert_sql
+    assert insert_params[0] == 1 and len(insert_params) == 8
+    assert 'fingerprint IS DISTINCT FROM' in insert_sql
+    assert 'INSERT INTO scr_scrape_queue' in cur.execute.call_args_list[2][0][0]
+    assert mock_db_parser.conn.autocommit is True
+
+def test_save_batch_inserts_one_version_per_listing_fingerprint(mock_db_parser):
+    cur = MagicMock()
+    cur.__enter__.return_value = cur
+    cur.fetchall.return_value = [(1,), (2,), (3,)]
+    cur.rowcount = 2
+    mock_db_parser.conn.cursor.return_value = cur
+
+    # results 1 and 2 are the same content of listing L1 in one batch - the INSERT filter cannot see the other row
+    items = [make_item(1), make_item(2), {**make_item(3), 'uni_listing_id': 'L2'}]
+    outcomes = [mock_db_parser.parse_item(item) for item in items]
+    mock_db_parser.save_batch(items, outcomes)
+
+    insert_sql, insert_params = cur.execute.call_args_list[1][0]
+    assert 'INSERT INTO scr_parsed_data' in insert_sql
+    assert len(insert_params) == 16
+    assert (insert_params[0], insert_params[1]) == (1, 'L1')
+    assert (insert_params[8], insert_params[9]) == (3, 'L2')
+
+def test_run_batch_parses_in_process_pool(mock_db_parser):
+    batches = [[make_item(1), make_item(2), make_item(3)], []]
+    mock_db_parser.claim_batch = MagicMock(side_effect=lambda n: batches.pop(0))
+    saved = []
+    mock_db_parser.save_batch = MagicMock(side_effect=lambda items, outcomes: saved.extend(outcomes) or len(outcomes))
+
+    mock_db_parser.run_batch(workers=2, batch_size=3)
+
+    assert sorted(o['result_id'] for o in saved) == [1, 2, 3]
+    assert all(o['data']['emails'] == ['info@test.cz'] for o in saved)
+
+def test_parse_fetched_single_parse():
+    parsed = parse_fetched(PAGE, 'https://test.cz', ('cs', 0.99), find_links=True)
+    assert parsed['language'] == 'cs'
+    assert parsed['promising'] == [('https://test.cz/kontakt', 'contact')]
+    assert parsed['data']['emails'] == ['info@test.cz']
+    assert parse_fetched(PAGE, 'https://test.cz', ('cs', 0.99))['promising'] == []
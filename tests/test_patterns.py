@@ -1,6 +1,8 @@
 import pytest
 from bs4 import BeautifulSoup
-from src.utils.patterns import extract_phones, extract_org_num, extract_social_media_from_soup
+from src.utils.patterns import (
+    PATTERNS, extract_emails, extract_phones, extract_org_num, extract_social_media, extract_social_media_from_soup
+)
 
 class TestPatterns:
     def test_extract_phones_be(self):
@@ -77,3 +79,24 @@ class TestPatterns:
         assert socials['linkedin'] == "https://www.linkedin.com/company/example-co"
         assert socials['youtube'] == "https://youtube.com/channel/UC123456"
         assert socials['google_business'] == "https://goo.gl/maps/xyz"
+
+    def test_social_media_prefilter_keeps_legacy_results(self):
+        import re
+        hrefs = [
+            "/contact", "mailto:info@example.be", "https://www.google.com/maps/place?cid=123456",
+            "https://x.com/example", "https://www.facebook.com/sharer.php?u=https://twitter.com/foo",
+            "https://business.google.com/website/example", "https://g.page/example-gent", "https://youtube.com/@example",
+        ]
+        legacy = {}
+        for href in hrefs:
+            for platform, pattern in PATTERNS['social_media'].items():
+                if platform not in legacy and re.search(pattern, href, re.IGNORECASE):
+                    legacy[platform] = href
+        soup = BeautifulSoup(''.join(f'<a href="{h}">x</a>' for h in hrefs), 'lxml')
+        assert extract_social_media_from_soup(soup) == legacy
+        assert extract_social_media(' '.join(hrefs))['twitter'] == 'https://x.com/example'
+        assert extract_social_media('no links here') == {}
+
+    def test_extract_emails(self):
+        assert sorted(extract_emails("Mail info@firma.be of INFO@firma.be, niet naar @firma")) == ['INFO@firma.be', 'info@firma.be']
+        assert extract_emails("geen e-mail") == []
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from src.utils.politeness import DomainScheduler
+
+def test_max_in_flight_per_host():
+    async def run():
+        scheduler = DomainScheduler(base_delay=0, max_per_host=2)
+        await scheduler.acquire('a.be')
+        await scheduler.acquire('a.be')
+        # other hosts are not affected
+        await asyncio.wait_for(scheduler.acquire('b.be'), 0.1)
+
+        third = asyncio.create_task(scheduler.acquire('a.be'))
+        await asyncio.sleep(0.05)
+        assert not third.done()
+        scheduler.release('a.be', 200)
+        await asyncio.wait_for(third, 0.1)
+
+    asyncio.run(run())
+
+def test_token_bucket_spaces_requests():
+    async def run():
+        scheduler = DomainScheduler(base_delay=0.1, max_per_host=5)
+        started = time.monotonic()
+        for _ in range(3):
+            await scheduler.acquire('a.be')
+        return time.monotonic() - started
+
+    # first request immediately, then one per base_delay
+    assert 0.18 <= asyncio.run(run()) < 0.5
+
+def test_backoff_on_429_and_decay():
+    scheduler = DomainScheduler(base_delay=1, max_per_host=2, max_delay=5)
+
+    async def run():
+        await scheduler.acquire('a.be')
+        scheduler.release('a.be', 429)
+        assert scheduler.backed_off_domains() == {'a.be'}
+        assert scheduler._hosts['a.be'].delay == 2
+
+        # capped at max_delay
+        for _ in range(3):
+            scheduler._hosts['a.be'].tokens = 1.0
+            await scheduler.acquire('a.be')
+            scheduler.release('a.be', 503)
+        assert scheduler._hosts['a.be'].delay == 5
+
+        # successes decay back to base
+        for _ in range(10):
+            scheduler._hosts['a.be'].tokens = 1.0
+            await scheduler.acquire('a.be')
+            scheduler.release('a.be', 200, elapsed=0.5)
+            if 'a.be' not in scheduler._hosts:
+                break
+        assert scheduler.backed_off_domains() == set()
+
+    asyncio.run(run())
+
+def test_slow_response_increases_delay():
+    scheduler = DomainScheduler(base_delay=2, max_per_host=2, slow_response=8)
+
+    async def run():
+        await scheduler.acquire('a.be')
+        scheduler.release('a.be', 200, elapsed=12)
+        assert scheduler._hosts['a.be'].delay == 3
+
+    asyncio.run(run())
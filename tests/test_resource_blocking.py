@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
+from src.utils.resource_blocking import ResourceBlocker
+
+def make_route(resource_type, url):
+    route = MagicMock()
+    route.request.resource_type = resource_type
+    route.request.url = url
+    route.continue_ = AsyncMock()
+    route.abort = AsyncMock()
+    return route
+
+def test_block_reason():
+    blocker = ResourceBlocker(resource_types=['image', 'font'], denied_domains=['google-analytics.com'], enabled=True)
+    assert blocker.block_reason('document', 'https://example.be/logo.png') is None
+    assert blocker.block_reason('image', 'https://example.be/logo.png') == 'type:image'
+    assert blocker.block_reason('script', 'https://www.google-analytics.com/analytics.js') == 'domain'
+    assert blocker.block_reason('script', 'https://example.be/app.js') is None
+    # the denylist only applies to third parties
+    assert blocker.block_reason('script', 'https://google-analytics.com/x.js', 'google-analytics.com') is None
+
+def test_install_counts_blocked_and_loaded_requests():
+    blocker = ResourceBlocker(resource_types=['image'], denied_domains=['doubleclick.net'], enabled=True)
+    page = MagicMock()
+    page.route = AsyncMock()
+
+    async def run():
+        stats = await blocker.install(page, 'https://example.be')
+        handle = page.route.call_args[0][1]
+        on_finished = page.on.call_args[0][1]
+
+        routes = [
+            make_route('document', 'https://example.be/'),
+            make_route('image', 'https://example.be/a.jpg'),
+            make_route('script', 'https://ad.doubleclick.net/x.js'),
+        ]
+        for route in routes:
+            await handle(route)
+
+        request = MagicMock()
+        request.sizes = AsyncMock(return_value={'responseBodySize': 1000, 'responseHeadersSize': 24})
+        await on_finished(request)
+        return stats, routes
+
+    stats, routes = asyncio.run(run())
+    routes[0].continue_.assert_awaited_once()
+    routes[1].abort.assert_awaited_once()
+    routes[2].abort.assert_awaited_once()
+    assert stats == {
+        'requests': 1, 'transferred_bytes': 1024, 'blocked_requests': 2,
+        'blocked_by_type': {'image': 1}, 'blocked_by_domain': 1,
+    }
+
+def test_disabled_profile_only_measures():
+    blocker = ResourceBlocker(enabled=False)
+    page = MagicMock()
+    page.route = AsyncMock()
+    asyncio.run(blocker.install(page, 'https://example.be'))
+    page.route.assert_not_called()
+    page.on.assert_called_once()
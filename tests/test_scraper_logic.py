@@ -1,5 +1,7 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock, patch
+import asyncio
+import time
 import sys
 import os
 
@@ -10,7 +12,7 @@ from workers.scraper import Scraper
 class TestScraperLogic(unittest.TestCase):
     @patch('workers.scraper.get_db_connection')
     @patch('workers.scraper.setup_logging')
-    def test_fetch_batch(self, mock_log, mock_get_db):
+    def test_claim_batch(self, mock_log, mock_get_db):
         mock_conn = MagicMock()
         mock_cur = MagicMock()
         mock_cur.__enter__.return_value = mock_cur
@@ -18,12 +20,12 @@ class TestScraperLogic(unittest.TestCase):
         mock_get_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cur
 
-        # Mock result for fetch_batch
+        # Mock result for claim_batch
         # fetchall should return a list of dicts (RealDictCursor)
         mock_cur.fetchall.return_value = [{'queue_id': 1, 'url': 'http://example.com', 'uni_listing_id': 100, 'retry_count': 0, 'depth': 0}]
 
         scraper = Scraper()
-        batch = scraper.fetch_batch(1)
+        batch = scraper.claim_batch(1)
 
         self.assertEqual(len(batch), 1)
         self.assertEqual(batch[0]['url'], 'http://example.com')
@@ -37,34 +39,344 @@ class TestScraperLogic(unittest.TestCase):
         # uni_listing_id is now in the SELECT list, not necessarily in WHERE clause unless specific logic
         # But we check if it is selected
         self.assertIn("uni_listing_id", sql)
+        # Single UPDATE ... RETURNING that leases the rows to this scraper
+        self.assertIn("UPDATE scr_scrape_queue", sql)
+        self.assertIn("lease_expires_at < NOW()", sql)
+        self.assertIn("b.domain = ANY(scr_domain_suffixes(scr_scrape_queue.domain))", sql)
+        self.assertNotIn("LIKE", sql)
+        self.assertIn("RETURNING", sql)
+        self.assertIn("PARTITION BY domain", sql)
+        params = mock_cur.execute.call_args[0][1]
+        self.assertEqual(params[2], scraper.lease_owner)
 
+        scraper.claim_batch(5, exclude_domains={'busy.be'})
+        params = mock_cur.execute.call_args[0][1]
+        self.assertEqual(params[0], ['busy.be'])
+        self.assertEqual(params[-1], 5)
+
+    @patch('workers.scraper.async_connection')
     @patch('workers.scraper.get_db_connection')
     @patch('workers.scraper.setup_logging')
-    def test_handle_redirect_sync(self, mock_log, mock_get_db):
+    def test_handle_redirect(self, mock_log, mock_get_db, mock_async_conn):
         mock_conn = MagicMock()
         mock_cur = MagicMock()
-        mock_cur.__enter__.return_value = mock_cur
-        mock_get_db.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cur
-
-        mock_cur.fetchone.return_value = [99] # new queue_id
+        mock_cur.fetchone = AsyncMock(return_value=[99]) # new queue_id
+        mock_cur.rowcount = 1
+        mock_conn.execute = AsyncMock(return_value=mock_cur)
+        mock_async_conn.return_value.__aenter__.return_value = mock_conn
 
         scraper = Scraper()
-        new_id = scraper.handle_redirect_sync(
+        new_id = asyncio.run(scraper.handle_redirect(
             queue_id=10,
             original_url='http://old.com',
             final_url='https://new.com',
             uni_listing_id=123,
             opco='BE',
             depth=0
-        )
+        ))
 
         self.assertEqual(new_id, 99)
-        self.assertTrue(mock_cur.execute.called)
+        self.assertTrue(mock_conn.execute.called)
         
-        # Verify status set to 'redirected' for original queue_id
-        update_call_sql = mock_cur.execute.call_args_list[0][0][0]
+        # Verify status set to 'redirected' for original queue_id, in one transaction with the insert
+        update_call_sql = mock_conn.execute.call_args_list[0][0][0]
         self.assertIn("status = 'redirected'", update_call_sql)
+        mock_conn.transaction.assert_called_once()
+        # Connection is borrowed from the async pool, not opened per event
+        mock_get_db.assert_called_once()
+        mock_async_conn.assert_called_once()
+        self.assertIn("lease_owner = %s", update_call_sql)
+        self.assertEqual(mock_conn.execute.call_args_list[0][0][1], (10, scraper.lease_owner))
+
+        # Lease lost meanwhile (reclaimed by another scraper): no redirect bookkeeping
+        mock_cur.rowcount = 0
+        mock_conn.execute.reset_mock()
+        new_id = asyncio.run(scraper.handle_redirect(10, 'http://old.com', 'https://new.com', 123, 'BE', 0))
+        self.assertEqual(new_id, 10)
+        self.assertEqual(mock_conn.execute.await_count, 1)
+
+    @patch('workers.scraper.SCRAPER_MAX_RUNTIME_SECONDS', 60)
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_streaming_prefetch_and_consume(self, mock_log, mock_get_db):
+        scraper = Scraper()
+        items = [{'queue_id': i, 'url': f'https://example{i}.com', 'uni_listing_id': None,
+                  'retry_count': 0, 'depth': 0} for i in range(5)]
+        batches = [items[:3], items[3:]]
+        scraper.claim_batch = MagicMock(side_effect=lambda n, exclude=(): batches.pop(0) if batches else [])
+        scraper.release_leases = AsyncMock()
+        scraper._dns_cache = None
+
+        dispatched = []
+        crawler = MagicMock()
+
+        async def add_requests(requests):
+            # Crawler "handles" the page right away
+            for request in requests:
+                dispatched.append(request.user_data['queue_id'])
+                scraper.finish_item(request.user_data['queue_id'])
+        crawler.add_requests = add_requests
+
+        async def run():
+            scraper._buffer = asyncio.Queue(maxsize=40)
+            scraper._browser_slots = asyncio.Semaphore(2)
+            consumers = [asyncio.create_task(scraper.consume(crawler)) for _ in range(2)]
+            has_more = await scraper.prefetch(time.time())
+            await scraper.drain(consumers)
+            return has_more
+
+        has_more = asyncio.run(run())
+
+        self.assertFalse(has_more)
+        self.assertEqual(sorted(dispatched), [0, 1, 2, 3, 4])
+        self.assertEqual(scraper._in_flight, {})
+        self.assertEqual(scraper._browser_slots._value, 2)
+
+    @patch('workers.scraper.save_raw_html')
+    @patch('workers.scraper.async_connection')
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_write_completions_batches_statements(self, mock_log, mock_get_db, mock_async_conn, mock_save_html):
+        mock_conn = MagicMock()
+        mock_cur = MagicMock()
+        mock_cur.execute = AsyncMock()
+        mock_cur.fetchall = AsyncMock(return_value=[(501, 1, 'https://a.com'), (502, 2, 'https://b.com')])
+        mock_cur.rowcount = 2
+        mock_conn.cursor.return_value.__aenter__.return_value = mock_cur
+        mock_async_conn.return_value.__aenter__.return_value = mock_conn
+        mock_save_html.side_effect = lambda url, html, result_id: (f"{result_id}.html.gz", len(html))
+
+        scraper = Scraper()
+        batch = [
+            {'source_queue_id': 1, 'queue_id': 1, 'url': 'https://a.com', 'status': 'completed',
+             'result': {'html': '<html>a</html>', 'status_code': 200, 'fetch_tier': 'http'},
+             'language': 'en', 'language_confidence': 0.9, 'retry_count': None, 'next_scrape_at': None,
+             'uni_listing_id': 7, 'depth': 0, 'subpages': ['https://a.com/contact', 'https://a.com/about']},
+            {'source_queue_id': 2, 'queue_id': 2, 'url': 'https://b.com', 'status': 'pending',
+             'result': {'html': None, 'status_code': 0, 'error': 'timeout'},
+             'language': None, 'language_confidence': 0.0, 'retry_count': 1, 'next_scrape_at': None,
+             'uni_listing_id': None, 'depth': 0, 'subpages': []},
+        ]
+        asyncio.run(scraper.write_completions(batch))
+
+        # One statement per kind for the whole batch, in one transaction
+        sqls = [call.args[0] for call in mock_cur.execute.await_args_list]
+        self.assertEqual(len(sqls), 4)
+        self.assertIn("INSERT INTO scr_scrape_results", sqls[0])
+        self.assertIn("UPDATE scr_scrape_results", sqls[1])
+        self.assertIn("UPDATE scr_scrape_queue", sqls[2])
+        self.assertIn("INSERT INTO scr_scrape_queue", sqls[3])
+        mock_conn.transaction.assert_called_once()
+
+        self.assertEqual(batch[0]['result_id'], 501)
+        self.assertEqual(batch[1]['result_id'], 502)
+        self.assertEqual(mock_cur.execute.await_args_list[1].args[1], [501, '501.html.gz', 14])
+        status_params = mock_cur.execute.await_args_list[2].args[1]
+        self.assertEqual(status_params, [1, 'completed', None, None, True, 2, 'pending', 1, None, True, scraper.lease_owner])
+        self.assertIn("q.lease_owner = %s", sqls[2])
+        subpage_params = mock_cur.execute.await_args_list[3].args[1]
+        self.assertEqual(subpage_params[3], 501)  # parent_scrape_id
+        self.assertEqual(len(subpage_params), 10)
+
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_pre_resolve_fails_dead_hosts(self, mock_log, mock_get_db):
+        scraper = Scraper()
+        scraper._dns_cache = MagicMock()
+        scraper._dns_cache.resolve_many = AsyncMock(return_value={
+            'www.alive.be': (True, '1.2.3.4', None),
+            'www.dead.be': (False, None, 'Name or service not known'),
+        })
+        scraper.add_domain_to_blacklist = AsyncMock()
+        scraper.record_completion = AsyncMock()
+        batch = [
+            {'queue_id': 1, 'url': 'https://www.alive.be/'},
+            {'queue_id': 2, 'url': 'https://www.dead.be/'},
+            {'queue_id': 3, 'url': 'https://www.dead.be/contact'},
+        ]
+
+        alive = asyncio.run(scraper.pre_resolve(batch))
+
+        self.assertEqual([item['queue_id'] for item in alive], [1])
+        scraper.add_domain_to_blacklist.assert_awaited_once_with('www.dead.be', 'no_dns')
+        failed = [call.args for call in scraper.record_completion.await_args_list]
+        self.assertEqual([args[0] for args in failed], [2, 3])
+        self.assertTrue(all(args[4] == 'failed' for args in failed))
+        self.assertIn("ERR_NAME_NOT_RESOLVED", failed[0][3]['error'])
+
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_pre_resolve_blacklists_only_the_failed_host(self, mock_log, mock_get_db):
+        scraper = Scraper()
+        scraper._dns_cache = MagicMock()
+        scraper._dns_cache.resolve_many = AsyncMock(return_value={
+            'www.x.be': (False, None, 'Name or service not known'),
+            'x.be': (True, '1.2.3.4', None),
+        })
+        scraper.add_domain_to_blacklist = AsyncMock()
+        scraper.record_completion = AsyncMock()
+        batch = [
+            {'queue_id': 1, 'url': 'https://www.x.be/'},
+            {'queue_id': 2, 'url': 'https://x.be/contact'},
+        ]
+
+        alive = asyncio.run(scraper.pre_resolve(batch))
+
+        self.assertEqual([item['queue_id'] for item in alive], [2])
+        # the www-less domain (and its subdomains) stay scrapeable
+        scraper.add_domain_to_blacklist.assert_awaited_once_with('www.x.be', 'no_dns')
+
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_http_tier_404_fails_like_browser_tier(self, mock_log, mock_get_db):
+        scraper = Scraper()
+        scraper.record_completion = AsyncMock()
+        scraper._http_fetcher = MagicMock()
+        item = {'queue_id': 7, 'url': 'https://gone.be/', 'uni_listing_id': 1, 'retry_count': 0, 'depth': 0}
+
+        for status_code, expected in ((404, 'failed'), (200, 'completed')):
+            scraper._http_fetcher.fetch = AsyncMock(return_value={
+                'html': '<html>x</html>', 'status_code': status_code, 'headers': {},
+                'final_url': 'https://gone.be/', 'ip_address': None, 'escalate': None,
+            })
+            self.assertIsNone(asyncio.run(scraper.try_http_tier(item)))
+            args, kwargs = scraper.record_completion.await_args
+            self.assertEqual(args[4], expected)
+
+        # the 404 is a hard failure: no retry, no 90-day re-scrape
+        args, kwargs = scraper.record_completion.await_args_list[0]
+        self.assertEqual(args[5], None)
+        self.assertIsNone(kwargs['next_scrape_at'])
+        self.assertIn("status code: 404", args[3]['error'])
+        self.assertEqual(scraper.failure_status("status code: 404 (Not Found)", 0)[0],
+                         scraper.failure_status("status code: 410 (Gone)", 0)[0])
+
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_host_response_time_is_measured_per_fetch(self, mock_log, mock_get_db):
+        scraper = Scraper()
+        scraper._scheduler = MagicMock()
+        scraper._scheduler.acquire = AsyncMock()
+
+        async def run():
+            await scraper.acquire_host(1, 'example.com')
+            # waiting for a browser slot / crawler queue does not count
+            await asyncio.sleep(0.05)
+            scraper.mark_fetch_started(1)
+            scraper.mark_fetch_finished(1)
+            scraper.release_host(1, 200)
+
+        asyncio.run(run())
+        domain, status, elapsed = scraper._scheduler.release.call_args[0]
+        self.assertEqual((domain, status), ('example.com', 200))
+        self.assertLess(elapsed, 0.05)
+        self.assertEqual(scraper._fetch_started, {})
+        self.assertEqual(scraper._fetch_elapsed, {})
+
+    @patch('workers.scraper.save_raw_html')
+    @patch('workers.scraper.async_connection')
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_parse_on_fetch_stores_parsed_data_with_result(self, mock_log, mock_get_db, mock_async_conn, mock_save_html):
+        from concurrent.futures import ThreadPoolExecutor
+        mock_conn = MagicMock()
+        mock_cur = MagicMock()
+        mock_cur.execute = AsyncMock()
+        mock_cur.fetchall = AsyncMock(return_value=[(601, 1, 'https://test.cz')])
+        mock_cur.rowcount = 1
+        mock_conn.cursor.return_value.__aenter__.return_value = mock_cur
+        mock_async_conn.return_value.__aenter__.return_value = mock_conn
+        mock_save_html.return_value = ('601.html.gz', 100)
+
+        scraper = Scraper()
+        scraper._parse_pool = ThreadPoolExecutor(1)
+        scraper.subpages_allowed = AsyncMock(return_value=True)
+        html = '<html lang="cs"><head><title>Firma</title></head><body><a href="/kontakt">K</a> info@test.cz</body></html>'
+
+        async def run():
+            await scraper.record_completion(1, 1, 'https://test.cz', {'html': html, 'status_code': 200}, 'completed',
+                                            uni_listing_id=7, opco='CZ')
+            return list(scraper._writer._pending)
+
+        pending = asyncio.run(run())
+        scraper._parse_pool.shutdown()
+        self.assertEqual(pending[0]['language'], 'cs')
+        self.assertEqual(pending[0]['subpages'], ['https://test.cz/kontakt'])
+        self.assertEqual(pending[0]['parsed']['data']['emails'], ['info@test.cz'])
+
+        asyncio.run(scraper.write_completions(pending))
+        calls = mock_cur.execute.await_args_list
+        self.assertEqual(calls[0].args[1][-3], 'processed')  # processing_status of the result
+        parsed_call = next(call for call in calls if 'INSERT INTO scr_parsed_data' in call.args[0])
+        self.assertEqual(parsed_call.args[1][:3], [601, 7, 'cs'])
+        self.assertEqual(parsed_call.args[1][5], 'CZ')
+        self.assertIn('fingerprint IS DISTINCT FROM', parsed_call.args[0])
+
+    @patch('workers.scraper.save_raw_html')
+    @patch('workers.scraper.async_connection')
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_unchanged_page_is_stored_as_not_modified(self, mock_log, mock_get_db, mock_async_conn, mock_save_html):
+        from src.utils.html_fingerprint import html_fingerprint
+        mock_conn = MagicMock()
+        mock_cur = MagicMock()
+        mock_cur.execute = AsyncMock()
+        mock_cur.fetchall = AsyncMock(return_value=[(701, 1, 'https://test.cz')])
+        mock_cur.rowcount = 1
+        mock_conn.cursor.return_value.__aenter__.return_value = mock_cur
+        mock_async_conn.return_value.__aenter__.return_value = mock_conn
+
+        scraper = Scraper()
+        scraper.find_subpages = AsyncMock(return_value=['https://test.cz/kontakt'])
+        html = '<html lang="cs"><body><a href="/kontakt">K</a> info@test.cz</body></html>'
+        previous = (650, html_fingerprint(html.replace('<body>', '<body><!-- rendered 12:00 -->')))
+
+        async def run():
+            await scraper.record_completion(1, 1, 'https://test.cz', {'html': html, 'status_code': 200}, 'completed',
+                                            uni_listing_id=7, previous=previous)
+            return list(scraper._writer._pending)
+
+        pending = asyncio.run(run())
+        self.assertEqual(pending[0]['result']['same_as_result_id'], 650)
+        self.assertEqual(pending[0]['subpages'], [])
+        scraper.find_subpages.assert_not_awaited()
+
+        asyncio.run(scraper.write_completions(pending))
+        mock_save_html.assert_not_called()
+        calls = mock_cur.execute.await_args_list
+        self.assertEqual(calls[0].args[1][-3:], ['not_modified', previous[1], 650])
+        self.assertIn("p.result_id = r.same_as_result_id", calls[1].args[0])
+        self.assertEqual(calls[1].args[1], ([701],))
+
+    @patch('workers.scraper.get_db_connection')
+    @patch('workers.scraper.setup_logging')
+    def test_http_tier_revalidates_requeued_page(self, mock_log, mock_get_db):
+        scraper = Scraper()
+        scraper._writer = MagicMock()
+        scraper._writer.submit = AsyncMock()
+        scraper.release_host = MagicMock()
+        scraper._http_fetcher = MagicMock()
+        scraper._http_fetcher.fetch = AsyncMock(return_value={
+            'html': None, 'status_code': 304, 'headers': {'etag': '"v1"'},
+            'final_url': 'https://firma.be/', 'ip_address': None, 'escalate': None, 'revalidation': 'hit',
+        })
+        item = {'queue_id': 7, 'url': 'https://firma.be/', 'uni_listing_id': 1, 'retry_count': 0, 'depth': 0,
+                'previous_result_id': 650, 'previous_fingerprint': 'f' * 32,
+                'previous_etag': '"v1"', 'previous_last_modified': None}
+
+        self.assertIsNone(asyncio.run(scraper.try_http_tier(item)))
+        url, validators = scraper._http_fetcher.fetch.await_args.args
+        self.assertEqual(validators, {'If-None-Match': '"v1"'})
+        completion = scraper._writer.submit.await_args.args[0]
+        self.assertEqual(completion['status'], 'completed')
+        self.assertIsNone(completion['result']['error'])
+        self.assertEqual(completion['result']['same_as_result_id'], 650)
+        self.assertEqual(completion['result']['content_fingerprint'], 'f' * 32)
+
+        # first scrape: plain GET
+        del item['previous_fingerprint']
+        asyncio.run(scraper.try_http_tier(item))
+        self.assertIsNone(scraper._http_fetcher.fetch.await_args.args[1])
 
 if __name__ == '__main__':
     unittest.main()
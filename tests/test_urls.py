@@ -1,5 +1,5 @@
 import pytest
-from src.utils.urls import normalize_url, extract_domain, same_domain, is_valid_url
+from src.utils.urls import normalize_url, extract_domain, same_domain, is_valid_url, url_domain, subdomain_like_pattern
 
 def test_normalize_url():
     assert normalize_url('https://Example.com/') == 'https://example.com'
@@ -11,6 +11,18 @@ def test_extract_domain():
     assert extract_domain('https://www.example.com/path') == 'www.example.com'
     assert extract_domain('http://sub.domain.co.uk') == 'sub.domain.co.uk'
 
+def test_url_domain():
+    assert url_domain('https://WWW.Example.com:8443/path?q=1') == 'example.com'
+    assert url_domain('http://user:pw@shop.example.be/x') == 'shop.example.be'
+    assert url_domain('www.example.be') == 'example.be'
+    assert url_domain('example.be') == 'example.be'
+    assert url_domain('') is None
+    assert url_domain(None) is None
+
+def test_subdomain_like_pattern():
+    assert subdomain_like_pattern('example.be') == 'eb.elpmaxe.%'
+    assert subdomain_like_pattern('my_shop.be') == 'eb.pohs\\_ym.%'
+
 def test_same_domain():
     assert same_domain('https://test.com/a', 'https://test.com/b') == True
     assert same_domain('https://test.com', 'https://other.com') == False
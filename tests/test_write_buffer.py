@@ -0,0 +1,45 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from src.utils.write_buffer import WriteBehindBuffer
+
+def test_flush_on_max_items():
+    async def run():
+        write = AsyncMock()
+        flushed = MagicMock()
+        buffer = WriteBehindBuffer(write, max_items=3, max_delay_ms=10_000, on_flushed=flushed)
+        for i in range(7):
+            await buffer.submit(i)
+        assert write.await_count == 2
+        assert write.await_args_list[0].args[0] == [0, 1, 2]
+        await buffer.close()
+        assert write.await_args_list[-1].args[0] == [6]
+        assert flushed.call_count == 3
+        return buffer.stats()
+
+    stats = asyncio.run(run())
+    assert stats == {'pending': 0, 'flushes': 3, 'flushed_items': 7, 'failed_items': 0}
+
+def test_flush_on_timer():
+    async def run():
+        write = AsyncMock()
+        buffer = WriteBehindBuffer(write, max_items=100, max_delay_ms=20)
+        buffer.start()
+        await buffer.submit('a')
+        await asyncio.sleep(0.1)
+        assert write.await_args.args[0] == ['a']
+        await buffer.close()
+        assert write.await_count == 1
+
+    asyncio.run(run())
+
+def test_failed_flush_still_reports_items():
+    async def run():
+        write = AsyncMock(side_effect=RuntimeError("db down"))
+        flushed = MagicMock()
+        buffer = WriteBehindBuffer(write, max_items=2, max_delay_ms=10_000, on_flushed=flushed)
+        await buffer.submit(1)
+        await buffer.submit(2)
+        flushed.assert_called_once_with([1, 2])
+        return buffer.stats()
+
+    assert asyncio.run(run())['failed_items'] == 2